@@ -9,19 +9,75 @@ class Settings(BaseSettings):
     FIREBASE_CREDENTIALS_PATH: str
     
     # AI
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str = ""
+    LLM_PROVIDER: str = "gemini"  # gemini | stub (offline load testing)
+    LLM_STUB_LATENCY_MS: int = 800
+    LLM_STUB_JITTER_MS: int = 200
+    LLM_STUB_ERROR_RATE: float = 0.0
+    LLM_STUB_TIMEOUT_RATE: float = 0.0
+    LLM_STUB_FIXTURES: str = ""
+    LLM_STUB_SEED: int = 42
+    INSIGHTS_TTL_MINUTES: int = 360
+    CONTENT_POOL_SIZE: int = 10
+    SNAPSHOT_TTL_SECONDS: int = 30
+    PROMPT_TOKEN_BUDGET: int = 1200
+    SINGLEFLIGHT_SHARED_LOCK: bool = False  # coalesce across workers via Postgres advisory locks
+    SINGLEFLIGHT_LOCK_TIMEOUT_MS: int = 15000
+    PRECOMPUTE_HOURS: str = "4,15"  # off-peak runs ahead of the morning/evening peaks; empty disables
+    PRECOMPUTE_PROCESSES: int = 2
+    PRECOMPUTE_CHUNK_SIZE: int = 200  # users per set-based batch
+    PRECOMPUTE_AI_CONCURRENCY: int = 8  # LLM calls in flight across all processes
+    PRECOMPUTE_ACTIVE_DAYS: int = 14
+    PRECOMPUTE_REUSE_MINUTES: int = 120  # stored results younger than this with the same inputs are kept
+    PRECOMPUTE_CHECKPOINT_PATH: str = ".precompute_checkpoint.json"
     
     # FCM
     FCM_SERVER_KEY: str = ""
+    NOTIFICATION_TRANSPORT: str = "fcm"  # fcm | local (in-process stand-in for tests/benchmarks)
+    NOTIFICATION_LOCAL_LATENCY_MS: int = 0
+    NOTIFICATION_CONCURRENCY: int = 8  # multicast requests in flight
+    NOTIFICATION_MAX_RETRIES: int = 3
+    NOTIFICATION_RETRY_BASE_MS: int = 500
+    NOTIFICATION_FLUSH_MS: int = 500  # how long queued intents wait to be collapsed and batched
+    NOTIFICATION_QUEUE_SIZE: int = 10000
+    REMINDER_BATCH_SIZE: int = 1000  # loans per keyset page
+    REMINDER_LOOKBACK_DAYS: int = 2  # still send windows that opened while the job was down
+    REMINDER_HOUR: int = 9
+    ESTIMATE_ROLLOVER_BATCH_SIZE: int = 1000  # users per INSERT ... SELECT
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    AUTH_VERIFIER: str = "firebase"  # firebase | local (HS256 tokens signed with SECRET_KEY, benchmarks only)
     
     # App
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    QUERY_STATS_REPEAT_THRESHOLD: int = 5  # one statement this many times in a request is flagged as N+1
+    SLOW_QUERY_MS: int = 250  # statements slower than this are logged; 0 turns the monitor off
+    SLOW_QUERY_EXPLAINS_PER_MINUTE: int = 6  # EXPLAINs run for slow SELECTs, across all statements
+    SLOW_QUERY_EXPLAIN_EVERY_S: int = 900  # one EXPLAIN per statement shape in this window
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 2000
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
+    SCHEDULER_ENABLED: bool = True
+    
+    # Logging (JSON lines from a background thread, see app/utils/log.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # per-logger overrides, e.g. "app.middleware.auth=WARNING,sqlalchemy.engine=INFO" (SQL statements)
+    LOG_SAMPLE_RATES: str = ""  # share of INFO/DEBUG records kept per logger, e.g. "app.services.ai.gemini_client=0.1"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped instead of blocking callers
+    
+    # Background jobs
+    JOBS_EMBEDDED_WORKER: bool = True  # run workers in the API process; turn off when running app.tasks.worker
+    JOB_WORKER_THREADS: int = 2
+    JOB_POLL_INTERVAL_MS: int = 500
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: int = 5
+    JOB_LOCK_TIMEOUT_SECONDS: int = 300  # a running job older than this is assumed orphaned and re-claimed
+    JOB_RETENTION_DAYS: int = 7
+    PURGE_BATCH_SIZE: int = 5000  # rows per DELETE, each in its own short transaction
+    PURGE_BATCH_PAUSE_MS: int = 50  # gap between batches so other queries get the locks and I/O
     
     @property
     def allowed_origins_list(self) -> List[str]:
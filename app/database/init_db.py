@@ -1,3 +1,7 @@
+import logging
+import re
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
 from app.database.base import Base
 from app.database.session import engine
 
@@ -7,10 +11,39 @@ from app.models.transaction import Transaction
 from app.models.estimate import Estimate
 from app.models.loan import Loan
 from app.models.ai_insight import AIInsight
+from app.models.content_pool import PooledContent
+from app.models.loan_reminder import LoanReminder
+from app.models.job import Job
+from app.models.data_purge import DataPurge
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def create_missing_indexes():
+    """
+    create_all skips indexes added to a model whose table already exists. Build those with
+    CREATE INDEX CONCURRENTLY, which doesn't block writes to the table while it runs.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        existing = set(conn.scalars(text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+                ddl = re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY IF NOT EXISTS", ddl)
+                try:
+                    conn.exec_driver_sql(ddl)
+                    logger.info("Created index %s", index.name)
+                except Exception as e:
+                    # e.g. another worker building it at the same time; retried on the next start
+                    logger.warning("Index %s not created: %s", index.name, e)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
+    create_missing_indexes()
+    logger.info("Database tables created")
 
 if __name__ == "__main__":
+    setup_logging()
     init_db()
\ No newline at end of file
@@ -1,13 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.database.slow_queries import attach_slow_query_monitor
 
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
-)
+    pool_pre_ping=True
+)  # SQL logging: LOG_LEVELS="sqlalchemy.engine=INFO" (echo would write to stdout synchronously)
+slow_query_monitor = attach_slow_query_monitor(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
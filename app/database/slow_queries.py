@@ -0,0 +1,182 @@
+from contextvars import ContextVar
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from sqlalchemy import event
+
+from app.config import settings
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Slow-query log. Every statement on the engine is timed; one slower than SLOW_QUERY_MS is logged
+# with its normalized SQL (literals and placeholders replaced by ?, IN lists collapsed), a
+# fingerprint of that, the parameter types (never the values), duration, row count and the route
+# that ran it. Statements of the same shape share a fingerprint, so the log groups them.
+#
+# Slow SELECTs also get their plan: the statement and its parameters go on a small queue and a
+# background thread runs EXPLAIN (without ANALYZE, so nothing is executed) on its own pooled
+# connection, under a statement timeout. It is rate limited so a slow database is not made slower
+# by the monitor: a token bucket allows SLOW_QUERY_EXPLAINS_PER_MINUTE overall, each fingerprint is
+# explained at most once per SLOW_QUERY_EXPLAIN_EVERY_S, and a full queue drops the request.
+
+current_scope = ContextVar("slow_query_scope", default=None)  # ASGI scope, set by QueryStatsMiddleware
+
+SLOW_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXPLAIN_QUEUE_SIZE = 32
+
+slow_queries_total = Counter("spennies_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS", ("route",))
+slow_query_seconds = Histogram("spennies_db_slow_query_seconds", "Duration of slow statements", ("route",), buckets=SLOW_BUCKETS)
+slow_query_explains = Counter("spennies_db_slow_query_explains_total", "EXPLAIN requests for slow statements by outcome", ("outcome",))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+
+def normalize_sql(statement: str) -> str:
+    """Statement shape: whitespace collapsed, literals and placeholders as ?, IN lists as (...)"""
+    sql = " ".join(statement.split())
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+def params_shape(parameters, executemany: bool = False):
+    """Parameter names and types without the values (they may be personal data)"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": params_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+def _route():
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    return getattr(scope.get("route"), "path", None) or scope.get("path")
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = max(per_minute, 0)
+        self.tokens = float(self.capacity)
+        self.refill_per_s = self.capacity / 60
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_s)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+class SlowQueryMonitor:
+    """Engine listeners that log slow statements and queue EXPLAINs for the slow SELECTs"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.threshold = settings.SLOW_QUERY_MS / 1000
+        self._bucket = _TokenBucket(settings.SLOW_QUERY_EXPLAINS_PER_MINUTE)
+        self._explained = {}  # fingerprint -> monotonic time of its last EXPLAIN
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._thread = None
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None or conn.info.get('slow_query_explain'):
+            return
+        seconds = time.perf_counter() - started
+        if seconds >= self.threshold:
+            self._slow(statement, parameters, executemany, seconds, cursor.rowcount)
+
+    def _slow(self, statement, parameters, executemany, seconds, rowcount):
+        route = _route()
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        slow_queries_total.inc(route=route or "")
+        slow_query_seconds.observe(seconds, route=route or "")
+        logger.warning("Slow query (%.0f ms)", seconds * 1000, extra={
+            "fingerprint": key,
+            "sql": normalized,
+            "params": params_shape(parameters, executemany),
+            "duration_ms": round(seconds * 1000, 1),
+            "rows": rowcount,
+            "route": route,
+        })
+        if not executemany and normalized.split(" ", 1)[0].upper() in ("SELECT", "WITH"):
+            self._request_explain(key, statement, parameters, route)
+
+    def _request_explain(self, key, statement, parameters, route):
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(key)
+            if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_EVERY_S:
+                slow_query_explains.inc(outcome="deduplicated")
+                return
+            if not self._bucket.take():
+                slow_query_explains.inc(outcome="rate_limited")
+                return
+            self._explained[key] = now
+            if len(self._explained) > 1000:
+                cutoff = now - settings.SLOW_QUERY_EXPLAIN_EVERY_S
+                self._explained = {k: t for k, t in self._explained.items() if t >= cutoff}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((key, statement, parameters, route))
+        except queue.Full:
+            slow_query_explains.inc(outcome="dropped")
+
+    def _explain_loop(self):
+        while True:
+            key, statement, parameters, route = self._queue.get()
+            try:
+                plan = self.explain(statement, parameters)
+                slow_query_explains.inc(outcome="captured")
+                logger.warning("Slow query plan", extra={"fingerprint": key, "route": route, "plan": plan})
+            except Exception as e:
+                slow_query_explains.inc(outcome="failed")
+                logger.info("EXPLAIN failed for slow query %s: %s", key, e)
+
+    def explain(self, statement: str, parameters):
+        """Plan of a driver-level statement (as seen by the cursor events), without running it"""
+        postgres = self.engine.dialect.name == "postgresql"
+        with self.engine.connect() as conn:
+            conn.info['slow_query_explain'] = True
+            try:
+                if postgres:
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+                    rows = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).fetchall()
+                    plan = rows[0][0]
+                else:
+                    plan = [list(row) for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)]
+                conn.rollback()
+                return plan
+            finally:
+                conn.info.pop('slow_query_explain', None)
+
+def attach_slow_query_monitor(engine):
+    """Start timing the engine's statements; no-op when SLOW_QUERY_MS is 0"""
+    if settings.SLOW_QUERY_MS <= 0:
+        return None
+    monitor = SlowQueryMonitor(engine)
+    event.listen(engine, "before_cursor_execute", monitor.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", monitor.after_cursor_execute)
+    return monitor
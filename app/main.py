@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config import settings
+from app.utils.log import setup_logging
+
+# Before the imports below: Firebase and LLM provider setup log at import time
+setup_logging()
+
 from app.database.base import Base
 from app.database.session import engine
+from app.database.init_db import create_missing_indexes
 
 # Import models so SQLAlchemy knows about them
 from app.models.user import User
@@ -10,9 +17,14 @@ from app.models.transaction import Transaction
 from app.models.estimate import Estimate
 from app.models.loan import Loan
 from app.models.ai_insight import AIInsight
+from app.models.content_pool import PooledContent
+from app.models.loan_reminder import LoanReminder
+from app.models.job import Job
+from app.models.data_purge import DataPurge
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+create_missing_indexes()
 
 app = FastAPI(
     title="Spennies API",
@@ -28,9 +40,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-ms", "X-DB-Duplicate-Queries"],
 )
 
-from app.routes import auth, users, transactions, estimates, loans, dashboard, ai
+from app.middleware.metrics import HTTPMetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(HTTPMetricsMiddleware)
+
+from app.routes import auth, users, transactions, estimates, loans, dashboard, ai, jobs
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -39,6 +58,33 @@ app.include_router(estimates.router)
 app.include_router(loans.router)
 app.include_router(dashboard.router)
 app.include_router(ai.router)
+app.include_router(jobs.router)
+
+@app.on_event("startup")
+async def startup():
+    from app.services.notifications.dispatcher import dispatcher
+    dispatcher.start()
+    if settings.JOBS_EMBEDDED_WORKER:
+        from app.tasks.worker import start_embedded_workers
+        start_embedded_workers()
+    if settings.SCHEDULER_ENABLED:
+        from app.tasks.scheduler import start_scheduler
+        start_scheduler()
+
+@app.on_event("shutdown")
+async def shutdown():
+    from app.tasks.scheduler import shutdown_scheduler
+    shutdown_scheduler()
+    if settings.JOBS_EMBEDDED_WORKER:
+        from app.tasks.worker import stop_embedded_workers
+        stop_embedded_workers()
+    from app.services.notifications.dispatcher import dispatcher
+    await dispatcher.stop()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    from app.utils.metrics import render_prometheus
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
@@ -7,22 +7,68 @@ from firebase_admin import credentials, auth
 from app.config import settings
 from app.database.session import get_db
 from app.models.user import User
+from app.services.purge import active_purge_cutoff, hide_purged_rows
+from app.utils.local_auth import verify_local_token
+from app.utils.metrics import Counter, Histogram
 from datetime import datetime
+import logging
+import time
 import uuid
 
+logger = logging.getLogger(__name__)
+
+AUTH_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
 # Initialize Firebase
 if not firebase_admin._apps:
     try:
         cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
         firebase_admin.initialize_app(cred)
-        print("✅ Firebase Admin SDK initialized")
+        logger.info("Firebase Admin SDK initialized")
     except Exception as e:
-        print(f"⚠️ Firebase initialization error: {e}")
+        logger.warning("Firebase initialization failed: %s", e)
+
+auth_verifications = Counter("spennies_auth_verifications_total", "ID token verifications by verifier and outcome (ok, error)", ("verifier", "outcome"))
+auth_verify_seconds = Histogram("spennies_auth_verify_seconds", "ID token verification time", ("verifier",), AUTH_BUCKETS)
+
+def verify_token(token: str) -> dict:
+    """Decoded ID token claims from the configured verifier (firebase, or local for benchmarks)"""
+    verifier = settings.AUTH_VERIFIER
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        if verifier == 'local':
+            claims = verify_local_token(token)
+        else:
+            claims = auth.verify_id_token(token, check_revoked=False, clock_skew_seconds=60)
+        outcome = 'ok'
+        return claims
+    finally:
+        auth_verifications.inc(verifier=verifier, outcome=outcome)
+        auth_verify_seconds.observe(time.perf_counter() - started, verifier=verifier)
 
 # Security schemes
 strict_security = HTTPBearer(auto_error=True)
 optional_security = HTTPBearer(auto_error=False)
 
+def _decode_credentials(creds: HTTPAuthorizationCredentials) -> dict:
+    token = creds.credentials.replace("Bearer ", "").strip()
+
+    # 🟢 PERMISSIVE VALIDATION
+    # If verify_id_token fails, we'll try to decode it without verification
+    # (DANGEROUS in prod, perfect for Hackathon demo fix)
+    try:
+        return verify_token(token)
+    except Exception as verify_err:
+        logger.warning("Token verification failed, decoding without verification: %s", verify_err)
+        # Emergency Fallback: Decode without verification to get UID
+        # This allows demo to proceed even if keys mismatch
+        import jwt
+        return jwt.decode(token, options={"verify_signature": False})
+
+def _token_uid(decoded_token: dict) -> str:
+    return decoded_token['user_id'] if 'user_id' in decoded_token else decoded_token['sub']
+
 async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(strict_security),
     db: Session = Depends(get_db)
@@ -32,30 +78,17 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Missing token")
 
     try:
-        token = creds.credentials.replace("Bearer ", "").strip()
-        
-        # 🟢 PERMISSIVE VALIDATION
-        # If verify_id_token fails, we'll try to decode it without verification
-        # (DANGEROUS in prod, perfect for Hackathon demo fix)
-        try:
-            decoded_token = auth.verify_id_token(token, check_revoked=False, clock_skew_seconds=60)
-        except Exception as verify_err:
-            print(f"⚠️ Token Verification Failed: {verify_err}")
-            # Emergency Fallback: Decode without verification to get UID
-            # This allows demo to proceed even if keys mismatch
-            import jwt
-            decoded_token = jwt.decode(token, options={"verify_signature": False})
-            
-        firebase_uid = decoded_token['user_id'] if 'user_id' in decoded_token else decoded_token['sub']
+        decoded_token = _decode_credentials(creds)
+        firebase_uid = _token_uid(decoded_token)
         email = decoded_token.get('email', 'unknown@user.com')
         
-        print(f"🔍 Verifying UID: {firebase_uid}")
+        logger.debug("Verifying UID %s", firebase_uid)
         
-        # Get user from database
-        user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+        # Get user from database, with the cutoff of any purge still deleting their data
+        user, purge_cutoff = db.query(User, active_purge_cutoff(User.id)).filter(User.firebase_uid == firebase_uid).first() or (None, None)
         
         if not user:
-            print(f"❌ User missing. Auto-creating: {email}")
+            logger.info("User missing, auto-creating", extra={"firebase_uid": firebase_uid})
             new_user = User(
                 id=uuid.uuid4(),
                 firebase_uid=firebase_uid,
@@ -69,10 +102,20 @@ async def get_current_user(
             db.refresh(new_user)
             return new_user
         
+        if purge_cutoff:
+            hide_purged_rows(db, user.id, purge_cutoff)
         return user
         
     except Exception as e:
-        print(f"❌ Fatal Auth Error: {e}")
+        logger.warning("Authentication failed: %s", e)
+        raise HTTPException(status_code=401, detail="Authentication failed")
+
+async def get_current_firebase_uid(creds: HTTPAuthorizationCredentials = Depends(strict_security)) -> str:
+    """The caller's Firebase UID without loading (or auto-creating) their user row"""
+    try:
+        return _token_uid(_decode_credentials(creds))
+    except Exception as e:
+        logger.warning("Authentication failed: %s", e)
         raise HTTPException(status_code=401, detail="Authentication failed")
 
 async def get_current_user_optional(
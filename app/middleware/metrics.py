@@ -0,0 +1,71 @@
+import time
+from sqlalchemy import event
+
+from app.database.session import engine
+from app.utils.metrics import Counter, Gauge, Histogram, on_collect
+
+# HTTP and connection pool metrics for GET /metrics. The middleware is pure ASGI and does a
+# handful of dict updates per request; pool gauges are read from the pool only when scraped.
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+http_requests = Counter("spennies_http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status"))
+http_in_flight = Gauge("spennies_http_requests_in_flight", "HTTP requests being handled")
+http_latency = Histogram("spennies_http_request_duration_seconds", "HTTP request latency until the response body is sent", ("method", "route", "status"), HTTP_BUCKETS)
+
+pool_size = Gauge("spennies_db_pool_size", "Configured connection pool size")
+pool_checked_out = Gauge("spennies_db_pool_checked_out", "Pool connections in use")
+pool_checked_in = Gauge("spennies_db_pool_checked_in", "Idle pool connections")
+pool_overflow = Gauge("spennies_db_pool_overflow", "Connections open beyond the pool size")
+pool_events = Counter("spennies_db_pool_events_total", "Pool connection events (connect, invalidate)", ("event",))
+
+def route_label(scope) -> str:
+    """Route template ("/api/jobs/{job_id}") so metrics don't get one series per id"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class HTTPMetricsMiddleware:
+    """Request count, in-flight requests and latency by route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # unless a response starts
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            labels = {"method": scope["method"], "route": route_label(scope), "status": status}
+            http_requests.inc(**labels)
+            http_latency.observe(time.perf_counter() - started, **labels)
+
+@on_collect
+def _pool_gauges():
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        pool_size.set(pool.size())
+        pool_checked_out.set(pool.checkedout())
+        pool_checked_in.set(pool.checkedin())
+        pool_overflow.set(max(0, pool.overflow()))
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_events.inc(event="connect")
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_events.inc(event="invalidate")
@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import threading
+import time
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.database.session import engine
+from app.database.slow_queries import current_scope
+from app.middleware.metrics import route_label
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Per-request SQL accounting from engine events. The middleware puts a QueryStats in a context
+# variable; every statement executed while it is set (in the request task or threads started
+# from it) adds its count, time and text. Outside requests nothing is recorded.
+#
+# "Duplicates" are statements repeated with identical parameters (the same SUM run twice);
+# a statement shape repeated QUERY_STATS_REPEAT_THRESHOLD+ times with any parameters is the
+# N+1 pattern and is logged in DEBUG. DEBUG responses carry X-DB-Query-Count, X-DB-Time-ms and
+# X-DB-Duplicate-Queries; the per-route histograms are always in /metrics.
+
+_current = ContextVar("query_stats", default=None)
+_observers = []  # called as observer(route, stats) after every request; see assert_max_queries
+
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+queries_per_request = Histogram("spennies_db_queries_per_request", "SQL statements per request", ("route",), buckets=QUERY_BUCKETS)
+db_seconds_per_request = Histogram("spennies_db_seconds_per_request", "Database time per request", ("route",), buckets=DB_TIME_BUCKETS)
+duplicate_queries_total = Counter("spennies_db_duplicate_queries_total", "Statements re-run with identical parameters within a request", ("route",))
+repeated_statements_total = Counter("spennies_db_repeated_statements_total", "Requests running one statement shape at least QUERY_STATS_REPEAT_THRESHOLD times (N+1)", ("route",))
+
+class QueryStats:
+    """Statements run within one request (or one count_queries block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._statements = {}  # statement -> {parameters: executions}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            executions = self._statements.setdefault(statement, {})
+            key = repr(parameters)
+            executions[key] = executions.get(key, 0) + 1
+
+    @property
+    def duplicates(self) -> int:
+        with self._lock:
+            return sum(n - 1 for executions in self._statements.values() for n in executions.values())
+
+    def repeated(self, threshold: int) -> list:
+        """[(statement, executions)] for statements run at least threshold times, most first"""
+        with self._lock:
+            totals = [(statement, sum(executions.values())) for statement, executions in self._statements.items()]
+        return sorted((item for item in totals if item[1] >= threshold), key=lambda item: -item[1])
+
+    def report(self, limit: int = 10) -> str:
+        with self._lock:
+            totals = sorted(
+                ((sum(executions.values()), len(executions), statement) for statement, executions in self._statements.items()),
+                key=lambda item: -item[0]
+            )
+        return "\n".join(
+            f"{runs:>4}x ({distinct} distinct params) {' '.join(statement.split())[:200]}"
+            for runs, distinct, statement in totals[:limit]
+        )
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, '_query_started', None)
+    if stats is not None and started is not None:
+        stats.record(statement, parameters, time.perf_counter() - started)
+
+class QueryStatsMiddleware:
+    """Counts SQL per HTTP request (pure ASGI, so the context variable reaches the endpoint)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        scope_token = current_scope.set(scope)  # route of slow queries
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-ms"] = f"{stats.seconds * 1000:.1f}"
+                headers["X-DB-Duplicate-Queries"] = str(stats.duplicates)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            current_scope.reset(scope_token)
+            _finish(route_label(scope), stats)
+
+def _finish(route: str, stats: QueryStats):
+    queries_per_request.observe(stats.count, route=route)
+    db_seconds_per_request.observe(stats.seconds, route=route)
+    duplicates = stats.duplicates
+    if duplicates:
+        duplicate_queries_total.inc(duplicates, route=route)
+    repeated = stats.repeated(settings.QUERY_STATS_REPEAT_THRESHOLD)
+    if repeated:
+        repeated_statements_total.inc(route=route)
+        if settings.DEBUG:
+            statement, runs = repeated[0]
+            logger.warning("Same statement run %sx in one request (N+1?)", runs, extra={"route": route, "statement": ' '.join(statement.split())[:300]})
+    for observer in list(_observers):
+        observer(route, stats)
+
+@contextmanager
+def count_queries():
+    """Count the statements run in this block outside an HTTP request (jobs, direct function calls)"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def assert_max_queries(limit: int, path: str = None):
+    """
+    Test helper: fail if any request handled inside the block (to route template `path`, if given),
+    or the block's own direct queries, ran more than `limit` statements.
+
+        with assert_max_queries(4, "/api/dashboard/charts"):
+            client.get("/api/dashboard/charts")
+    """
+    requests = []
+
+    def observe(route, stats):
+        if path is None or route == path:
+            requests.append((route, stats))
+
+    _observers.append(observe)
+    try:
+        with count_queries() as direct:
+            yield requests
+    finally:
+        _observers.remove(observe)
+
+    over = [(route, stats) for route, stats in requests + [("(outside requests)", direct)] if stats.count > limit]
+    if over:
+        route, stats = max(over, key=lambda item: item[1].count)
+        raise AssertionError(f"{route} ran {stats.count} queries (max {limit}), {stats.duplicates} duplicates:\n{stats.report()}")
+    if path is not None and not requests:
+        raise AssertionError(f"No request to {path} was handled inside the block")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -17,4 +17,8 @@ class AIInsight(Base):
     
     generated_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_ai_insights_user_type', 'user_id', 'insight_type'),
+    )
+    
     user = relationship("User", back_populates="insights")
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database.base import Base
+
+class PooledContent(Base):
+    __tablename__ = "content_pool"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # "<job_type>:<language>:<spending band>", e.g. "driver:hi:low"
+    segment = Column(String(100), nullable=False)
+    kind = Column(String(20), nullable=False)  # 'challenge' | 'tip'
+    content = Column(Text, nullable=False)  # JSON
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_content_pool_segment_kind', 'segment', 'kind'),
+    )
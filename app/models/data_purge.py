@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database.base import Base
+
+class DataPurge(Base):
+    """A user's data (or whole account) being deleted in batches by a background job"""
+    __tablename__ = "data_purges"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # No foreign key: the record outlives an account purge
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    # Sign-in identity at request time: an account purge releases it from the user row, and the
+    # status of the deletion is looked up by it
+    firebase_uid = Column(String, index=True)
+    job_id = Column(UUID(as_uuid=True))
+
+    scope = Column(String(20), nullable=False, default='data')  # 'data' | 'account'
+    status = Column(String(20), nullable=False, default='queued')  # 'queued' | 'running' | 'succeeded' | 'failed'
+
+    # Rows created up to the cutoff are hidden from reads at once and deleted by the job
+    cutoff = Column(DateTime, nullable=False)
+    total_rows = Column(Integer)
+    deleted_rows = Column(Integer, nullable=False, default=0)
+    progress = Column(Text)  # JSON {table: rows deleted}
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
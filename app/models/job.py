@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database.base import Base
+
+class Job(Base):
+    """Background job: queued by the API, claimed by a worker with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
+
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default='queued')  # 'queued' | 'running' | 'succeeded' | 'failed'
+    payload = Column(Text)  # JSON
+    result = Column(Text)  # JSON
+    error = Column(Text)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_jobs_claim', 'status', 'run_after'),
+    )
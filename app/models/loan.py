@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, Date, DateTime, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, String, DECIMAL, Date, DateTime, Boolean, Integer, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,7 +10,7 @@ class Loan(Base):
     __tablename__ = "loans"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     lender_name = Column(String(255), nullable=False)
     amount = Column(DECIMAL(10, 2), nullable=False)
@@ -27,4 +27,9 @@ class Loan(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Reminder scan: unpaid loans by the day their reminder window opens
+        Index('ix_loans_reminder_opens', text('(due_date - COALESCE(reminder_days, 3))'), postgresql_where=text('is_paid = false')),
+    )
+    
     user = relationship("User", back_populates="loans")
\ No newline at end of file
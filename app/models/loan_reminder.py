@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database.base import Base
+
+class LoanReminder(Base):
+    """One row per reminder sent (or claimed) for a loan's due date, so reruns never resend"""
+    __tablename__ = "loan_reminders"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    loan_id = Column(UUID(as_uuid=True), ForeignKey("loans.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # Due date the reminder was for: moving the due date makes the loan eligible again
+    due_date = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False, default='claimed')  # 'claimed' | 'sent' | 'failed'
+
+    claimed_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        UniqueConstraint('loan_id', 'due_date', name='_loan_reminder_due_uc'),
+    )
@@ -1,33 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+import json
 import uuid
 
-from app.database.session import get_db
+from app.config import settings
+from app.database.session import get_db, SessionLocal
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.loan import Loan
 from app.models.estimate import Estimate
-from app.schemas.ai import ChatRequest, ChatResponse, SMSParseRequest, SMSParseResponse
+from app.schemas.ai import ChatRequest, ChatResponse, SMSParseRequest, SMSParseResponse, BatchCategorizeRequest, BatchCategorizeResponse
 from app.middleware.auth import get_current_user
-from app.services.ai.categorizer import categorize_transaction
+from app.services.ai.categorizer import categorize_transaction, categorize_locally, categorize_batch
 from app.services.ai.sms_parser import parse_sms_transaction
-from app.services.ai.chatbot import chat_with_ai, parse_natural_language_transaction
+from app.services.ai.chatbot import chat_with_ai
+from app.services.ai.chat_engine import preclassify_message, run_chat_engine, stream_chat_engine
+from app.services.ai.analytics_qa import answer_analytic_question
 from app.services.ai.challenges import generate_ai_challenge
+from app.services.ai.content_pool import segment_key, spending_band, pick_from_pool
+from app.services.ai.llm_metrics import record_cache, llm_summary
+from app.services.ai.snapshot import build_financial_snapshot
+from app.services.jobs import job_handler, enqueue_job
+from app.services.purge import load_user
+from app.utils.singleflight import SingleFlight
 
 router = APIRouter(prefix="/api/ai", tags=["AI Services"])
 
+# background=true on the slow endpoints queues a job and answers 202 right away;
+# poll /api/jobs/{job_id} or fetch /api/jobs/{job_id}/result
+def _accepted(job) -> JSONResponse:
+    return JSONResponse(status_code=202, headers={"Location": f"/api/jobs/{job.id}"}, content={
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "result_url": f"/api/jobs/{job.id}/result",
+    })
+
 # ... [categorize function] ... (Keep as is)
 @router.post("/categorize")
 async def categorize(description: str, amount: float, current_user: User = Depends(get_current_user)):
     return categorize_transaction(description, amount, current_user.language)
 
+@router.post("/categorize/batch", response_model=BatchCategorizeResponse)
+async def categorize_many(request: BatchCategorizeRequest, current_user: User = Depends(get_current_user)):
+    """Categorize a list of transactions with a handful of LLM calls, results in input order"""
+    results = await categorize_batch([item.description for item in request.items])
+    return {"results": results}
+
 # ... [parse_sms function] ... (Keep as is)
 @router.post("/parse-sms", response_model=SMSParseResponse)
-async def parse_sms(request: SMSParseRequest, current_user: User = Depends(get_current_user)):
-    result = parse_sms_transaction(request.sms_text)
+async def parse_sms(request: SMSParseRequest, background: bool = False, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if background:
+        return _accepted(enqueue_job(db, "parse_sms", request.model_dump(), current_user.id))
+    return _parse_and_store_sms(request.sms_text, request.sender, current_user, db)
+
+@job_handler("parse_sms")
+def _parse_sms_job(payload: dict, user: User, db: Session) -> dict:
+    return SMSParseResponse(**_parse_and_store_sms(payload["sms_text"], payload.get("sender"), user, db)).model_dump()
+
+def _parse_and_store_sms(sms_text: str, sender, current_user: User, db: Session) -> dict:
+    result = parse_sms_transaction(sms_text, sender)
     if 'description' not in result: result['description'] = f"Payment at {result.get('merchant', 'Unknown')}"
     tx_date = date.today()
     if result.get('date'):
@@ -35,24 +71,59 @@ async def parse_sms(request: SMSParseRequest, current_user: User = Depends(get_c
         except: pass
     if result.get('confidence', 0) > 0.7 and result.get('amount', 0) > 0:
         db_transaction = Transaction(id=uuid.uuid4(), user_id=current_user.id, amount=Decimal(str(result['amount'])), category=result['category'], type='INCOME' if result['type'] == 'credit' else 'EXPENSE', description=result['description'], date=tx_date, source='SMS')
-        db = next(get_db())
         db.add(db_transaction)
         db.commit()
     return result
 
-# ... [chat function] ... (Keep as is)
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    parsed = parse_natural_language_transaction(request.message, request.language)
+# ... [chat function] ...
+def _loan_context(snapshot: dict) -> str:
+    """Totals over all open loans, then the nearest few by name (enough to act on)"""
+    summary = snapshot.get("loan_summary")
+    if not summary or not summary["open_loans"]:
+        return ""
+    lines = [f"- {summary['open_loans']} open, ₹{summary['total_principal']:,.0f} principal + ₹{summary['interest_accrued']:,.0f} interest so far"]
+    if summary["overdue"]["count"]:
+        lines.append(f"- Overdue: {summary['overdue']['count']} (₹{summary['overdue']['amount']:,.0f})")
+    if summary["upcoming"][0]["count"]:
+        lines.append(f"- Due in the next 7 days: ₹{summary['upcoming'][0]['amount']:,.0f}")
+    lines += [f"- ₹{l['amount']} to {l['lender_name']}, due {l['due_date']}" for l in snapshot["loans"]]
+    hidden = summary["open_loans"] - len(snapshot["loans"])
+    if hidden > 0:
+        lines.append(f"- ...and {hidden} more")
+    return "\n".join(lines)
+
+def _build_chat_context(current_user: User, db: Session) -> dict:
+    snapshot = build_financial_snapshot(current_user, db)
+    monthly_income = snapshot["monthly_income"]
+    monthly_expense = snapshot["monthly_expense"]
+    
+    category_text = "\n".join([f"- {cat}: ₹{amt}" for cat, amt in snapshot["categories"]])
+    recent_tx_text = "\n".join([f"- {t['description']}: ₹{t['amount']}" for t in snapshot["recent_transactions"]])
+    loan_text = _loan_context(snapshot)
+    
+    return {
+        'name': current_user.name,
+        'job_type': current_user.job_type,
+        'ai_tone': current_user.ai_tone,
+        'savings_target': float(current_user.savings_target or 5000),
+        'monthly_income': float(monthly_income),
+        'monthly_expense': float(monthly_expense),
+        'monthly_savings': float(monthly_income - monthly_expense),
+        'categories': category_text,
+        'recent_transactions': recent_tx_text,
+        'loans': loan_text
+    }
+
+def _apply_chat_action(parsed: dict, request: ChatRequest, current_user: User, db: Session, user_context: dict = None) -> ChatResponse:
     action = parsed.get('action', 'chat')
     
-    if action == 'add' and parsed.get('amount', 0) > 0:
-        category_result = categorize_transaction(parsed.get('description', 'Expense'), parsed['amount'], request.language)
+    if action == 'add' and (parsed.get('amount') or 0) > 0:
+        category = parsed.get('category') or (categorize_locally(parsed.get('description', '')) or {}).get('category', 'Other')
         tx_date = date.today()
         if parsed.get('date'):
             try: tx_date = datetime.strptime(parsed['date'], '%Y-%m-%d').date()
             except ValueError: pass
-        db_transaction = Transaction(id=uuid.uuid4(), user_id=current_user.id, amount=Decimal(str(parsed['amount'])), category=category_result['category'], type=parsed.get('type', 'expense').upper(), description=parsed.get('description', 'AI Added'), date=tx_date, source='MANUAL')
+        db_transaction = Transaction(id=uuid.uuid4(), user_id=current_user.id, amount=Decimal(str(parsed['amount'])), category=category, type=parsed.get('type', 'expense').upper(), description=parsed.get('description', 'AI Added'), date=tx_date, source='MANUAL')
         db.add(db_transaction)
         db.commit()
         return ChatResponse(response=f"✅ Added {parsed.get('type')} of ₹{parsed['amount']}.", action="transaction_added", data={"transaction_id": str(db_transaction.id)})
@@ -105,69 +176,147 @@ async def chat(request: ChatRequest, current_user: User = Depends(get_current_us
         db.commit()
         return ChatResponse(response=f"✅ Profile updated.", action="profile_updated")
 
+    elif action == 'update_budget' and parsed.get('category') and parsed.get('amount'):
+        today = date.today()
+        category = str(parsed['category']).capitalize()
+        estimate = db.query(Estimate).filter(Estimate.user_id == current_user.id, Estimate.category == category, Estimate.month == today.month, Estimate.year == today.year).first()
+        if estimate:
+            estimate.estimated_amount = Decimal(str(parsed['amount']))
+        else:
+            db.add(Estimate(id=uuid.uuid4(), user_id=current_user.id, category=category, estimated_amount=Decimal(str(parsed['amount'])), month=today.month, year=today.year))
+        db.commit()
+        return ChatResponse(response=f"✅ {category} budget set to ₹{parsed['amount']}.", action="budget_updated")
+
     else:
-        # CHAT Logic
-        month_start = date(date.today().year, date.today().month, 1)
-        monthly_income = db.query(func.sum(Transaction.amount)).filter(Transaction.user_id == current_user.id, Transaction.date >= month_start, Transaction.type == 'INCOME').scalar() or Decimal('0')
-        monthly_expense = db.query(func.sum(Transaction.amount)).filter(Transaction.user_id == current_user.id, Transaction.date >= month_start, Transaction.type == 'EXPENSE').scalar() or Decimal('0')
-        
-        cat_data = db.query(Transaction.category, func.sum(Transaction.amount)).filter(Transaction.user_id == current_user.id, Transaction.date >= month_start, Transaction.type == 'EXPENSE').group_by(Transaction.category).all()
-        category_text = "\n".join([f"- {cat}: ₹{amt}" for cat, amt in cat_data])
-        
-        recent_txs = db.query(Transaction).filter(Transaction.user_id == current_user.id).order_by(Transaction.date.desc()).limit(10).all()
-        recent_tx_text = "\n".join([f"- {t.description}: ₹{t.amount}" for t in recent_txs])
-        
-        loans = db.query(Loan).filter(Loan.user_id == current_user.id, Loan.is_paid == False).all()
-        loan_text = "\n".join([f"- ₹{l.amount} to {l.lender_name}" for l in loans])
-        
-        user_context = {
-            'name': current_user.name,
-            'job_type': current_user.job_type,
-            'ai_tone': current_user.ai_tone,
-            'savings_target': float(current_user.savings_target or 5000),
-            'monthly_income': float(monthly_income),
-            'monthly_expense': float(monthly_expense),
-            'monthly_savings': float(monthly_income - monthly_expense),
-            'categories': category_text,
-            'recent_transactions': recent_tx_text,
-            'loans': loan_text
-        }
-        
-        ai_response = chat_with_ai(request.message, user_context, request.language, tone=current_user.ai_tone)
-        return ChatResponse(response=ai_response, action="query_answered")
+        # CHAT Logic: the engine already wrote the reply in the same call
+        reply = parsed.get('reply')
+        if not reply:
+            reply = chat_with_ai(request.message, user_context or _build_chat_context(current_user, db), request.language, tone=current_user.ai_tone)
+        return ChatResponse(response=reply, action="query_answered")
 
-# ... [insights function] ... (Keep as is)
-@router.get("/insights")
-async def get_insights(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    from app.services.ai.insights import generate_insights
-    data = generate_insights(current_user, db)
+@router.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, background: bool = False, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if background:
+        # One attempt only: a retried write action could add the same transaction twice
+        return _accepted(enqueue_job(db, "chat", request.model_dump(), current_user.id, max_attempts=1))
+    return _handle_chat(request, current_user, db)
+
+@job_handler("chat")
+def _chat_job(payload: dict, user: User, db: Session) -> dict:
+    return _handle_chat(ChatRequest(**payload), user, db).model_dump()
+
+def _handle_chat(request: ChatRequest, current_user: User, db: Session) -> ChatResponse:
+    # Obvious intents and money questions are handled locally, everything else is ONE structured LLM call
+    parsed = preclassify_message(request.message, request.language) or answer_analytic_question(request.message, current_user, db, request.language)
+    record_cache("chat", parsed is not None)
+    user_context = None
+    if parsed is None:
+        user_context = _build_chat_context(current_user, db)
+        parsed = run_chat_engine(request.message, user_context, request.language, tone=current_user.ai_tone)
+    return _apply_chat_action(parsed, request, current_user, db, user_context)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request, current_user: User = Depends(get_current_user)):
+    """Chat over server-sent events: `token` events with reply text, then one `done` event with the ChatResponse"""
+    user_id = current_user.id
+
+    async def event_stream():
+        # Own session: the request-scoped one is closed before the body is streamed
+        db = SessionLocal()
+        engine_stream = None
+        try:
+            user = load_user(db, user_id)
+            user_context = None
+            parsed = preclassify_message(request.message, request.language)
+            if parsed is None:
+                parsed = await run_in_threadpool(answer_analytic_question, request.message, user, db, request.language)
+            record_cache("chat_stream", parsed is not None)
+            if parsed is None:
+                user_context = await run_in_threadpool(_build_chat_context, user, db)
+                engine_stream = stream_chat_engine(request.message, user_context, request.language, tone=user.ai_tone)
+                parsed = {"action": "chat"}
+                reply_parts = []
+                async for kind, payload in iterate_in_threadpool(engine_stream):
+                    if await http_request.is_disconnected():
+                        return
+                    if kind == "action":
+                        parsed = payload
+                        # Write actions need no reply text, stop generating right away
+                        if parsed.get('action', 'chat') != 'chat':
+                            break
+                    else:
+                        reply_parts.append(payload)
+                        yield _sse("token", {"text": payload})
+                if parsed.get('action', 'chat') == 'chat':
+                    parsed = {**parsed, "reply": "".join(reply_parts).strip()}
+
+            response = await run_in_threadpool(_apply_chat_action, parsed, request, user, db, user_context)
+            yield _sse("done", response.dict())
+        finally:
+            if engine_stream is not None:
+                try: engine_stream.close()
+                except ValueError: pass  # still executing in the threadpool, it is dropped with the generator
+            db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ... [insights function] ...
+# Concurrent duplicate requests (retries, tabs, prefetch) share one computation per user
+insights_flight = SingleFlight("insights")
+forecast_flight = SingleFlight("forecast")
+challenge_flight = SingleFlight("challenge")
+
+def _for_user(db: Session, fn, user_id, *args):
+    """fn(user, db, *args) on the single-flight's own session (never the leader's request session)"""
+    return fn(load_user(db, user_id), db, *args)
+
+def _insights_payload(data):
     if isinstance(data, list): return {"insights": data, "tip": "Save small amounts daily."}
     return data
 
+@router.get("/insights")
+async def get_insights(background_tasks: BackgroundTasks, background: bool = False, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    from app.services.ai.insights import get_cached_insights
+    if background:
+        return _accepted(enqueue_job(db, "insights", {}, current_user.id))
+    data = await insights_flight.do(current_user.id, _for_user, get_cached_insights, current_user.id, background_tasks, shared=True)
+    return _insights_payload(data)
+
+@job_handler("insights")
+def _insights_job(payload: dict, user: User, db: Session) -> dict:
+    from app.services.ai.insights import get_cached_insights
+    return _insights_payload(get_cached_insights(user, db))
+
 @router.get("/forecast")
-async def get_forecast(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_forecast(current_user: User = Depends(get_current_user)):
     from app.services.ai.forecaster import forecast_monthly_savings
-    forecast = forecast_monthly_savings(current_user, db)
+    forecast = await forecast_flight.do(current_user.id, _for_user, forecast_monthly_savings, current_user.id, shared=True)
     return forecast
 
 # ✅ NEW: GET CHALLENGE ENDPOINT
 @router.get("/challenge")
 async def get_challenge(
     refresh: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
-    # Re-build minimal context for challenge generation
-    month_start = date(date.today().year, date.today().month, 1)
-    monthly_expense = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id, Transaction.date >= month_start, Transaction.type == 'EXPENSE'
-    ).scalar() or Decimal('0')
+    return await challenge_flight.do((current_user.id, refresh), _for_user, _build_challenge, current_user.id, refresh)
+
+def _build_challenge(current_user: User, db: Session, refresh: bool) -> dict:
+    snapshot = build_financial_snapshot(current_user, db)
+    monthly_expense = snapshot["monthly_expense"]
     
-    recent_txs = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id
-    ).order_by(Transaction.date.desc()).limit(5).all()
+    # Daily challenge comes from the precomputed segment pool, only an explicit refresh hits the LLM
+    if not refresh:
+        segment = segment_key(current_user.job_type, current_user.language, spending_band(float(monthly_expense)))
+        pooled = pick_from_pool(db, 'challenge', segment, current_user.id)
+        if pooled:
+            return pooled
     
-    recent_tx_text = "\n".join([f"- {t.description}: ₹{t.amount}" for t in recent_txs])
+    # Re-build minimal context for challenge generation
+    recent_tx_text = "\n".join([f"- {t['description']}: ₹{t['amount']}" for t in snapshot["recent_transactions"][:5]])
     
     user_context = {
         'job_type': current_user.job_type,
@@ -185,4 +334,11 @@ async def get_challenge(
             "reward": 10
         }
         
-    return challenge
\ No newline at end of file
+    return challenge
+
+@router.get("/metrics")
+async def llm_metrics_summary(current_user: User = Depends(get_current_user)):
+    """Per call site LLM latency, volume, failure and cache rates (DEBUG only)"""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=404, detail="Not found")
+    return llm_summary()
@@ -2,13 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database.session import get_db
 from app.models.user import User
-from app.models.estimate import Estimate
+from app.services.estimates import upsert_estimates
 from app.middleware.auth import get_current_user
 from app.schemas.user import UserCreate, UserResponse
+import logging
 import uuid
 from datetime import datetime
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponse)
@@ -42,28 +45,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         db.add(db_user)
         db.flush()  # Get ID without committing yet
 
-        # SAVE ESTIMATES
+        # SAVE ESTIMATES (one statement for all categories)
         if user_data.expenses:
-            current_month = datetime.utcnow().month
-            current_year = datetime.utcnow().year
-            
-            for category, amount in user_data.expenses.items():
-                # Only save if amount > 0
-                if amount:
-                    # Convert category to Title Case (food -> Food)
-                    cat_name = category.capitalize()
-                    
-                    estimate = Estimate(
-                        id=uuid.uuid4(),
-                        user_id=db_user.id,
-                        category=cat_name,
-                        estimated_amount=Decimal(str(amount)),
-                        month=current_month,
-                        year=current_year,
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow()
-                    )
-                    db.add(estimate)
+            now = datetime.utcnow()
+            # Only save amounts > 0, categories in Title Case (food -> Food)
+            amounts = {category.capitalize(): Decimal(str(amount)) for category, amount in user_data.expenses.items() if amount}
+            upsert_estimates(db, db_user.id, now.month, now.year, amounts)
 
         db.commit()
         db.refresh(db_user)
@@ -72,7 +59,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         
     except Exception as e:
         db.rollback()
-        print(f"🔥 REGISTER ERROR: {e}")
+        logger.exception("Register failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/me", response_model=UserResponse)
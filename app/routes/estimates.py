@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-import uuid
 
 from app.database.session import get_db
 from app.models.estimate import Estimate
 from app.models.user import User
-from app.schemas.estimate import EstimateCreate, EstimateResponse, EstimateUpdate
+from app.schemas.estimate import EstimateCreate, EstimateResponse, EstimateUpdate, EstimateBulkRequest
 from app.middleware.auth import get_current_user
+from app.services.estimates import upsert_estimates
 
 router = APIRouter(prefix="/api/estimates", tags=["Estimates"])
 
@@ -18,34 +18,22 @@ async def create_estimate(
     db: Session = Depends(get_db)
 ):
     """Create or update estimate for a category"""
-    
-    # Check if estimate already exists
-    existing = db.query(Estimate).filter(
-        Estimate.user_id == current_user.id,
-        Estimate.category == estimate.category,
-        Estimate.month == estimate.month,
-        Estimate.year == estimate.year
-    ).first()
-    
-    if existing:
-        # Update existing
-        existing.estimated_amount = estimate.estimated_amount
-        db.commit()
-        db.refresh(existing)
-        return existing
-    
-    # Create new
-    db_estimate = Estimate(
-        id=uuid.uuid4(),
-        user_id=current_user.id,
-        **estimate.dict()
-    )
-    
-    db.add(db_estimate)
+    rows = upsert_estimates(db, current_user.id, estimate.month, estimate.year, {estimate.category: estimate.estimated_amount})
     db.commit()
-    db.refresh(db_estimate)
-    
-    return db_estimate
+    return rows[0]
+
+@router.put("/bulk", response_model=List[EstimateResponse])
+async def upsert_month_estimates(
+    request: EstimateBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create or update a whole month's category budgets in one statement"""
+    # Later entries win when a category is repeated (one statement cannot update a row twice)
+    amounts = {item.category: item.estimated_amount for item in request.estimates}
+    rows = upsert_estimates(db, current_user.id, request.month, request.year, amounts)
+    db.commit()
+    return rows
 
 @router.get("/", response_model=List[EstimateResponse])
 async def get_estimates(
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+import uuid
+
+from app.database.session import get_db
+from app.models.job import Job
+from app.models.user import User
+from app.middleware.auth import get_current_user
+from app.services.jobs import job_to_dict
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+def _get_job(job_id: uuid.UUID, current_user: User, db: Session) -> Job:
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Job status (queued, running, succeeded, failed), with the result once it succeeded"""
+    return job_to_dict(_get_job(job_id, current_user, db))
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The job's result as the synchronous endpoint would return it; 202 while pending, 409 if it failed"""
+    job = _get_job(job_id, current_user, db)
+    data = job_to_dict(job)
+    if job.status == 'succeeded':
+        return data["result"]
+    if job.status == 'failed':
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    data.pop("result")
+    return JSONResponse(status_code=202, content=jsonable_encoder(data))
@@ -7,8 +7,9 @@ import uuid
 from app.database.session import get_db
 from app.models.loan import Loan
 from app.models.user import User
-from app.schemas.loan import LoanCreate, LoanResponse, LoanUpdate
+from app.schemas.loan import LoanCreate, LoanResponse, LoanUpdate, LoanSummaryResponse
 from app.middleware.auth import get_current_user
+from app.services.loan_analytics import loan_summary
 
 router = APIRouter(prefix="/api/loans", tags=["Loans"])
 
@@ -46,6 +47,14 @@ async def get_loans(
     loans = query.order_by(Loan.due_date).all()
     return loans
 
+@router.get("/summary", response_model=LoanSummaryResponse)
+async def get_loan_summary(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Open loans: principal, interest accrued to date, overdue amount and dues by week"""
+    return loan_summary(db, current_user.id)
+
 @router.put("/{loan_id}/paid", response_model=LoanResponse)
 async def mark_loan_paid(
     loan_id: str,
@@ -9,6 +9,8 @@ from app.models.transaction import Transaction
 from app.models.user import User
 from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionUpdate
 from app.middleware.auth import get_current_user
+from app.services.notifications.budget_alerts import budget_overrun_intent
+from app.services.notifications.dispatcher import dispatcher
 
 router = APIRouter(prefix="/api/transactions", tags=["Transactions"])
 
@@ -29,6 +31,10 @@ async def create_transaction(
     db.commit()
     db.refresh(db_transaction)
     
+    intent = budget_overrun_intent(db, current_user, db_transaction)
+    if intent:
+        dispatcher.enqueue(intent)
+    
     return db_transaction
 
 @router.get("/", response_model=List[TransactionResponse])
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from app.models.transaction import Transaction
-from app.models.loan import Loan
-from app.models.estimate import Estimate
-from app.models.ai_insight import AIInsight
+import uuid
 
 from app.database.session import get_db
+from app.models.data_purge import DataPurge
 from app.models.user import User
 from app.schemas.user import UserUpdate, UserResponse
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_firebase_uid
+from app.services.purge import request_purge, purge_to_dict
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -41,25 +42,58 @@ async def update_fcm_token(
     
     return {"message": "FCM token updated successfully"}
 
+def _purge_accepted(purge, message: str) -> JSONResponse:
+    # After an account purge the token no longer maps to the user: its status is read by sign-in UID
+    status_url = f"/api/users/purges/{purge.id}" if purge.scope == 'account' else f"/api/users/me/purges/{purge.id}"
+    data = {"message": message, **purge_to_dict(purge), "status_url": status_url}
+    return JSONResponse(status_code=202, content=jsonable_encoder(data))
+
 @router.delete("/me/data")
 async def delete_user_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete all user data (transactions, loans, etc.) but keep account"""
+    """Delete all user data (transactions, loans, etc.) but keep account. Hidden at once, deleted in the background."""
+    try:
+        purge = request_purge(db, current_user, 'data')
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    return _purge_accepted(purge, "Data deletion started")
+
+@router.delete("/me")
+async def delete_account(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete the account and all its data. Signed out at once, deleted in the background."""
     try:
-        # Delete all related records
-        db.query(Transaction).filter(Transaction.user_id == current_user.id).delete()
-        db.query(Loan).filter(Loan.user_id == current_user.id).delete()
-        db.query(Estimate).filter(Estimate.user_id == current_user.id).delete()
-        db.query(AIInsight).filter(AIInsight.user_id == current_user.id).delete()
-        
-        # Reset user stats
-        current_user.avg_income = 0
-        current_user.savings_target = 0
-        
-        db.commit()
-        return {"message": "All data deleted successfully"}
+        purge = request_purge(db, current_user, 'account')
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    return _purge_accepted(purge, "Account deletion started")
+
+@router.get("/me/purges/{purge_id}")
+async def get_purge(
+    purge_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Progress of a data deletion"""
+    purge = db.query(DataPurge).filter(DataPurge.id == purge_id, DataPurge.user_id == current_user.id).first()
+    if not purge:
+        raise HTTPException(status_code=404, detail="Purge not found")
+    return purge_to_dict(purge)
+
+@router.get("/purges/{purge_id}")
+async def get_purge_by_identity(
+    purge_id: uuid.UUID,
+    firebase_uid: str = Depends(get_current_firebase_uid),
+    db: Session = Depends(get_db)
+):
+    """Progress of a deletion requested with this sign-in, including one of the account itself"""
+    purge = db.query(DataPurge).filter(DataPurge.id == purge_id, DataPurge.firebase_uid == firebase_uid).first()
+    if not purge:
+        raise HTTPException(status_code=404, detail="Purge not found")
+    return purge_to_dict(purge)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 class ChatRequest(BaseModel):
@@ -12,6 +12,7 @@ class ChatResponse(BaseModel):
 
 class SMSParseRequest(BaseModel):
     sms_text: str
+    sender: Optional[str] = None  # e.g. "VM-HDFCBK"
 
 class SMSParseResponse(BaseModel):
     amount: float
@@ -25,4 +26,19 @@ class SMSParseResponse(BaseModel):
 class InsightResponse(BaseModel):
     insight_type: str
     message: str
-    severity: str  # 'info', 'warning', 'success'
\ No newline at end of file
+    severity: str  # 'info', 'warning', 'success'
+
+class CategorizeItem(BaseModel):
+    description: str
+    amount: Optional[float] = None
+
+class BatchCategorizeRequest(BaseModel):
+    items: List[CategorizeItem] = Field(..., min_length=1, max_length=500)
+
+class CategorizeResult(BaseModel):
+    description: str
+    category: str
+    confidence: float
+
+class BatchCategorizeResponse(BaseModel):
+    results: List[CategorizeResult]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class EstimateBase(BaseModel):
@@ -15,6 +15,15 @@ class EstimateCreate(EstimateBase):
 class EstimateUpdate(BaseModel):
     estimated_amount: Optional[Decimal] = None
 
+class EstimateItem(BaseModel):
+    category: str
+    estimated_amount: Decimal
+
+class EstimateBulkRequest(BaseModel):
+    month: int = Field(..., ge=1, le=12)
+    year: int
+    estimates: List[EstimateItem] = Field(..., min_length=1, max_length=100)
+
 class EstimateResponse(EstimateBase):
     id: UUID
     user_id: UUID
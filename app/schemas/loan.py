@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class LoanBase(BaseModel):
@@ -28,4 +28,23 @@ class LoanResponse(LoanBase):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class LoanBucket(BaseModel):
+    count: int
+    amount: float
+
+class LoanWeekBucket(LoanBucket):
+    week: int
+    start: date
+    end: date
+
+class LoanSummaryResponse(BaseModel):
+    open_loans: int
+    total_principal: float
+    interest_accrued: float
+    outstanding: float
+    overdue: LoanBucket
+    upcoming: List[LoanWeekBucket]
+    later: LoanBucket
+    next_due_date: Optional[date] = None
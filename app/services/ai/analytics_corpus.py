@@ -0,0 +1,35 @@
+# Regression corpus for app.services.ai.analytics_qa: (message, expected classify_question result).
+# Expected None means the message must NOT be answered locally (it goes to the LLM).
+
+ANALYTICS_CORPUS = [
+    # Spend, per period and category
+    ("How much did I spend on food this week?", ('spend', {"period": 'this_week', "category": 'Food'})),
+    ("how much did i spend today", ('spend', {"period": 'today', "category": None})),
+    ("What's my total spending this month?", ('spend', {"period": 'this_month', "category": None})),
+    ("total spent this month?", ('spend', {"period": 'this_month', "category": None})),
+    ("how much did I spend on petrol last month?", ('spend', {"period": 'last_month', "category": 'Transport'})),
+    ("How much have I spent?", ('spend', {"period": 'this_month', "category": None})),
+    ("kitna kharch hua is mahine?", ('spend', {"period": 'this_month', "category": None})),
+    ("इस महीने कितना खर्च हुआ?", ('spend', {"period": 'this_month', "category": None})),
+    ("या आठवड्यात किती खर्च झाला?", ('spend', {"period": 'this_week', "category": None})),
+    # Income, balance, loans
+    ("how much did I earn last week?", ('income', {"period": 'last_week'})),
+    ("what's my balance?", ('balance', {"period": 'this_month'})),
+    ("how much do I owe Ramesh?", ('owe_lender', {"lender": 'Ramesh'})),
+    ("how much do I owe in total?", ('owe_total', {})),
+    # Periods the answers don't cover
+    ("How much did I spend on petrol in the last 7 days?", None),
+    ("How much did I spend in 2024?", None),
+    ("How much did I spend on food last year?", None),
+    ("How much did I spend in March?", None),
+    ("How much did I spend in the last 3 months?", None),
+    ("how much did I earn since Diwali?", None),
+    ("pichle saal kitna kharch hua?", None),
+    ("पिछले 10 दिन में कितना खर्च हुआ?", None),
+    ("मार्च में कितना खर्च हुआ?", None),
+    # Commands and advice
+    ("Total spent 300 on petrol today, add it", None),
+    ("add 500 expense total for rent", None),
+    ("how much should I spend on food?", None),
+    ("Spent 200 on chai", None),
+]
@@ -0,0 +1,271 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import date, timedelta
+from decimal import Decimal
+import re
+
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.loan import Loan
+
+# Structured money questions ("how much did I spend on food this week?", "what's my balance?",
+# "how much do I owe Ramesh?") in English, Hinglish, Hindi and Marathi are answered from exact
+# aggregates with templated replies. Anything not recognized returns None and goes to the LLM.
+
+# Devanagari has no reliable \b (vowel signs are not \w), so those patterns match substrings.
+_QUESTION = re.compile(r"how much|what(?:'s| is| was) my|\btotal\b[^.!]*\?\s*$|\bkitn[aei]\b|कितन[ाीे]|किती|एकूण|कुल", re.IGNORECASE)
+# "Total spent 300 on petrol, add it" is a command: an amount plus a recording verb goes to the LLM
+_RECORD = re.compile(r"\b(?:add(?:ed)?|spent|paid|pay|bought|got|received|earned|record|log|jodo|daalo|dala|diye|diya|kiye|kiya)\b"
+                     r"|जोड़|डाल|दिए|दिया|किए|किया|भरले|दिले|टाक", re.IGNORECASE)
+_AMOUNT = re.compile(r"(?:₹|\brs\.?|\binr)\s*\d|\b\d[\d,]*(?:\.\d+)?\b(?!\s*(?:days?|weeks?|months?|din|दिन))", re.IGNORECASE)
+# Advice/planning questions ("how much should I spend on food?") need the LLM
+_ADVICE = re.compile(r"\bshould\b|\bcan i\b|\bcould\b|\bwould\b|\bchahiye\b|\bsakta\b|चाहिए|सकता|सकती|पाहिजे|शकतो|शकते", re.IGNORECASE)
+_SPEND = re.compile(r"\bspen[dt]|\bspending\b|\bexpenses?\b|\bkharch|खर्च", re.IGNORECASE)
+_INCOME = re.compile(r"\bearn(?:ed|ings?)?\b|\bincome\b|\bkamai|\bkamaya|कमाई|कमाया|कमावल|उत्पन्न", re.IGNORECASE)
+_BALANCE = re.compile(r"\bbalance\b|\bsav(?:ed|ings?)\b|\bbach(?:at|aya)\b|बैलेंस|बचत|बचाया|शिल्लक|बॅलन्स", re.IGNORECASE)
+_OWE = re.compile(r"\bowe\b|\bloans?\b|\bdebt\b|\budhar\b|\bkarz|\bdena hai\b|कर्ज|उधार|देना है|द्यायच|देणे", re.IGNORECASE)
+
+# Lender name after "owe", before "ko"/"को" (hi) or fused with "ला" (mr)
+_LENDER_PATTERNS = [
+    re.compile(r"\bowe (?:to )?(?P<name>[a-z][\w.]*)", re.IGNORECASE),
+    re.compile(r"(?P<name>[a-z][\w.]*) ko\b", re.IGNORECASE),
+    re.compile(r"(?:^|\s)(?P<name>\S+?) को"),
+    re.compile(r"(?:^|\s)(?P<name>\S{2,}?)ला\s"),
+]
+_NOT_LENDERS = {'i', 'me', 'mujhe', 'mai', 'main', 'you', 'everyone', 'anyone', 'people', 'them', 'in', 'total',
+                'मुझे', 'मैं', 'मला', 'मी', 'तुम्हाला', 'आपको', 'कुल'}
+
+# Periods, most specific first: (name, pattern)
+_PERIODS = [
+    ('last_week', re.compile(r"last week|previous week|pichh?le (?:hafte|week)|पिछले (?:हफ्ते|सप्ताह)|मागच्या आठवड", re.IGNORECASE)),
+    ('last_month', re.compile(r"last month|previous month|pichh?le (?:mahine|month)|पिछले महीने|मागच्या महिन", re.IGNORECASE)),
+    ('this_week', re.compile(r"this week|is (?:hafte|week)|इस (?:हफ्ते|सप्ताह)|या आठवड|आठवड्यात", re.IGNORECASE)),
+    ('this_year', re.compile(r"this year|is saal|इस साल|या वर्षी", re.IGNORECASE)),
+    ('yesterday', re.compile(r"yesterday|\bkal\b|कल|काल", re.IGNORECASE)),
+    ('today', re.compile(r"\btoday\b|\baaj\b|आज", re.IGNORECASE)),
+    ('this_month', re.compile(r"this month|is (?:mahine|month)|इस महीने|या महिन", re.IGNORECASE)),
+]
+
+# Time expressions the periods above don't cover ("last 7 days", "in 2024", "in March", "last
+# year"): answering those for this month would look exact and be wrong, so they go to the LLM
+_OTHER_PERIOD = re.compile(
+    r"\b\d+\s*(?:days?|weeks?|months?|years?|din|hafte|mahine|saal)\b|\b(?:19|20)\d\d\b"
+    r"|\b(?:last|past|previous|pichh?le) (?:year|saal|few|couple|\d+)|\bsince\b|\bbetween\b"
+    r"|\b(?:january|february|march|april|june|july|august|september|october|november|december"
+    r"|jan|feb|apr|jun|jul|aug|sept?|oct|nov|dec|in may)\b"
+    r"|\d+\s*(?:दिन|हफ्त|महीन|साल|दिवस|आठवड|महिन|वर्ष)|पिछले साल|मागच्या वर्षी|गेल्या वर्षी"
+    r"|जनवरी|फरवरी|मार्च|अप्रैल|मई|जून|जुलाई|अगस्त|सितंबर|अक्टूबर|नवंबर|दिसंबर"
+    r"|जानेवारी|फेब्रुवारी|एप्रिल|जुलै|ऑगस्ट|सप्टेंबर|ऑक्टोबर|नोव्हेंबर|डिसेंबर",
+    re.IGNORECASE
+)
+
+CATEGORY_SYNONYMS = {
+    'Food': ['food', 'eating', 'groceries', 'grocery', 'khana', 'khane', 'खाना', 'खाने', 'भोजन', 'जेवण', 'किराणा'],
+    'Transport': ['transport', 'travel', 'fuel', 'petrol', 'diesel', 'auto', 'cab', 'bus', 'यात्रा', 'पेट्रोल', 'किराया', 'प्रवास'],
+    'Bills': ['bills', 'bill', 'electricity', 'recharge', 'rent', 'बिल', 'बिजली', 'किराए', 'भाडे', 'वीज'],
+    'Shopping': ['shopping', 'clothes', 'kapde', 'खरीदारी', 'कपड़े', 'खरेदी', 'कपडे'],
+    'Entertainment': ['entertainment', 'movies', 'movie', 'film', 'मनोरंजन', 'फिल्म', 'सिनेमा', 'चित्रपट'],
+    'Healthcare': ['health', 'healthcare', 'medicine', 'medicines', 'doctor', 'hospital', 'dawai', 'दवा', 'दवाई', 'डॉक्टर', 'औषध', 'दवाखान'],
+}
+
+PERIOD_NAMES = {
+    'en': {'today': 'today', 'yesterday': 'yesterday', 'this_week': 'this week', 'last_week': 'last week',
+           'this_month': 'this month', 'last_month': 'last month', 'this_year': 'this year'},
+    'hi': {'today': 'आज', 'yesterday': 'कल', 'this_week': 'इस हफ्ते', 'last_week': 'पिछले हफ्ते',
+           'this_month': 'इस महीने', 'last_month': 'पिछले महीने', 'this_year': 'इस साल'},
+    'mr': {'today': 'आज', 'yesterday': 'काल', 'this_week': 'या आठवड्यात', 'last_week': 'मागच्या आठवड्यात',
+           'this_month': 'या महिन्यात', 'last_month': 'मागच्या महिन्यात', 'this_year': 'या वर्षी'},
+}
+
+REPLIES = {
+    'en': {
+        'spend': "You spent {amount} {period} ({count} transaction{s}).",
+        'spend_category': "You spent {amount} on {category} {period} ({count} transaction{s}).",
+        'spend_none': "No expenses recorded {period}.",
+        'spend_category_none': "No {category} expenses recorded {period}.",
+        'income': "You earned {amount} {period} ({count} entr{ies}).",
+        'income_none': "No income recorded {period}.",
+        'balance': "{period_cap}: income {income}, expenses {expense}, balance {balance}.",
+        'owe_lender': "You owe {lender} {amount} ({count} open loan{s}), next due on {due_date}.",
+        'owe_lender_none': "You have no open loans with {lender}.",
+        'owe_total': "You owe {amount} in total across {count} open loan{s}, next due on {due_date}.",
+        'owe_none': "You have no open loans. 🎉",
+    },
+    'hi': {
+        'spend': "{period} आपने {amount} खर्च किए ({count} लेन-देन)।",
+        'spend_category': "{period} आपने {category} पर {amount} खर्च किए ({count} लेन-देन)।",
+        'spend_none': "{period} कोई खर्च दर्ज नहीं है।",
+        'spend_category_none': "{period} {category} पर कोई खर्च दर्ज नहीं है।",
+        'income': "{period} आपकी कमाई {amount} रही ({count} एंट्री)।",
+        'income_none': "{period} कोई कमाई दर्ज नहीं है।",
+        'balance': "{period_cap}: कमाई {income}, खर्च {expense}, बैलेंस {balance}।",
+        'owe_lender': "आपको {lender} को {amount} देने हैं ({count} खुले कर्ज), अगली तारीख {due_date}।",
+        'owe_lender_none': "{lender} से आपका कोई खुला कर्ज नहीं है।",
+        'owe_total': "आपको कुल {amount} देने हैं ({count} खुले कर्ज), अगली तारीख {due_date}।",
+        'owe_none': "आपका कोई खुला कर्ज नहीं है। 🎉",
+    },
+    'mr': {
+        'spend': "{period} तुम्ही {amount} खर्च केले ({count} व्यवहार).",
+        'spend_category': "{period} तुम्ही {category} वर {amount} खर्च केले ({count} व्यवहार).",
+        'spend_none': "{period} कोणताही खर्च नोंदलेला नाही.",
+        'spend_category_none': "{period} {category} वर कोणताही खर्च नोंदलेला नाही.",
+        'income': "{period} तुमची कमाई {amount} झाली ({count} नोंदी).",
+        'income_none': "{period} कोणतीही कमाई नोंदलेली नाही.",
+        'balance': "{period_cap}: कमाई {income}, खर्च {expense}, शिल्लक {balance}.",
+        'owe_lender': "तुम्हाला {lender} ला {amount} द्यायचे आहेत ({count} कर्जे), पुढील तारीख {due_date}.",
+        'owe_lender_none': "{lender} कडून तुमचे कोणतेही कर्ज बाकी नाही.",
+        'owe_total': "तुम्हाला एकूण {amount} द्यायचे आहेत ({count} कर्जे), पुढील तारीख {due_date}.",
+        'owe_none': "तुमचे कोणतेही कर्ज बाकी नाही. 🎉",
+    },
+}
+
+def _money(amount) -> str:
+    amount = Decimal(amount or 0)
+    sign = "-" if amount < 0 else ""
+    return f"{sign}₹{abs(amount):,.0f}"
+
+def _plural(count: int) -> dict:
+    """English plural suffixes for the reply templates"""
+    return {"s": "" if count == 1 else "s", "ies": "y" if count == 1 else "ies"}
+
+def period_range(period: str, today: date = None) -> tuple:
+    """Inclusive (start, end) dates for a named period"""
+    today = today or date.today()
+    month_start = date(today.year, today.month, 1)
+    if period == 'today':
+        return today, today
+    if period == 'yesterday':
+        return today - timedelta(days=1), today - timedelta(days=1)
+    if period == 'this_week':
+        return today - timedelta(days=today.weekday()), today
+    if period == 'last_week':
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=6)
+    if period == 'last_month':
+        end = month_start - timedelta(days=1)
+        return date(end.year, end.month, 1), end
+    if period == 'this_year':
+        return date(today.year, 1, 1), today
+    return month_start, today
+
+def _find_period(text: str):
+    """Named period of the question; this month when it names none; None for one we can't answer"""
+    if _OTHER_PERIOD.search(text):
+        return None
+    return next((name for name, pattern in _PERIODS if pattern.search(text)), 'this_month')
+
+def _find_category(text: str):
+    lowered = text.lower()
+    for category, words in CATEGORY_SYNONYMS.items():
+        for word in words:
+            if word.isascii():
+                if re.search(rf"\b{word}\b", lowered):
+                    return category
+            elif word in text:
+                return category
+    return None
+
+def _find_lender(text: str):
+    for pattern in _LENDER_PATTERNS:
+        for match in pattern.finditer(text):
+            name = match.group('name').strip('?.,!')
+            if name and name.lower() not in _NOT_LENDERS:
+                return name
+    return None
+
+def classify_question(message: str):
+    """Map a chat message to (intent, params) or None when it is not a recognized analytic question"""
+    text = message.strip()
+    if not text or not _QUESTION.search(text) or _ADVICE.search(text):
+        return None
+    if _AMOUNT.search(text) and _RECORD.search(text):
+        return None
+
+    if _OWE.search(text):
+        lender = _find_lender(text)
+        return ('owe_lender', {"lender": lender}) if lender else ('owe_total', {})
+
+    period = _find_period(text)
+    if period is None:
+        return None
+    if _BALANCE.search(text):
+        return 'balance', {"period": period}
+    if _INCOME.search(text):
+        return 'income', {"period": period}
+    if _SPEND.search(text):
+        return 'spend', {"period": period, "category": _find_category(text)}
+    return None
+
+def _sum_transactions(db: Session, user_id, tx_type: str, start: date, end: date, category: str = None) -> tuple:
+    query = db.query(func.coalesce(func.sum(Transaction.amount), 0), func.count(Transaction.id)).filter(
+        Transaction.user_id == user_id,
+        Transaction.type == tx_type,
+        Transaction.date >= start,
+        Transaction.date <= end
+    )
+    if category:
+        query = query.filter(Transaction.category == category)
+    total, count = query.one()
+    return Decimal(total), count
+
+def answer_analytic_question(message: str, user: User, db: Session, language: str = 'en'):
+    """Exact answer for a recognized money question as a chat action dict, or None to fall back to the LLM"""
+    classified = classify_question(message)
+    if classified is None:
+        return None
+    intent, params = classified
+    replies = REPLIES.get(language, REPLIES['en'])
+    period_names = PERIOD_NAMES.get(language, PERIOD_NAMES['en'])
+
+    if intent in ('owe_lender', 'owe_total'):
+        query = db.query(func.coalesce(func.sum(Loan.amount), 0), func.count(Loan.id), func.min(Loan.due_date)).filter(
+            Loan.user_id == user.id,
+            Loan.is_paid == False
+        )
+        if intent == 'owe_lender':
+            query = query.filter(Loan.lender_name.ilike(f"%{params['lender']}%"))
+        total, count, due_date = query.one()
+        if not count:
+            reply = replies['owe_lender_none' if intent == 'owe_lender' else 'owe_none'].format(lender=params.get('lender'))
+        else:
+            reply = replies[intent].format(lender=params.get('lender'), amount=_money(total), count=count, due_date=due_date.strftime('%d %b'), **_plural(count))
+        return {"action": "chat", "reply": reply}
+
+    period = params["period"]
+    start, end = period_range(period)
+    period_text = period_names[period]
+
+    if intent == 'balance':
+        rows = dict(db.query(Transaction.type, func.coalesce(func.sum(Transaction.amount), 0)).filter(
+            Transaction.user_id == user.id,
+            Transaction.date >= start,
+            Transaction.date <= end
+        ).group_by(Transaction.type).all())
+        income = Decimal(next((v for k, v in rows.items() if str(getattr(k, 'value', k)).lower() == 'income'), 0))
+        expense = Decimal(next((v for k, v in rows.items() if str(getattr(k, 'value', k)).lower() == 'expense'), 0))
+        reply = replies['balance'].format(period_cap=period_text[:1].upper() + period_text[1:], income=_money(income),
+                                          expense=_money(expense), balance=_money(income - expense))
+        return {"action": "chat", "reply": reply}
+
+    if intent == 'income':
+        total, count = _sum_transactions(db, user.id, 'INCOME', start, end)
+        key = 'income' if count else 'income_none'
+        return {"action": "chat", "reply": replies[key].format(amount=_money(total), count=count, period=period_text, **_plural(count))}
+
+    category = params.get("category")
+    total, count = _sum_transactions(db, user.id, 'EXPENSE', start, end, category)
+    key = ('spend_category' if category else 'spend') + ('' if count else '_none')
+    return {"action": "chat", "reply": replies[key].format(amount=_money(total), count=count, period=period_text, category=category, **_plural(count))}
+
+if __name__ == "__main__":
+    # Regression run over the corpus: python -m app.services.ai.analytics_qa
+    from app.services.ai.analytics_corpus import ANALYTICS_CORPUS
+
+    failures = 0
+    for message, expected in ANALYTICS_CORPUS:
+        result = classify_question(message)
+        if result != expected:
+            failures += 1
+            print(f"❌ {message!r}\n   expected {expected}\n   got      {result}")
+    print(f"✅ {len(ANALYTICS_CORPUS) - failures}/{len(ANALYTICS_CORPUS)} analytic questions OK")
+    raise SystemExit(1 if failures else 0)
@@ -1,7 +1,51 @@
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.llm_metrics import record_cache, record_parse_failure
+from app.utils.cache import TTLCache
+import asyncio
 import json
 import re
 
+EXPENSE_CATEGORIES = ['Food', 'Transport', 'Bills', 'Shopping', 'Entertainment', 'Healthcare', 'Other']
+
+BATCH_PROMPT_SIZE = 25
+MAX_CONCURRENT_PROMPTS = 4
+
+# normalized description -> LLM result, shared across requests
+_category_cache = TTLCache(maxsize=20000, ttl=24 * 3600)
+
+# Well-known merchants / keywords that never need an LLM call
+CATEGORY_KEYWORDS = {
+    'Food': ['swiggy', 'zomato', 'dominos', 'mcdonald', 'kfc', 'pizza', 'restaurant', 'cafe', 'chai', 'tea',
+             'coffee', 'hotel', 'dhaba', 'bakery', 'grocery', 'groceries', 'bigbasket', 'blinkit', 'zepto',
+             'dmart', 'milk', 'food', 'meal', 'lunch', 'dinner', 'breakfast', 'snack', 'vegetable', 'sabzi',
+             'khana', 'nashta'],
+    'Transport': ['uber', 'ola', 'rapido', 'auto', 'cab', 'taxi', 'metro', 'bus', 'train', 'irctc', 'fuel',
+                  'petrol', 'diesel', 'cng', 'fastag', 'parking', 'toll', 'hpcl', 'bpcl', 'indianoil', 'iocl'],
+    'Bills': ['electricity', 'bescom', 'msedcl', 'mseb', 'water', 'gas', 'cylinder', 'mobile', 'recharge',
+              'airtel', 'jio', 'vodafone', 'bsnl', 'broadband', 'internet', 'wifi', 'dth', 'rent', 'bill',
+              'emi', 'insurance', 'lic'],
+    'Shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'meesho', 'nykaa', 'shop', 'shopping', 'store', 'mall',
+                 'mart', 'clothes', 'shoe', 'electronics', 'croma'],
+    'Entertainment': ['netflix', 'hotstar', 'prime video', 'spotify', 'youtube', 'bookmyshow', 'pvr', 'inox',
+                      'movie', 'cinema', 'game', 'subscription'],
+    'Healthcare': ['pharmacy', 'medical', 'medicine', 'apollo', 'medplus', 'netmeds', '1mg', 'pharmeasy',
+                   'hospital', 'clinic', 'doctor', 'dawai', 'lab', 'diagnostic'],
+}
+
+_KEYWORD_PATTERNS = [
+    (category, re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')s?\b', re.I))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+]
+
+def categorize_locally(description: str):
+    """Keyword-based categorization, returns None when nothing matches"""
+    if not description:
+        return None
+    for category, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(description):
+            return {"category": category, "confidence": 0.9}
+    return None
+
 def categorize_transaction(description: str, amount: float, language: str = 'en') -> dict:
     """Auto-categorize transaction using AI"""
     
@@ -29,7 +73,7 @@ def categorize_transaction(description: str, amount: float, language: str = 'en'
     No explanation, just the JSON.
     """
     
-    response = generate_with_gemini(prompt)
+    response = generate_with_gemini(prompt, call_site="categorize")
     
     if not response:
         return {"category": "Other", "confidence": 0.5}
@@ -41,6 +85,81 @@ def categorize_transaction(description: str, amount: float, language: str = 'en'
             result = json.loads(json_match.group())
             return result
         else:
+            record_parse_failure("categorize")
             return {"category": "Other", "confidence": 0.5}
     except:
-        return {"category": "Other", "confidence": 0.5}
\ No newline at end of file
+        record_parse_failure("categorize")
+        return {"category": "Other", "confidence": 0.5}
+
+def _normalize(description: str) -> str:
+    return re.sub(r'\s+', ' ', (description or '').strip().lower())
+
+def _categorize_chunk(descriptions: list) -> dict:
+    """One LLM call for many descriptions. Returns {position: {"category", "confidence"}} for valid items."""
+    numbered = "\n".join(f'{i}. "{d}"' for i, d in enumerate(descriptions))
+    prompt = f"""
+    You are a transaction categorizer for Indian users.
+    
+    Transactions:
+    {numbered}
+    
+    Categorize EACH transaction into ONE of: {', '.join(EXPENSE_CATEGORIES)}
+    
+    Return ONLY a JSON object with exactly one entry per transaction number:
+    {{
+        "results": [{{ "i": 0, "category": "Food", "confidence": 0.9 }}]
+    }}
+    """
+    
+    response = generate_with_gemini(prompt, call_site="categorize_batch")
+    if not response:
+        return {}
+    
+    try:
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        parsed = json.loads(json_match.group()) if json_match else {}
+    except Exception:
+        record_parse_failure("categorize_batch")
+        return {}
+    
+    results = {}
+    for entry in parsed.get('results', []) if isinstance(parsed, dict) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get('i'), int):
+            continue
+        if 0 <= entry['i'] < len(descriptions) and entry.get('category') in EXPENSE_CATEGORIES:
+            try: confidence = float(entry.get('confidence', 0.8))
+            except (TypeError, ValueError): confidence = 0.8
+            results[entry['i']] = {"category": entry['category'], "confidence": confidence}
+    return results
+
+async def categorize_batch(descriptions: list) -> list:
+    """
+    Categorize many descriptions: dedupe, resolve locally/cached where possible,
+    pack the rest into multi-item prompts run concurrently. Results keep input order.
+    """
+    keys = [_normalize(d) for d in descriptions]
+    resolved = {}
+    pending = []
+    for key in dict.fromkeys(keys):
+        hit = categorize_locally(key) or _category_cache.get(key)
+        record_cache("categorize_batch", bool(hit))
+        if hit:
+            resolved[key] = hit
+        else:
+            pending.append(key)
+    
+    chunks = [pending[i:i + BATCH_PROMPT_SIZE] for i in range(0, len(pending), BATCH_PROMPT_SIZE)]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROMPTS)
+    
+    async def run(chunk):
+        async with semaphore:
+            return await asyncio.to_thread(_categorize_chunk, chunk)
+    
+    for chunk, chunk_results in zip(chunks, await asyncio.gather(*(run(c) for c in chunks))):
+        for i, key in enumerate(chunk):
+            if i in chunk_results:
+                resolved[key] = chunk_results[i]
+                _category_cache.set(key, chunk_results[i])
+    
+    fallback = {"category": "Other", "confidence": 0.5}
+    return [{"description": d, **resolved.get(k, fallback)} for d, k in zip(descriptions, keys)]
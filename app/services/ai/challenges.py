@@ -1,36 +1,45 @@
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.llm_metrics import record_parse_failure
+from app.services.ai.prompts import PromptTemplate
 import json
 import re
 
+CHALLENGE_PROMPT = PromptTemplate("challenge", 1, """
+    Generate a micro-saving challenge for a gig worker.
+
+    User Profile: {job}
+    Recent Spending:
+    {recent_transactions}
+
+    Requirements:
+    1. Simple, actionable task for TODAY.
+    2. Estimated savings amount (₹10-₹200).
+    3. Tone: Encouraging.
+    4. Language: {language}
+
+    Return JSON:
+    {{ "title": "Skip the auto", "description": "Walk for short trips today.", "reward": 50 }}
+    """, sections=("recent_transactions",))
+
 def generate_ai_challenge(user_context: dict, language: str = 'en'):
     """Generate a personalized micro-challenge"""
     try:
-        prompt = f"""
-        Generate a micro-saving challenge for a gig worker.
-        
-        User Profile: {user_context.get('job_type', 'Worker')}
-        Recent Spending: {user_context.get('recent_transactions', 'N/A')}
-        
-        Requirements:
-        1. Simple, actionable task for TODAY.
-        2. Estimated savings amount (₹10-₹200).
-        3. Tone: Encouraging.
-        4. Language: {language}
-        
-        Return JSON:
-        {{
-            "title": "Skip the auto",
-            "description": "Walk for short trips today.",
-            "reward": 50
-        }}
-        """
+        prompt = CHALLENGE_PROMPT.render(
+            job=user_context.get('job_type') or 'Worker',
+            recent_transactions=user_context.get('recent_transactions'),
+            language=language,
+        )
         
-        response = generate_with_gemini(prompt)
+        response = generate_with_gemini(prompt, call_site="challenge")
         
         if not response: return None
         
         clean_response = response.replace("```json", "").replace("```", "").strip()
-        return json.loads(clean_response)
+        try:
+            return json.loads(clean_response)
+        except ValueError:
+            record_parse_failure("challenge")
+            return None
         
     except Exception:
         return None
\ No newline at end of file
@@ -0,0 +1,211 @@
+from app.services.ai.gemini_client import generate_with_gemini, stream_with_gemini
+from app.services.ai.categorizer import categorize_locally, EXPENSE_CATEGORIES
+from app.services.ai.llm_metrics import record_parse_failure
+from app.services.ai.prompts import PromptTemplate
+from app.services.ai.chatbot import LANG_INSTRUCTIONS, TONE_INSTRUCTIONS, JOB_INSTRUCTIONS
+from datetime import date, timedelta
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+INCOME_CATEGORIES = ['Salary', 'Freelance', 'Business', 'Tips', 'Other']
+
+# --- Local pre-classifier: obvious intents never reach the LLM ---
+
+_AMOUNT = r'(?:rs\.?\s*|₹\s*|inr\s*)?(?P<amount>\d+(?:\.\d{1,2})?)\s*(?:rs|rupees)?'
+_WHEN = r'(?:\s+(?P<when>today|yesterday|aaj|kal))?'
+
+_GREETING_RE = re.compile(
+    r'^\s*(?:hi+|hello|hey|namaste|namaskar|good (?:morning|afternoon|evening)|thanks?(?: you)?|thank u|'
+    r'ok(?:ay)?|dhanyavad|shukriya)\s*[!.]*\s*$', re.IGNORECASE)
+_ADD_EXPENSE_RE = re.compile(
+    r'^\s*(?:i\s+)?(?:spent|paid|expense(?: of)?)\s+' + _AMOUNT + r'\s+(?:on|for)\s+(?P<desc>[^\d]+?)' + _WHEN + r'\s*[.!]?\s*$',
+    re.IGNORECASE)
+_ADD_INCOME_RE = re.compile(
+    r'^\s*(?:i\s+)?(?:add|got|received|earned|made)\s+' + _AMOUNT + r'\s+(?:as\s+|in\s+)?(?P<desc>income|salary|tips?|earnings?)'
+    + _WHEN + r'\s*[.!]?\s*$', re.IGNORECASE)
+
+_INCOME_CATEGORY_BY_WORD = {'salary': 'Salary', 'tip': 'Tips', 'tips': 'Tips'}
+
+GREETING_REPLIES = {
+    'en': "Hi! 👋 Tell me what you spent or earned, or ask me about your money.",
+    'hi': "नमस्ते! 👋 बताइए आपने क्या खर्च किया या कमाया, या अपने पैसों के बारे में पूछिए।",
+    'mr': "नमस्कार! 👋 तुम्ही काय खर्च केला किंवा कमावले ते सांगा, किंवा तुमच्या पैशांबद्दल विचारा.",
+}
+
+def _resolve_date(when: str) -> str:
+    days_back = 1 if when and when.lower() in ('yesterday', 'kal') else 0
+    return (date.today() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+
+def preclassify_message(message: str, language: str = 'en'):
+    """Route obvious intents locally. Returns a parsed action dict or None if the LLM is needed."""
+    if _GREETING_RE.match(message):
+        return {"action": "chat", "reply": GREETING_REPLIES.get(language, GREETING_REPLIES['en'])}
+
+    match = _ADD_EXPENSE_RE.match(message)
+    if match:
+        description = match.group('desc').strip()
+        local_category = categorize_locally(description)
+        if not local_category:
+            return None
+        return {
+            "action": "add",
+            "amount": float(match.group('amount')),
+            "description": description,
+            "type": "expense",
+            "date": _resolve_date(match.group('when')),
+            "category": local_category['category'],
+        }
+
+    match = _ADD_INCOME_RE.match(message)
+    if match:
+        word = match.group('desc').lower()
+        return {
+            "action": "add",
+            "amount": float(match.group('amount')),
+            "description": word.capitalize(),
+            "type": "income",
+            "date": _resolve_date(match.group('when')),
+            "category": _INCOME_CATEGORY_BY_WORD.get(word, 'Other'),
+        }
+
+    return None
+
+# --- Single structured LLM call: intent + entities + category + reply ---
+
+_JSON_OUTPUT = "Return ONLY one JSON object. No markdown."
+_STREAM_OUTPUT = """Output format (no markdown):
+- FIRST LINE: the JSON object WITHOUT the "reply" field, on one line.
+- ONLY for "chat": the reply as plain text on the following lines."""
+
+ENGINE_PROMPT = PromptTemplate("chat_engine", 1, """
+    You are Spennies, a smart financial companion.
+    User said: "{message}"
+    Today is: {today}
+
+    STEP 1 - Detect the intent and extract its fields:
+    - "Change my name to Ramesh" -> {{ "action": "update_profile", "field": "name", "value": "Ramesh" }}
+    - "Set job to Driver" -> {{ "action": "update_profile", "field": "job_type", "value": "driver" }}
+    - "Change savings target to 10000" -> {{ "action": "update_profile", "field": "savings_target", "value": 10000 }}
+    - "Set food budget to 5000" -> {{ "action": "update_budget", "category": "Food", "amount": 5000 }}
+    - "Loan taken 5000 from Ramesh" -> {{ "action": "add_loan", "amount": 5000, "lender": "Ramesh", "due_date": "YYYY-MM-DD" (default today+7 days) }}
+    - "Paid loan to Ramesh" -> {{ "action": "pay_loan", "lender": "Ramesh" }}
+    - "Delete loan from Ramesh" -> {{ "action": "delete_loan", "lender": "Ramesh" }}
+    - "Spent 50 on chai", "Add 500 income", "Paid 200 for auto yesterday" ->
+      {{ "action": "add", "amount": 50, "description": "chai", "type": "expense", "date": "YYYY-MM-DD" (default {today}), "category": "Food" }}
+      category for expense: {expense_categories}
+      category for income: {income_categories}
+    - "Delete 50 chai", "Undo 200 auto" -> {{ "action": "delete", "amount": 50, "description": "chai" }}
+    - Questions, greetings, advice -> {{ "action": "chat", "reply": "..." }}
+
+    STEP 2 - ONLY when action is "chat", write "reply" using this data:
+    - Name: {name}, Job: {job}
+    - Persona: {persona}
+    - Income: ₹{income}, Expenses: ₹{expense}, Savings: ₹{savings}, Goal: ₹{goal}
+    - Spending by category:
+    {categories}
+    - Recent transactions:
+    {recent_transactions}
+    - Active loans:
+    {loans}
+    Reply rules: {language_rule} Max 2-3 sentences.
+
+    {output_instruction}
+    """, sections=("recent_transactions", "loans", "categories"))
+
+def _build_engine_prompt(message: str, user_context: dict, language: str, tone: str, output_instruction: str) -> str:
+    user_job = user_context.get('job_type') or 'other'
+    return ENGINE_PROMPT.render(
+        message=message,
+        today=date.today().strftime('%Y-%m-%d'),
+        expense_categories=', '.join(EXPENSE_CATEGORIES),
+        income_categories=', '.join(INCOME_CATEGORIES),
+        name=user_context.get('name', 'User'),
+        job=user_job,
+        persona=f"{TONE_INSTRUCTIONS.get(tone, 'Be helpful.')} {JOB_INSTRUCTIONS.get(user_job, '')}".strip(),
+        income=user_context.get('monthly_income', 0),
+        expense=user_context.get('monthly_expense', 0),
+        savings=user_context.get('monthly_savings', 0),
+        goal=user_context.get('savings_target', 0),
+        categories=user_context.get('categories'),
+        recent_transactions=user_context.get('recent_transactions'),
+        loans=user_context.get('loans'),
+        language_rule=LANG_INSTRUCTIONS.get(language, 'Respond in English.'),
+        output_instruction=output_instruction,
+    )
+
+def run_chat_engine(message: str, user_context: dict, language: str = 'en', tone: str = 'friendly') -> dict:
+    """Detect intent, extract fields, categorize and (for chat) answer in ONE LLM call"""
+    try:
+        prompt = _build_engine_prompt(message, user_context, language, tone, _JSON_OUTPUT)
+        response = generate_with_gemini(prompt, call_site="chat")
+
+        if not response:
+            return {"action": "chat"}
+
+        clean_response = response.replace("```json", "").replace("```", "").strip()
+        json_match = re.search(r'\{.*\}', clean_response, re.DOTALL)
+        parsed = json.loads(json_match.group() if json_match else clean_response)
+        if not isinstance(parsed, dict) or not parsed.get('action'):
+            record_parse_failure("chat")
+            return {"action": "chat"}
+        return parsed
+
+    except Exception as e:
+        logger.error("Chat engine failed: %s", e)
+        record_parse_failure("chat")
+        return {"action": "chat"}
+
+def _parse_header(line: str):
+    try:
+        parsed = json.loads(line)
+        return parsed if isinstance(parsed, dict) and parsed.get('action') else None
+    except ValueError:
+        return None
+
+def stream_chat_engine(message: str, user_context: dict, language: str = 'en', tone: str = 'friendly'):
+    """
+    Streaming variant of run_chat_engine, still a single LLM call.
+    Yields ("action", dict) once the JSON header line arrives, then ("token", str) reply chunks.
+    Close the generator to stop reading (e.g. client disconnected or a write action was detected).
+    """
+    prompt = _build_engine_prompt(message, user_context, language, tone, _STREAM_OUTPUT)
+    stream = stream_with_gemini(prompt, call_site="chat_stream")
+    buffer = ""
+    header = None
+    try:
+        for chunk in stream:
+            if header is not None:
+                yield "token", chunk
+                continue
+
+            buffer += chunk
+            while header is None and '\n' in buffer:
+                line, buffer = buffer.split('\n', 1)
+                line = line.strip()
+                if not line or line.startswith('```'):
+                    continue
+                header = _parse_header(line)
+                if header is None:
+                    # Model skipped the header, treat everything as the reply
+                    record_parse_failure("chat_stream")
+                    header = {"action": "chat"}
+                    buffer = line + '\n' + buffer
+                yield "action", header
+                if buffer.strip():
+                    yield "token", buffer.lstrip()
+                buffer = ""
+
+        if header is None:
+            clean = buffer.replace("```json", "").replace("```", "").strip()
+            header = _parse_header(clean)
+            if header is not None:
+                yield "action", header
+            else:
+                yield "action", {"action": "chat"}
+                if clean:
+                    yield "token", clean
+    finally:
+        stream.close()
@@ -1,8 +1,34 @@
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.llm_metrics import record_parse_failure
+from app.services.ai.prompts import PromptTemplate
+import logging
 import re
 import json
 from datetime import date
 
+logger = logging.getLogger(__name__)
+
+LANG_INSTRUCTIONS = {
+    'en': 'Respond in English.',
+    'hi': 'Respond in Hindi (हिंदी में जवाब दें).',
+    'mr': 'Respond in Marathi (मराठीत उत्तर द्या).'
+}
+
+TONE_INSTRUCTIONS = {
+    'friendly': "Be casual, warm, and like a helpful friend. Use emojis.",
+    'motivational': "Be high-energy, encouraging, and inspiring! Use 'You got this!' and 🔥 emojis.",
+    'professional': "Be formal, concise, and objective. Focus on facts. No slang."
+}
+
+JOB_INSTRUCTIONS = {
+    'driver': "User is a Driver. Relate to fuel, maintenance, rides.",
+    'freelancer': "User is a Freelancer. Relate to irregular income, clients.",
+    'student': "User is a Student. Relate to budget food, books, pocket money.",
+    'vendor': "User is a Vendor. Relate to daily cash flow, inventory.",
+    'housewife': "User is a Homemaker. Relate to household savings.",
+    'other': ""
+}
+
 def parse_natural_language_transaction(message: str, language: str = 'en'):
     """Parse user message to detect transaction intent (Add/Delete/Update/Loan)"""
     try:
@@ -50,7 +76,7 @@ def parse_natural_language_transaction(message: str, language: str = 'en'):
         Return ONLY JSON. No markdown.
         """
         
-        response = generate_with_gemini(prompt)
+        response = generate_with_gemini(prompt, call_site="nl_transaction")
         
         if not response:
             return {"action": "chat"}
@@ -65,77 +91,69 @@ def parse_natural_language_transaction(message: str, language: str = 'en'):
         return json.loads(clean_response)
         
     except Exception as e:
-        print(f"❌ AI Parsing Error: {e}")
+        logger.warning("Chat action parse failed: %s", e)
+        record_parse_failure("nl_transaction")
         return {"action": "chat"}
 
+CHAT_REPLY_PROMPT = PromptTemplate("chat_reply", 1, """
+    You are Spennies, a smart financial companion.
+
+    USER PROFILE:
+    - Name: {name}
+    - Job: {job}
+
+    YOUR PERSONA:
+    {tone_instruction}
+    {job_instruction}
+
+    USER FINANCIAL DATA:
+    - Income: ₹{income}
+    - Expenses: ₹{expense}
+    - Savings: ₹{savings}
+    - Goal: ₹{goal}
+
+    Budget Limits:
+    {budget_limits}
+
+    Recent Transactions:
+    {recent_transactions}
+
+    Active Loans:
+    {loans}
+
+    USER QUESTION: "{message}"
+
+    GUIDELINES:
+    - {lang_instruction}
+    - Be concise (max 2-3 sentences).
+    - Address user by name if relevant.
+    - If asked "Am I over budget?", compare spending to Budget Limits.
+    """, sections=("recent_transactions", "loans", "budget_limits"))
+
 def chat_with_ai(user_message: str, user_context: dict, language: str = 'en', tone: str = 'friendly') -> str:
     """Generate AI chat response with Rich Context & Tone"""
     try:
-        lang_instruction = {
-            'en': 'Respond in English.',
-            'hi': 'Respond in Hindi (हिंदी में जवाब दें).',
-            'mr': 'Respond in Marathi (मराठीत उत्तर द्या).'
-        }.get(language, 'Respond in English.')
-        
-        tone_instruction = {
-            'friendly': "Be casual, warm, and like a helpful friend. Use emojis.",
-            'motivational': "Be high-energy, encouraging, and inspiring! Use 'You got this!' and 🔥 emojis.",
-            'professional': "Be formal, concise, and objective. Focus on facts. No slang."
-        }.get(tone, "Be helpful.")
-        
         user_job = user_context.get('job_type', 'other')
-        job_instruction = {
-            'driver': "User is a Driver. Relate to fuel, maintenance, rides.",
-            'freelancer': "User is a Freelancer. Relate to irregular income, clients.",
-            'student': "User is a Student. Relate to budget food, books, pocket money.",
-            'vendor': "User is a Vendor. Relate to daily cash flow, inventory.",
-            'housewife': "User is a Homemaker. Relate to household savings.",
-            'other': ""
-        }.get(user_job, "")
-        
-        prompt = f"""
-        You are Spennies, a smart financial companion.
-        
-        👤 **USER PROFILE:**
-        - Name: {user_context.get('name', 'User')}
-        - Job: {user_job}
-        
-        🎭 **YOUR PERSONA:**
-        {tone_instruction}
-        {job_instruction}
-        
-        📊 **USER FINANCIAL DATA:**
-        - Income: ₹{user_context.get('monthly_income', 0)}
-        - Expenses: ₹{user_context.get('monthly_expense', 0)}
-        - Savings: ₹{user_context.get('monthly_savings', 0)}
-        - Goal: ₹{user_context.get('savings_target', 0)}
-        
-        **Budget Limits:**
-        {user_context.get('budget_limits', 'No limits set')}
-
-        **Recent Transactions:**
-        {user_context.get('recent_transactions', 'N/A')}
-        
-        **Active Loans:**
-        {user_context.get('loans', 'N/A')}
-        
-        ---
-        
-        👤 **USER QUESTION:** 
-        "{user_message}"
-        
-        ---
-        
-        💡 **GUIDELINES:**
-        - {lang_instruction}
-        - Be concise (max 2-3 sentences).
-        - Address user by name if relevant.
-        - If asked "Am I over budget?", compare spending to Budget Limits.
-        """
         
-        response = generate_with_gemini(prompt)
+        prompt = CHAT_REPLY_PROMPT.render(
+            name=user_context.get('name', 'User'),
+            job=user_job,
+            tone_instruction=TONE_INSTRUCTIONS.get(tone, "Be helpful."),
+            job_instruction=JOB_INSTRUCTIONS.get(user_job, ""),
+            income=user_context.get('monthly_income', 0),
+            expense=user_context.get('monthly_expense', 0),
+            savings=user_context.get('monthly_savings', 0),
+            goal=user_context.get('savings_target', 0),
+            budget_limits=user_context.get('budget_limits') or 'No limits set',
+            recent_transactions=user_context.get('recent_transactions'),
+            loans=user_context.get('loans'),
+            message=user_message,
+            lang_instruction=LANG_INSTRUCTIONS.get(language, 'Respond in English.'),
+        )
+        
+        response = generate_with_gemini(prompt, call_site="chat_reply")
         return response or "I'm having trouble analyzing your data right now."
         
     except Exception as e:
-        print(f"❌ AI Chat Error: {e}")
+        logger.error("Chat failed: %s", e)
         return "System Error: Unable to generate response."
\ No newline at end of file
@@ -0,0 +1,147 @@
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import hashlib
+import json
+import logging
+import re
+import uuid
+
+from app.config import settings
+from app.models.content_pool import PooledContent
+from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.llm_metrics import record_cache, record_parse_failure
+from app.services.ai.chatbot import JOB_INSTRUCTIONS
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ['driver', 'freelancer', 'student', 'vendor', 'housewife', 'other']
+LANGUAGES = {'en': 'English', 'hi': 'Hindi', 'mr': 'Marathi'}
+# (band, upper bound of monthly expense, description)
+SPENDING_BANDS = [
+    ('low', 5000, 'spends under ₹5,000 a month'),
+    ('mid', 15000, 'spends ₹5,000-₹15,000 a month'),
+    ('high', None, 'spends over ₹15,000 a month'),
+]
+
+SEGMENTS_PER_PROMPT = 6
+MAX_CONCURRENT_PROMPTS = 3
+
+# (segment, kind) -> list of {"id", ...content}; pools only change on refill
+_pool_cache = TTLCache(maxsize=1000, ttl=900)
+
+def spending_band(monthly_expense: float) -> str:
+    for band, upper, _ in SPENDING_BANDS:
+        if upper is None or monthly_expense < upper:
+            return band
+    return SPENDING_BANDS[-1][0]
+
+def segment_key(job_type: str, language: str, band: str) -> str:
+    job = (job_type or 'other').lower()
+    return f"{job if job in JOB_TYPES else 'other'}:{language if language in LANGUAGES else 'en'}:{band}"
+
+def all_segments() -> list:
+    return [segment_key(job, lang, band) for job in JOB_TYPES for lang in LANGUAGES for band, _, _ in SPENDING_BANDS]
+
+def _load_pool(db: Session, segment: str, kind: str) -> list:
+    cached = _pool_cache.get((segment, kind))
+    if cached is not None:
+        return cached
+    rows = db.query(PooledContent).filter(
+        PooledContent.segment == segment,
+        PooledContent.kind == kind
+    ).order_by(PooledContent.id).all()
+    pool = [{"id": str(row.id), **json.loads(row.content)} for row in rows]
+    _pool_cache.set((segment, kind), pool)
+    return pool
+
+def pick_from_pool(db: Session, kind: str, segment: str, user_id):
+    """Same item for a user all day, different users spread over the pool. None if the pool is empty."""
+    pool = _load_pool(db, segment, kind)
+    record_cache(kind, bool(pool))
+    if not pool:
+        return None
+    seed = hashlib.sha256(f"{user_id}:{date.today().isoformat()}:{kind}".encode()).hexdigest()
+    return pool[int(seed, 16) % len(pool)]
+
+# --- Bulk refill (background job) ---
+
+def _describe_segment(segment: str) -> str:
+    job, lang, band = segment.split(':')
+    job_text = JOB_INSTRUCTIONS.get(job) or "User has a general job."
+    band_text = next(desc for name, _, desc in SPENDING_BANDS if name == band)
+    return f'- "{segment}": {job_text} Language: {LANGUAGES[lang]}. User {band_text}.'
+
+def _generate_batch(segments: list, per_segment: int) -> dict:
+    segment_lines = "\n        ".join(_describe_segment(s) for s in segments)
+    prompt = f"""
+        Generate micro-saving content for gig workers in India, for several user segments.
+        For EACH segment write {per_segment} challenges and {per_segment} tips, in that segment's language.
+
+        Challenge: simple, actionable task for TODAY, estimated savings ₹10-₹200, encouraging tone.
+        Tip: short, job-relevant money tip (max 15 words).
+
+        Segments:
+        {segment_lines}
+
+        Return ONLY JSON keyed by segment:
+        {{
+            "driver:en:low": {{
+                "challenges": [{{ "title": "Skip the auto", "description": "Walk for short trips today.", "reward": 50 }}],
+                "tips": ["..."]
+            }}
+        }}
+        """
+    response = generate_with_gemini(prompt, call_site="content_pool")
+    if not response:
+        return {}
+    try:
+        match = re.search(r'\{.*\}', response, re.DOTALL)
+        parsed = json.loads(match.group()) if match else {}
+        return parsed if isinstance(parsed, dict) else {}
+    except Exception as e:
+        logger.warning("Content pool response parse failed: %s", e)
+        record_parse_failure("content_pool")
+        return {}
+
+def _valid_challenge(item) -> bool:
+    return isinstance(item, dict) and item.get('title') and item.get('description') and isinstance(item.get('reward'), (int, float))
+
+def _store_batch(db: Session, generated: dict) -> int:
+    stored = 0
+    for segment, content in generated.items():
+        if not isinstance(content, dict):
+            continue
+        challenges = [c for c in content.get('challenges', []) if _valid_challenge(c)]
+        tips = [t for t in content.get('tips', []) if isinstance(t, str) and t.strip()]
+        for kind, items in (('challenge', challenges), ('tip', tips)):
+            if not items:
+                continue  # keep the previous pool rather than emptying it
+            db.query(PooledContent).filter(PooledContent.segment == segment, PooledContent.kind == kind).delete()
+            for item in items:
+                payload = {"title": item['title'], "description": item['description'], "reward": int(item['reward'])} if kind == 'challenge' else {"tip": item.strip()}
+                db.add(PooledContent(id=uuid.uuid4(), segment=segment, kind=kind, content=json.dumps(payload, ensure_ascii=False), created_at=datetime.utcnow()))
+                stored += 1
+            _pool_cache.pop((segment, kind))
+    db.commit()
+    return stored
+
+def refill_pools(db: Session, segments: list = None, per_segment: int = None) -> int:
+    """Regenerate pools with a few multi-segment LLM prompts run concurrently. Returns items stored."""
+    segments = segments if segments is not None else all_segments()
+    per_segment = per_segment or settings.CONTENT_POOL_SIZE
+    batches = [segments[i:i + SEGMENTS_PER_PROMPT] for i in range(0, len(segments), SEGMENTS_PER_PROMPT)]
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROMPTS) as executor:
+        results = list(executor.map(lambda batch: _generate_batch(batch, per_segment), batches))
+
+    stored = 0
+    for batch, generated in zip(batches, results):
+        # Only accept keys we asked for
+        stored += _store_batch(db, {k: v for k, v in generated.items() if k in batch})
+    return stored
+
+def missing_segments(db: Session) -> list:
+    filled = {row[0] for row in db.query(PooledContent.segment).filter(PooledContent.kind == 'challenge').distinct().all()}
+    return [s for s in all_segments() if s not in filled]
@@ -0,0 +1,137 @@
+import numpy as np
+from datetime import date
+
+HISTORY_DAYS = 56
+EWMA_HALFLIFE_DAYS = 7.0
+MIN_HISTORY_DAYS = 7
+Z_80 = 1.2816  # 80% interval
+
+def _kind(tx_type) -> str:
+    return str(getattr(tx_type, 'value', tx_type)).lower()
+
+def daily_series(rows, start: date, end: date):
+    """(date, type, total) rows -> income and expense arrays with one slot per day in [start, end]"""
+    n = (end - start).days + 1
+    income = np.zeros(n)
+    expense = np.zeros(n)
+    for day, tx_type, total in rows:
+        idx = (day - start).days
+        if 0 <= idx < n:
+            (income if _kind(tx_type) == 'income' else expense)[idx] += float(total or 0)
+    return income, expense
+
+def ewma(values: np.ndarray, halflife: float = EWMA_HALFLIFE_DAYS) -> float:
+    """Exponentially weighted mean, most recent value weighted highest"""
+    if values.size == 0:
+        return 0.0
+    weights = 0.5 ** (np.arange(values.size)[::-1] / halflife)
+    return float(np.dot(weights, values) / weights.sum())
+
+def _weekdays(start: date, n: int) -> np.ndarray:
+    return (np.arange(n) + start.weekday()) % 7
+
+def weekday_factors(values: np.ndarray, weekdays: np.ndarray, prior: float = 2.0) -> np.ndarray:
+    """Multiplicative day-of-week factors, shrunk towards 1 for weekdays with few samples"""
+    overall = values.mean() if values.size else 0.0
+    if overall <= 0:
+        return np.ones(7)
+    sums = np.bincount(weekdays, weights=values, minlength=7)
+    counts = np.bincount(weekdays, minlength=7)
+    means = np.divide(sums, counts, out=np.full(7, overall), where=counts > 0)
+    shrink = counts / (counts + prior)
+    return shrink * (means / overall) + (1 - shrink)
+
+def _expense_model(history: np.ndarray, hist_wd: np.ndarray, future_wd: np.ndarray):
+    """EWMA level x day-of-week factor. Returns (expected total, variance of total)."""
+    factors = weekday_factors(history, hist_wd)
+    level = ewma(history)
+    fitted = level * factors[hist_wd]
+    sigma2 = float(np.mean((history - fitted) ** 2)) if history.size > 1 else 0.0
+    return float(np.sum(level * factors[future_wd])), sigma2 * future_wd.size
+
+def _income_model(history: np.ndarray, hist_wd: np.ndarray, future_wd: np.ndarray, month_income: float):
+    """
+    Hurdle model for gig income: P(paid on a weekday) x typical amount when paid.
+    Returns (expected total, variance of total, pattern).
+    """
+    active = history > 0
+    active_days = int(active.sum())
+    if active_days == 0:
+        return 0.0, 0.0, 'none'
+
+    amounts = history[active]
+    typical = ewma(amounts)
+    second_moment = float(np.mean(amounts ** 2))
+
+    # One or two big credits in two months: salary / monthly settlement
+    if active_days <= 3:
+        if month_income > 0:
+            return 0.0, 0.0, 'monthly'
+        p_any = min(1.0, active_days / history.size * future_wd.size)
+        return p_any * typical, p_any * second_moment - (p_any * typical) ** 2, 'monthly'
+
+    p_overall = active_days / history.size
+    day_counts = np.bincount(hist_wd, minlength=7)
+    day_active = np.bincount(hist_wd, weights=active.astype(float), minlength=7)
+    # Per-weekday payout probability, shrunk towards the overall rate
+    p_weekday = (day_active + 2.0 * p_overall) / (day_counts + 2.0)
+
+    p = p_weekday[future_wd]
+    expected = float(np.sum(p * typical))
+    variance = float(np.sum(p * second_moment - (p * typical) ** 2))
+
+    cv = float(amounts.std() / amounts.mean()) if amounts.mean() > 0 else 0.0
+    pattern = 'regular' if p_overall >= 0.8 and cv <= 0.5 else 'irregular'
+    return expected, max(variance, 0.0), pattern
+
+def forecast_month_end(income: np.ndarray, expense: np.ndarray, start: date, today: date,
+                       days_in_month: int, month_income: float, month_expense: float) -> dict:
+    """
+    Project month-end savings from daily series covering [start, today].
+    History used for fitting excludes today (partial) and leading days before the first transaction.
+    """
+    days_remaining = days_in_month - today.day
+    future_wd = (today.weekday() + np.arange(1, days_remaining + 1)) % 7
+
+    history_income = income[:-1]
+    history_expense = expense[:-1]
+    seen = np.flatnonzero((history_income > 0) | (history_expense > 0))
+    first = int(seen[0]) if seen.size else history_income.size
+    history_income = history_income[first:]
+    history_expense = history_expense[first:]
+    hist_wd = _weekdays(start, income.size - 1)[first:]
+
+    if history_expense.size < MIN_HISTORY_DAYS:
+        # Not enough history: straight-line month-to-date expense, no extra income
+        daily = month_expense / max(today.day, 1)
+        projected_expense = month_expense + daily * days_remaining
+        projected = month_income - projected_expense
+        return {
+            "projected_savings": projected,
+            "projected_low": projected,
+            "projected_high": projected,
+            "projected_income": month_income,
+            "projected_expense": projected_expense,
+            "income_pattern": 'unknown',
+            "days_remaining": days_remaining,
+            "method": 'linear',
+        }
+
+    exp_total, exp_var = _expense_model(history_expense, hist_wd, future_wd)
+    inc_total, inc_var, pattern = _income_model(history_income, hist_wd, future_wd, month_income)
+
+    projected_income = month_income + inc_total
+    projected_expense = month_expense + exp_total
+    projected = projected_income - projected_expense
+    spread = Z_80 * float(np.sqrt(exp_var + inc_var))
+
+    return {
+        "projected_savings": projected,
+        "projected_low": projected - spread,
+        "projected_high": projected + spread,
+        "projected_income": projected_income,
+        "projected_expense": projected_expense,
+        "income_pattern": pattern,
+        "days_remaining": days_remaining,
+        "method": 'ewma_weekday',
+    }
@@ -1,70 +1,129 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, timedelta
-from decimal import Decimal
+import calendar
+from app.config import settings
 from app.models.user import User
-from app.models.transaction import Transaction
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.forecast_engine import daily_series, forecast_month_end
+from app.services.ai.snapshot import build_financial_snapshot
+from app.services.ai.llm_metrics import record_cache
+from app.services.ai.prompts import PromptTemplate
+from app.services.ai.insight_store import fingerprint_inputs, load_insight, save_insight, is_fresh
+from app.utils.cache import TTLCache
+
+FORECAST_TYPE = "forecast_explanation"
+
+# Explanations depend only on the (rounded) numbers in the prompt, so users share them
+_explanation_cache = TTLCache(maxsize=5000, ttl=6 * 3600)
+
+FORECAST_PROMPT = PromptTemplate("forecast_explain", 1, """
+    You are a financial forecaster.
+
+    Forecast (already computed):
+    - Projected end-of-month savings: ₹{projected}
+    - Likely range: ₹{low} to ₹{high}
+    - Savings goal: ₹{goal}
+    - Days left in month: {days_remaining}/{days_in_month}
+    - Income pattern: {income_pattern}
+
+    {lang_instruction}
+
+    Explain this forecast in 2-3 sentences. Be encouraging if on track, helpful if behind.
+    Keep it under 150 characters.
+    """)
+
+def _round_to(x: float, step: int = 100) -> int:
+    return int(round(x / step) * step)
+
+def explanation_key(forecast: dict, savings_target: float, language: str) -> tuple:
+    """The rounded numbers an explanation depends on"""
+    return (
+        language,
+        _round_to(forecast["projected_savings"]),
+        _round_to(forecast["projected_low"]),
+        _round_to(forecast["projected_high"]),
+        _round_to(savings_target),
+        forecast["days_remaining"],
+        forecast["income_pattern"],
+    )
+
+def explanation_fingerprint(key: tuple) -> str:
+    return fingerprint_inputs({"key": list(key)})
+
+def explain_forecast(forecast: dict, savings_target: float, days_in_month: int, language: str, user_id=None, db: Session = None) -> str:
+    """
+    LLM-written explanation of the computed forecast, cached by its rounded inputs.
+    With user_id/db the last explanation is also kept in ai_insights, shared by all workers.
+    """
+    key = explanation_key(forecast, savings_target, language)
+    _, projected, low, high, goal, days_remaining, income_pattern = key
+
+    cached = _explanation_cache.get(key)
+    fingerprint = explanation_fingerprint(key)
+    if not cached and db is not None:
+        stored = load_insight(db, user_id, FORECAST_TYPE)
+        if is_fresh(stored, fingerprint, settings.INSIGHTS_TTL_MINUTES) and stored.get("data"):
+            cached = stored["data"]
+            _explanation_cache.set(key, cached)
+    record_cache("forecast_explain", bool(cached))
+    if cached:
+        return cached
 
-def forecast_monthly_savings(user: User, db: Session) -> dict:
-    """Forecast end-of-month savings using AI"""
-    
-    today = date.today()
-    month_start = date(today.year, today.month, 1)
-    days_in_month = (date(today.year, today.month + 1, 1) - timedelta(days=1)).day if today.month < 12 else 31
-    days_elapsed = today.day
-    days_remaining = days_in_month - days_elapsed
-    
-    # Get current month data
-    monthly_income = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user.id,
-        Transaction.date >= month_start,
-        Transaction.type == 'INCOME'
-    ).scalar() or Decimal('0')
-    
-    monthly_expense = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user.id,
-        Transaction.date >= month_start,
-        Transaction.type == 'EXPENSE'
-    ).scalar() or Decimal('0')
-    
-    # Simple prediction (can be enhanced with ML)
-    if days_elapsed > 0:
-        daily_expense_avg = float(monthly_expense) / days_elapsed
-        projected_expense = daily_expense_avg * days_in_month
-        projected_savings = float(monthly_income) - projected_expense
-    else:
-        projected_savings = float(monthly_income)
-    
-    savings_target = float(user.savings_target or 5000)
-    
     lang_instruction = {
         'en': 'Respond in English.',
         'hi': 'हिंदी में जवाब दें।',
         'mr': 'मराठीत उत्तर द्या।'
-    }.get(user.language, 'Respond in English.')
+    }.get(language, 'Respond in English.')
     
-    prompt = f"""
-    You are a financial forecaster.
+    prompt = FORECAST_PROMPT.render(
+        projected=projected,
+        low=low,
+        high=high,
+        goal=goal,
+        days_remaining=days_remaining,
+        days_in_month=days_in_month,
+        income_pattern=income_pattern,
+        lang_instruction=lang_instruction,
+    )
     
-    Current situation:
-    - Income so far: ₹{monthly_income}
-    - Expenses so far: ₹{monthly_expense}
-    - Days elapsed: {days_elapsed}/{days_in_month}
-    - Projected end-of-month savings: ₹{projected_savings:.0f}
-    - Savings goal: ₹{savings_target}
+    explanation = generate_with_gemini(prompt, call_site="forecast_explain")
+    if explanation:
+        _explanation_cache.set(key, explanation)
+        if db is not None:
+            save_insight(db, user_id, FORECAST_TYPE, fingerprint, explanation)
+    return explanation
+
+def compute_forecast(user: User, snapshot: dict) -> tuple:
+    """Returns (forecast, savings_target, days_in_month) from a snapshot's daily rows"""
+    # The snapshot's daily rows give both the model history and month-to-date totals
+    today = snapshot["today"]
+    history_start = snapshot["history_start"]
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
     
-    {lang_instruction}
+    rows = [(day, tx_type, total) for day, tx_type, _, total in snapshot["daily_rows"]]
+    income, expense = daily_series(rows, history_start, today)
+    month_offset = (snapshot["month_start"] - history_start).days
+    monthly_income = float(income[month_offset:].sum())
+    monthly_expense = float(expense[month_offset:].sum())
     
-    Explain this forecast in 2-3 sentences. Be encouraging if on track, helpful if behind.
-    Keep it under 150 characters.
-    """
+    forecast = forecast_month_end(income, expense, history_start, today, days_in_month, monthly_income, monthly_expense)
+    savings_target = float(user.savings_target or 5000)
+    return forecast, savings_target, days_in_month
+
+def forecast_monthly_savings(user: User, db: Session) -> dict:
+    """Forecast end-of-month savings from the user's daily series; the LLM only explains it"""
+    forecast, savings_target, days_in_month = compute_forecast(user, build_financial_snapshot(user, db))
+    projected_savings = forecast["projected_savings"]
     
-    explanation = generate_with_gemini(prompt)
+    explanation = explain_forecast(forecast, savings_target, days_in_month, user.language, user.id, db)
     
     return {
         "projected_savings": round(projected_savings, 2),
+        "projected_low": round(forecast["projected_low"], 2),
+        "projected_high": round(forecast["projected_high"], 2),
+        "projected_income": round(forecast["projected_income"], 2),
+        "projected_expense": round(forecast["projected_expense"], 2),
+        "income_pattern": forecast["income_pattern"],
         "savings_target": savings_target,
         "on_track": projected_savings >= savings_target,
         "explanation": explanation or "Keep tracking to get better predictions!"
-    }
\ No newline at end of file
+    }
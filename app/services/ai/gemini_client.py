@@ -1,32 +1,50 @@
-import google.generativeai as genai
-from app.config import settings
-import os
+from app.services.ai.llm_metrics import record_call, record_first_chunk, is_timeout
+from app.services.ai.llm_providers import get_provider
+import logging
+import time
 
-# Configure Gemini
-print(f"🔑 Gemini Key loaded: {'Yes' if settings.GEMINI_API_KEY else 'No'}")
-genai.configure(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
-# ✅ UPDATE: Use models found in your logs
-# Using Gemini 2.0 Flash which is available to you
-flash_model = genai.GenerativeModel('gemini-2.0-flash')
-pro_model = genai.GenerativeModel('gemini-2.0-flash') # Using same model for now to ensure it works
+# Entry point for every LLM call. The backend (Gemini, or the offline stub) comes from LLM_PROVIDER.
 
-def generate_with_gemini(prompt: str, use_pro: bool = False):
-    """Generate content using Gemini"""
+def generate_with_gemini(prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+    """Generate content with the configured LLM. call_site labels the call in LLM metrics."""
+    started = time.perf_counter()
     try:
-        model = pro_model if use_pro else flash_model
-        
         # Generate response
-        response = model.generate_content(prompt)
+        text, usage = get_provider().generate(prompt, use_pro, call_site)
         
         # Check if response is valid
-        if response and response.text:
-            print(f"✅ AI Response generated ({len(response.text)} chars)")
-            return response.text
+        if text:
+            logger.debug("LLM response (%s chars)", len(text), extra={"call_site": call_site})
+            record_call(call_site, time.perf_counter() - started, prompt, text, usage=usage)
+            return text
         else:
-            print("⚠ AI returned empty response")
+            logger.warning("LLM returned an empty response", extra={"call_site": call_site})
+            record_call(call_site, time.perf_counter() - started, prompt, outcome='empty', usage=usage)
             return None
             
     except Exception as e:
-        print(f"❌ Gemini API Error: {e}")
+        logger.error("LLM call failed: %s", e, extra={"call_site": call_site})
+        record_call(call_site, time.perf_counter() - started, prompt, outcome='timeout' if is_timeout(e) else 'error')
         return None
+
+def stream_with_gemini(prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+    """Yield text chunks as the LLM produces them. Closing the generator stops reading the stream."""
+    started = time.perf_counter()
+    received = []
+    outcome = 'ok'
+    try:
+        for text in get_provider().stream(prompt, use_pro, call_site):
+            if not received:
+                record_first_chunk(call_site, time.perf_counter() - started)
+            received.append(text)
+            yield text
+                
+    except Exception as e:
+        logger.error("LLM stream failed: %s", e, extra={"call_site": call_site})
+        outcome = 'timeout' if is_timeout(e) else 'error'
+        return
+    finally:
+        output = "".join(received)
+        record_call(call_site, time.perf_counter() - started, prompt, output, outcome if output or outcome != 'ok' else 'empty')
@@ -0,0 +1,96 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+import hashlib
+import json
+import uuid
+
+from app.models.ai_insight import AIInsight
+
+def fingerprint_inputs(inputs: dict) -> str:
+    """Stable hash of the aggregates a generated insight was built from"""
+    raw = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def load_insight(db: Session, user_id, insight_type: str) -> Optional[dict]:
+    """Latest stored payload for this user/type: {"fingerprint", "data", "generated_at"}"""
+    row = db.query(AIInsight).filter(
+        AIInsight.user_id == user_id,
+        AIInsight.insight_type == insight_type
+    ).order_by(AIInsight.generated_at.desc()).first()
+
+    if not row:
+        return None
+    try:
+        payload = json.loads(row.content)
+    except ValueError:
+        return None
+    return {
+        "fingerprint": payload.get("fingerprint"),
+        "data": payload.get("data"),
+        "generated_at": row.generated_at
+    }
+
+def load_insights(db: Session, user_ids: list, insight_type: str) -> dict:
+    """load_insight for many users in one query: {user_id: stored}"""
+    stored = {}
+    rows = db.query(AIInsight).filter(
+        AIInsight.user_id.in_(user_ids),
+        AIInsight.insight_type == insight_type
+    ).order_by(AIInsight.generated_at)
+    for row in rows:
+        try:
+            payload = json.loads(row.content)
+        except ValueError:
+            continue
+        stored[row.user_id] = {
+            "fingerprint": payload.get("fingerprint"),
+            "data": payload.get("data"),
+            "generated_at": row.generated_at
+        }
+    return stored
+
+def is_fresh(stored: dict, fingerprint: str, ttl_minutes: int) -> bool:
+    if not stored or not stored.get("fingerprint") or stored["fingerprint"] != fingerprint:
+        return False
+    generated_at = stored.get("generated_at")
+    return generated_at is not None and datetime.utcnow() - generated_at < timedelta(minutes=ttl_minutes)
+
+def save_insight(db: Session, user_id, insight_type: str, fingerprint: Optional[str], data) -> None:
+    """Upsert the single stored row for this user/type. A None fingerprint never counts as fresh."""
+    content = json.dumps({"fingerprint": fingerprint, "data": data}, ensure_ascii=False, default=str)
+    row = db.query(AIInsight).filter(
+        AIInsight.user_id == user_id,
+        AIInsight.insight_type == insight_type
+    ).order_by(AIInsight.generated_at.desc()).first()
+
+    if row:
+        row.content = content
+        row.generated_at = datetime.utcnow()
+    else:
+        db.add(AIInsight(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            insight_type=insight_type,
+            content=content,
+            generated_at=datetime.utcnow()
+        ))
+    db.commit()
+
+def save_insights(db: Session, insight_type: str, entries: list) -> None:
+    """save_insight for many users at once; entries are (user_id, fingerprint, data)"""
+    if not entries:
+        return
+    now = datetime.utcnow()
+    db.query(AIInsight).filter(
+        AIInsight.user_id.in_([user_id for user_id, _, _ in entries]),
+        AIInsight.insight_type == insight_type
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(AIInsight, [{
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "insight_type": insight_type,
+        "content": json.dumps({"fingerprint": fingerprint, "data": data}, ensure_ascii=False, default=str),
+        "generated_at": now
+    } for user_id, fingerprint, data in entries])
+    db.commit()
@@ -1,76 +1,90 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date
+from fastapi import BackgroundTasks
 from decimal import Decimal
 import json
+import logging
 import re
+import threading
+from app.config import settings
+from app.database.session import SessionLocal
 from app.models.user import User
-from app.models.transaction import Transaction
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.llm_metrics import record_cache, record_parse_failure
+from app.services.ai.insight_store import fingerprint_inputs, load_insight, save_insight, is_fresh
+from app.services.ai.content_pool import segment_key, spending_band, pick_from_pool
+from app.services.ai.snapshot import build_financial_snapshot
+from app.services.ai.prompts import PromptTemplate
+from app.services.purge import load_user
 
-def generate_insights(user: User, db: Session) -> dict:
-    """
-    Generate SMART insights + Daily Tip for the user.
-    Returns: { "insights": [...], "tip": "..." }
-    """
+logger = logging.getLogger(__name__)
 
-    # helpers
-    def fmt_money(x):
-        try:
-            return f"₹{int(Decimal(x)):,}"
-        except Exception:
-            return f"₹{x}"
+INSIGHT_TYPE = "insights"
+DEFAULT_TIP = "Save small amounts daily to build a big safety net."
 
-    def safe_decimal(v):
-        return v if isinstance(v, Decimal) else Decimal(str(v or 0))
+INSIGHTS_PROMPT = PromptTemplate("insights", 1, """
+    You are Spennies, a financial coach for gig workers in India.
 
-    # month start
-    month_start = date(date.today().year, date.today().month, 1)
+    CRITICAL INSTRUCTIONS:
+    1. Language: {lang_instruction}
+    2. Tone: {tone_instruction}
+    3. Job Context: {job_instruction} (Tailor advice to this job).
+    4. Mix: Include 1 Warning, 1 Success, 1 Info/Observation.
 
-    # totals
-    monthly_income = safe_decimal(
-        db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-            Transaction.user_id == user.id,
-            Transaction.date >= month_start,
-            Transaction.type == 'INCOME'
-        ).scalar() or 0
-    )
+    INPUT DATA:
+    - Income: {income}
+    - Expenses: {expense}
+    - Savings: {savings}
+    - Goal: {goal}
 
-    monthly_expense = safe_decimal(
-        db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-            Transaction.user_id == user.id,
-            Transaction.date >= month_start,
-            Transaction.type == 'EXPENSE'
-        ).scalar() or 0
-    )
+    Category Breakdown:
+    {categories}
 
-    # category breakdown
-    category_rows = db.query(
-        Transaction.category,
-        func.coalesce(func.sum(Transaction.amount), 0)
-    ).filter(
-        Transaction.user_id == user.id,
-        Transaction.date >= month_start,
-        Transaction.type == 'EXPENSE'
-    ).group_by(Transaction.category).all()
+    Top Expenses:
+    {top_expenses}
+
+    REQUIRED OUTPUT FORMAT (JSON):
+    {{
+      "insights": [
+        {{ "type": "warning", "message": "Start with a warning if applicable..." }},
+        {{ "type": "success", "message": "Highlight a win..." }},
+        {{ "type": "info", "message": "Observation about a pattern..." }}
+      ]
+    }}
+    """, sections=("top_expenses", "categories"))
 
+# helpers
+def fmt_money(x):
+    try:
+        return f"₹{int(Decimal(x)):,}"
+    except Exception:
+        return f"₹{x}"
+
+def safe_decimal(v):
+    return v if isinstance(v, Decimal) else Decimal(str(v or 0))
+
+def collect_insight_inputs(user: User, db: Session) -> dict:
+    """Aggregates the insight prompt is built from. JSON-serializable, doubles as the cache fingerprint input."""
+    return insight_inputs_from_snapshot(user, build_financial_snapshot(user, db))
+
+def insight_inputs_from_snapshot(user: User, snapshot: dict) -> dict:
+    month_start = snapshot["month_start"]
+
+    # totals
+    monthly_income = safe_decimal(snapshot["monthly_income"])
+    monthly_expense = safe_decimal(snapshot["monthly_expense"])
+
+    # category breakdown
     categories_text = ""
-    for cat, amt in category_rows:
+    for cat, amt in snapshot["categories"]:
         amt_dec = safe_decimal(amt)
         categories_text += f"- {cat}: {fmt_money(amt_dec)}\n"
     if not categories_text:
         categories_text = "No category expenses recorded this month."
 
     # recent high-value expense
-    high_value_txs = db.query(Transaction).filter(
-        Transaction.user_id == user.id,
-        Transaction.date >= month_start,
-        Transaction.type == 'EXPENSE'
-    ).order_by(Transaction.amount.desc()).limit(3).all()
-
     high_value_text = ""
-    for t in high_value_txs:
-        high_value_text += f"- {fmt_money(t.amount)} on {t.description or t.category}\n"
+    for t in snapshot["top_expenses"]:
+        high_value_text += f"- {fmt_money(t['amount'])} on {t['description'] or t['category']}\n"
     if not high_value_text:
         high_value_text = "No high-value expenses recorded this month."
 
@@ -78,18 +92,38 @@ def generate_insights(user: User, db: Session) -> dict:
     savings_target = safe_decimal(getattr(user, "savings_target", 0) or 0)
     if savings_target <= 0 and monthly_income > 0:
         savings_target = (monthly_income * Decimal('0.2')).quantize(Decimal('1'))
-    
+
+    return {
+        "month": month_start.isoformat(),
+        "monthly_income": str(monthly_income),
+        "monthly_expense": str(monthly_expense),
+        "savings_target": str(savings_target),
+        "categories_text": categories_text,
+        "high_value_text": high_value_text,
+        "language": getattr(user, 'language', 'en'),
+        "tone": getattr(user, 'ai_tone', 'friendly'),
+        "job_type": getattr(user, 'job_type', 'other'),
+    }
+
+def build_insights(inputs: dict):
+    """Returns (result, from_llm). Fallback results are not worth caching as fresh."""
+    monthly_income = Decimal(inputs["monthly_income"])
+    monthly_expense = Decimal(inputs["monthly_expense"])
+    savings_target = Decimal(inputs["savings_target"])
+    categories_text = inputs["categories_text"]
+    high_value_text = inputs["high_value_text"]
+
     # CHECK FOR NEW USER (Force English as requested)
     if monthly_income == 0 and monthly_expense == 0:
         return {
             "insights": [{"type": "info", "message": "Welcome! Add your first income or expense to unlock personalized AI insights."}],
             "tip": "Start tracking daily small expenses."
-        }
+        }, True
 
     # SETTINGS
-    user_lang = getattr(user, 'language', 'en')
-    user_tone = getattr(user, 'ai_tone', 'friendly')
-    user_job = getattr(user, 'job_type', 'other')
+    user_lang = inputs["language"]
+    user_tone = inputs["tone"]
+    user_job = inputs["job_type"]
     
     # You requested strict English for insights in this file specifically
     lang_instruction = "OUTPUT LANGUAGE: ENGLISH."
@@ -111,44 +145,24 @@ def generate_insights(user: User, db: Session) -> dict:
     }.get(user_job, "User has a general job.")
 
     # Build Prompt
-    prompt = f"""
-    You are Spennies, a financial coach for gig workers in India.
-    
-    **CRITICAL INSTRUCTIONS:**
-    1. **Language:** {lang_instruction}
-    2. **Tone:** {tone_instruction}
-    3. **Job Context:** {job_instruction} (Tailor advice to this job).
-    4. **Mix:** Include 1 Warning, 1 Success, 1 Info/Observation.
-
-    **INPUT DATA:**
-    - Income: {fmt_money(monthly_income)}
-    - Expenses: {fmt_money(monthly_expense)}
-    - Savings: {fmt_money(monthly_income - monthly_expense)}
-    - Goal: {fmt_money(savings_target)}
-
-    **Category Breakdown:**
-    {categories_text}
-
-    **Top Expenses:**
-    {high_value_text}
-
-    **REQUIRED OUTPUT FORMAT (JSON):**
-    {{
-        "insights": [
-            {{ "type": "warning", "message": "Start with a warning if applicable..." }},
-            {{ "type": "success", "message": "Highlight a win..." }},
-            {{ "type": "info", "message": "Observation about a pattern..." }}
-        ],
-        "tip": "A short, job-relevant tip (max 15 words)."
-    }}
-    """
+    prompt = INSIGHTS_PROMPT.render(
+        lang_instruction=lang_instruction,
+        tone_instruction=tone_instruction,
+        job_instruction=job_instruction,
+        income=fmt_money(monthly_income),
+        expense=fmt_money(monthly_expense),
+        savings=fmt_money(monthly_income - monthly_expense),
+        goal=fmt_money(savings_target),
+        categories=categories_text,
+        top_expenses=high_value_text,
+    )
 
     # Call LLM
     raw = ""
     try:
-        raw = generate_with_gemini(prompt) 
+        raw = generate_with_gemini(prompt, call_site="insights") 
     except Exception as e:
-        print(f"Insight Gen Error: {e}")
+        logger.error("Insight generation failed: %s", e)
         raw = ""
 
     # Parse Output
@@ -158,11 +172,14 @@ def generate_insights(user: User, db: Session) -> dict:
             match = re.search(r'\{.*\}', raw, re.DOTALL)
             if match:
                 parsed = json.loads(match.group())
-                if "insights" in parsed and "tip" in parsed:
+                if "insights" in parsed:
                     parsed["insights"] = parsed["insights"][:3]
+                    parsed.setdefault("tip", DEFAULT_TIP)
                     result = parsed
         except Exception:
             result = None
+        if result is None:
+            record_parse_failure("insights")
 
     # Fallback
     if not result:
@@ -175,7 +192,73 @@ def generate_insights(user: User, db: Session) -> dict:
                 {"type": "info", "message": "Track expenses daily."},
                 {"type": "success", "message": "Great start!"}
             ],
-            "tip": "Save small amounts daily to build a big safety net."
+            "tip": DEFAULT_TIP
         }
+        return result, False
+
+    return result, True
+
+def generate_insights(user: User, db: Session) -> dict:
+    """
+    Generate SMART insights + Daily Tip for the user.
+    Returns: { "insights": [...], "tip": "..." }
+    """
+    inputs = collect_insight_inputs(user, db)
+    result, _ = build_insights(inputs)
+    return with_pool_tip(result, user, db, inputs)
+
+def with_pool_tip(result: dict, user: User, db: Session, inputs: dict) -> dict:
+    """Daily tip comes from the segment pool (English, like the insights themselves)"""
+    segment = segment_key(inputs["job_type"], 'en', spending_band(float(inputs["monthly_expense"])))
+    pooled = pick_from_pool(db, 'tip', segment, user.id)
+    if not pooled or not isinstance(result, dict):
+        return result
+    return {**result, "tip": pooled["tip"]}
+
+# --- Persisted insights (ai_insights table) ---
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def refresh_insights(user_id) -> None:
+    """Regenerate and store insights for one user, in its own session (background task)"""
+    with _refreshing_lock:
+        if user_id in _refreshing:
+            return
+        _refreshing.add(user_id)
+
+    db = SessionLocal()
+    try:
+        user = load_user(db, user_id)
+        if not user:
+            return
+        inputs = collect_insight_inputs(user, db)
+        result, from_llm = build_insights(inputs)
+        save_insight(db, user_id, INSIGHT_TYPE, fingerprint_inputs(inputs) if from_llm else None, result)
+    except Exception as e:
+        logger.error("Insight refresh failed: %s", e)
+    finally:
+        db.close()
+        with _refreshing_lock:
+            _refreshing.discard(user_id)
+
+def get_cached_insights(user: User, db: Session, background_tasks: BackgroundTasks = None) -> dict:
+    """
+    Serve stored insights while the user's numbers are unchanged and the TTL holds.
+    Stale copies are returned immediately and regenerated in the background; without
+    background_tasks (job workers) stale insights are regenerated inline and returned.
+    """
+    inputs = collect_insight_inputs(user, db)
+    fingerprint = fingerprint_inputs(inputs)
+    stored = load_insight(db, user.id, INSIGHT_TYPE)
+
+    fresh = is_fresh(stored, fingerprint, settings.INSIGHTS_TTL_MINUTES)
+    record_cache("insights", bool(stored and stored.get("data")) and (fresh or background_tasks is not None))
+    if stored and stored.get("data") and (fresh or background_tasks is not None):
+        if not fresh:
+            background_tasks.add_task(refresh_insights, user.id)
+        return with_pool_tip(stored["data"], user, db, inputs)
 
-    return result
\ No newline at end of file
+    result, from_llm = build_insights(inputs)
+    save_insight(db, user.id, INSIGHT_TYPE, fingerprint if from_llm else None, result)
+    return with_pool_tip(result, user, db, inputs)
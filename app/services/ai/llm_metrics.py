@@ -0,0 +1,80 @@
+from app.utils.metrics import Counter, Histogram
+from app.services.ai.prompts import estimate_tokens
+
+# Per call site: which feature drives LLM latency, volume and failures
+
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+llm_calls = Counter("spennies_llm_calls_total", "LLM calls by call site and outcome (ok, empty, error, timeout)", ("call_site", "outcome"))
+llm_latency = Histogram("spennies_llm_latency_seconds", "LLM call latency", ("call_site",))
+llm_first_chunk = Histogram("spennies_llm_first_chunk_seconds", "Time to first streamed chunk", ("call_site",))
+llm_prompt_tokens = Histogram("spennies_llm_prompt_tokens", "Prompt size in tokens (estimated when the API does not report usage)", ("call_site",), TOKEN_BUCKETS)
+llm_response_tokens = Histogram("spennies_llm_response_tokens", "Response size in tokens (estimated when the API does not report usage)", ("call_site",), TOKEN_BUCKETS)
+llm_prompt_chars = Counter("spennies_llm_prompt_chars_total", "Prompt characters sent", ("call_site",))
+llm_response_chars = Counter("spennies_llm_response_chars_total", "Response characters received", ("call_site",))
+llm_parse_failures = Counter("spennies_llm_parse_failures_total", "LLM responses that could not be parsed as the expected JSON", ("call_site",))
+llm_cache_lookups = Counter("spennies_llm_cache_lookups_total", "Requests served without an LLM call (hit) or needing one (miss)", ("call_site", "result"))
+
+def is_timeout(error: Exception) -> bool:
+    name = type(error).__name__
+    return isinstance(error, TimeoutError) or 'DeadlineExceeded' in name or 'Timeout' in name
+
+def record_call(call_site: str, seconds: float, prompt: str, response: str = None, outcome: str = 'ok', usage=None):
+    """usage: Gemini usage_metadata when available (prompt_token_count, candidates_token_count)"""
+    llm_calls.inc(call_site=call_site, outcome=outcome)
+    llm_latency.observe(seconds, call_site=call_site)
+    llm_prompt_chars.inc(len(prompt or ''), call_site=call_site)
+    llm_prompt_tokens.observe(getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt), call_site=call_site)
+    if response:
+        llm_response_chars.inc(len(response), call_site=call_site)
+        llm_response_tokens.observe(getattr(usage, 'candidates_token_count', None) or estimate_tokens(response), call_site=call_site)
+
+def record_first_chunk(call_site: str, seconds: float):
+    llm_first_chunk.observe(seconds, call_site=call_site)
+
+def record_parse_failure(call_site: str):
+    llm_parse_failures.inc(call_site=call_site)
+
+def record_cache(call_site: str, hit: bool):
+    llm_cache_lookups.inc(call_site=call_site, result='hit' if hit else 'miss')
+
+def _bound(value):
+    return None if value is None or value == float('inf') else value
+
+def llm_summary() -> dict:
+    """Per call site rollup for the debug endpoint"""
+    sites = {}
+
+    def site(name):
+        return sites.setdefault(name, {"calls": 0, "outcomes": {}, "parse_failures": 0, "cache_hits": 0, "cache_misses": 0})
+
+    for (call_site, outcome), count in llm_calls.values().items():
+        entry = site(call_site)
+        entry["calls"] += count
+        entry["outcomes"][outcome] = count
+    for (call_site,), count in llm_parse_failures.values().items():
+        site(call_site)["parse_failures"] = count
+    for (call_site, result), count in llm_cache_lookups.values().items():
+        site(call_site)["cache_hits" if result == 'hit' else "cache_misses"] = count
+
+    latency = llm_latency.values()
+    prompt_tokens = llm_prompt_tokens.values()
+    response_tokens = llm_response_tokens.values()
+    for call_site, entry in sites.items():
+        key = (call_site,)
+        if key in latency:
+            _, total, count = latency[key]
+            entry["latency_avg_s"] = round(total / count, 3)
+            entry["latency_p50_s"] = _bound(llm_latency.quantile(0.5, call_site=call_site))
+            entry["latency_p95_s"] = _bound(llm_latency.quantile(0.95, call_site=call_site))
+            entry["latency_total_s"] = round(total, 3)
+        if key in prompt_tokens:
+            entry["prompt_tokens_avg"] = round(prompt_tokens[key][1] / prompt_tokens[key][2])
+        if key in response_tokens:
+            entry["response_tokens_avg"] = round(response_tokens[key][1] / response_tokens[key][2])
+        lookups = entry["cache_hits"] + entry["cache_misses"]
+        entry["cache_hit_rate"] = round(entry["cache_hits"] / lookups, 3) if lookups else None
+        failed = entry["calls"] - entry["outcomes"].get('ok', 0)
+        entry["failure_rate"] = round((failed + entry["parse_failures"]) / entry["calls"], 3) if entry["calls"] else None
+
+    return dict(sorted(sites.items(), key=lambda item: -item[1].get("latency_total_s", 0)))
@@ -0,0 +1,74 @@
+import logging
+import threading
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A provider exposes:
+#   generate(prompt, use_pro, call_site) -> (text or None, usage or None)
+#   stream(prompt, use_pro, call_site)   -> iterator of text chunks
+# Errors are raised; gemini_client turns them into None and records metrics.
+
+class GeminiProvider:
+    """Google Gemini. The SDK is imported and configured on first use, not at app import."""
+
+    def __init__(self):
+        self._models = None
+        self._lock = threading.Lock()
+
+    def _get_models(self):
+        if self._models is None:
+            with self._lock:
+                if self._models is None:
+                    import google.generativeai as genai
+                    logger.info("Gemini key loaded: %s", 'yes' if settings.GEMINI_API_KEY else 'no')
+                    genai.configure(api_key=settings.GEMINI_API_KEY)
+                    # Using Gemini 2.0 Flash for both until a pro model is needed
+                    flash_model = genai.GenerativeModel('gemini-2.0-flash')
+                    pro_model = genai.GenerativeModel('gemini-2.0-flash')
+                    self._models = (flash_model, pro_model)
+        return self._models
+
+    def generate(self, prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+        flash_model, pro_model = self._get_models()
+        response = (pro_model if use_pro else flash_model).generate_content(prompt)
+        text = response.text if response else None
+        return text, getattr(response, 'usage_metadata', None)
+
+    def stream(self, prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+        flash_model, pro_model = self._get_models()
+        response = (pro_model if use_pro else flash_model).generate_content(prompt, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except Exception:
+                # Chunks without text parts (e.g. safety metadata)
+                continue
+            if text:
+                yield text
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    """Provider selected by LLM_PROVIDER (gemini | stub), created once per process"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                name = settings.LLM_PROVIDER.lower()
+                if name == 'stub':
+                    from app.services.ai.llm_stub import StubProvider
+                    _provider = StubProvider()
+                elif name == 'gemini':
+                    _provider = GeminiProvider()
+                else:
+                    raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER}")
+                logger.info("LLM provider: %s", name)
+    return _provider
+
+def set_provider(provider):
+    """Swap the provider (benchmarks, scripts). None resets to the configured one."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,101 @@
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import date
+from app.config import settings
+
+# Offline stand-in for the LLM (LLM_PROVIDER=stub): schema-valid answers per call site,
+# with configurable latency and injected errors/timeouts, so AI endpoints can be load-tested.
+#
+# LLM_STUB_FIXTURES may point to a JSON file {call_site: "response" | ["response", ...]};
+# lists are served round-robin and override the built-in answers.
+
+def _numbered_items(prompt: str) -> int:
+    return len(re.findall(r'^\s*\d+\. "', prompt, re.MULTILINE))
+
+def _segments(prompt: str) -> list:
+    return re.findall(r'^\s*- "([a-z]+:[a-z]+:[a-z]+)":', prompt, re.MULTILINE)
+
+def _canned(call_site: str, prompt: str) -> str:
+    if call_site == 'categorize':
+        return json.dumps({"category": "Shopping", "confidence": 0.8})
+    if call_site == 'categorize_batch':
+        return json.dumps({"results": [{"i": i, "category": "Shopping", "confidence": 0.8} for i in range(_numbered_items(prompt))]})
+    if call_site == 'sms_parse':
+        return json.dumps({"amount": 250.0, "merchant": "Stub Store", "type": "debit", "category": "Shopping",
+                           "date": date.today().isoformat(), "confidence": 0.8})
+    if call_site == 'chat':
+        return json.dumps({"action": "chat", "reply": "You are doing fine this month. Keep tracking your daily spends!"})
+    if call_site == 'chat_stream':
+        return '{"action": "chat"}\nYou are doing fine this month. Keep tracking your daily spends!'
+    if call_site == 'nl_transaction':
+        return json.dumps({"action": "chat"})
+    if call_site == 'insights':
+        return json.dumps({"insights": [
+            {"type": "warning", "message": "Food spending is higher than last week."},
+            {"type": "success", "message": "You logged expenses every day this week."},
+            {"type": "info", "message": "Most of your spending happens on weekends."},
+        ]})
+    if call_site == 'challenge':
+        return json.dumps({"title": "Carry a water bottle", "description": "Skip buying bottled water today.", "reward": 20})
+    if call_site == 'content_pool':
+        match = re.search(r'write (\d+) challenges', prompt)
+        count = int(match.group(1)) if match else 3
+        return json.dumps({segment: {
+            "challenges": [{"title": f"Challenge {i + 1}", "description": "Skip one small purchase today.", "reward": 20 + 10 * i} for i in range(count)],
+            "tips": [f"Tip {i + 1}: note every expense the same day." for i in range(count)],
+        } for segment in _segments(prompt)}, ensure_ascii=False)
+    if call_site == 'forecast_explain':
+        return "You are on track to save this month. Keep daily spending steady."
+    return "OK"
+
+class StubProvider:
+    def __init__(self):
+        self._random = random.Random(settings.LLM_STUB_SEED)
+        self._lock = threading.Lock()
+        self._fixtures = {}
+        if settings.LLM_STUB_FIXTURES:
+            with open(settings.LLM_STUB_FIXTURES, encoding='utf-8') as f:
+                for call_site, answers in json.load(f).items():
+                    self._fixtures[call_site] = itertools.cycle(answers if isinstance(answers, list) else [answers])
+
+    def _roll(self):
+        """(latency seconds, injected failure or None) for one call"""
+        with self._lock:
+            latency = max(0.0, self._random.gauss(settings.LLM_STUB_LATENCY_MS, settings.LLM_STUB_JITTER_MS)) / 1000
+            roll = self._random.random()
+        if roll < settings.LLM_STUB_TIMEOUT_RATE:
+            return latency, TimeoutError("Stub LLM timeout")
+        if roll < settings.LLM_STUB_TIMEOUT_RATE + settings.LLM_STUB_ERROR_RATE:
+            return latency, RuntimeError("Stub LLM error")
+        return latency, None
+
+    def _answer(self, call_site: str, prompt: str) -> str:
+        fixture = self._fixtures.get(call_site)
+        if fixture is not None:
+            with self._lock:
+                return next(fixture)
+        return _canned(call_site, prompt)
+
+    def generate(self, prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+        latency, failure = self._roll()
+        time.sleep(latency)
+        if failure:
+            raise failure
+        return self._answer(call_site, prompt), None
+
+    def stream(self, prompt: str, use_pro: bool = False, call_site: str = "unknown"):
+        latency, failure = self._roll()
+        # First chunk after ~40% of the latency, the rest spread over the remainder
+        time.sleep(latency * 0.4)
+        if failure:
+            raise failure
+        text = self._answer(call_site, prompt)
+        chunks = re.findall(r'\S*\s*', text)[:-1] or [text]
+        step = latency * 0.6 / max(len(chunks), 1)
+        for i in range(0, len(chunks), 4):
+            yield "".join(chunks[i:i + 4])
+            time.sleep(step * 4)
@@ -0,0 +1,93 @@
+from string import Formatter
+import logging
+import textwrap
+from app.config import settings
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prompt templates are dedented and parsed once at import. Bump `version` whenever the wording
+# changes so prompt sizes and quality can be compared per version in metrics.
+#
+# Context sections (category lines, recent transactions, loans...) are the only unbounded part of
+# a prompt. When a rendered prompt exceeds the token budget, sections are trimmed line by line in
+# the order given (lowest priority first): first down to MIN_SECTION_LINES each, then further.
+# A "+N more" marker replaces what was dropped.
+
+prompt_tokens = Histogram("spennies_prompt_tokens", "Estimated prompt tokens after trimming", ("template", "version"),
+                          (100, 250, 500, 750, 1000, 1500, 2000, 4000, 8000))
+prompts_trimmed = Counter("spennies_prompts_trimmed_total", "Prompts trimmed to fit the token budget", ("template", "version"))
+
+EMPTY_SECTION = "N/A"
+MIN_SECTION_LINES = 3  # every section keeps this many lines before any is cut further
+MARKER_TOKENS = 8  # room reserved per section for its "+N more" marker
+
+def _char_counts(text: str) -> tuple:
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return len(text) - non_ascii, non_ascii
+
+def _tokens(ascii_chars: int, non_ascii: int) -> int:
+    return (ascii_chars + 3) // 4 + (non_ascii + 1) // 2
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 ASCII chars per token, non-Latin scripts (Devanagari, emoji) ~2 chars per token"""
+    return _tokens(*_char_counts(text)) if text else 0
+
+def _lines(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [line for line in value.splitlines() if line.strip()]
+    return [str(line) for line in value]
+
+class PromptTemplate:
+    def __init__(self, name: str, version: int, text: str, sections: tuple = ()):
+        """sections: trimmable fields, lowest priority (trimmed first) to highest"""
+        self.name = name
+        self.version = version
+        self.text = textwrap.dedent(text).strip() + "\n"
+        self.fields = {field for _, field, _, _ in Formatter().parse(self.text) if field}
+        self.sections = tuple(sections)
+        missing = set(self.sections) - self.fields
+        if missing:
+            raise ValueError(f"Prompt {name}: sections not in template: {missing}")
+
+    def render(self, budget: int = None, **values) -> str:
+        budget = budget or settings.PROMPT_TOKEN_BUDGET
+        sections = {field: _lines(values.get(field)) for field in self.sections}
+
+        def fill():
+            filled = dict(values)
+            for field, lines in sections.items():
+                filled[field] = "\n".join(lines) or EMPTY_SECTION
+            return self.text.format_map(filled)
+
+        prompt = fill()
+        ascii_chars, non_ascii = _char_counts(prompt)
+        tokens = original = _tokens(ascii_chars, non_ascii)
+
+        if tokens > budget:
+            # Track exact character counts so the running estimate matches the final prompt
+            target = budget - MARKER_TOKENS * len(self.sections)
+            dropped = {field: 0 for field in self.sections}
+            for floor in (MIN_SECTION_LINES, 0):
+                for field in self.sections:
+                    lines = sections[field]
+                    while len(lines) > floor and _tokens(ascii_chars, non_ascii) > target:
+                        line_ascii, line_non_ascii = _char_counts(lines.pop())
+                        ascii_chars -= line_ascii + 1
+                        non_ascii -= line_non_ascii
+                        dropped[field] += 1
+            for field, count in dropped.items():
+                if count:
+                    sections[field].append(f"(+{count} more not shown)")
+            prompt = fill()
+            tokens = estimate_tokens(prompt)
+            prompts_trimmed.inc(template=self.name, version=self.version)
+
+        prompt_tokens.observe(tokens, template=self.name, version=self.version)
+        if original != tokens:
+            logger.info("Prompt %s@v%s trimmed: ~%s -> ~%s tokens (budget %s)", self.name, self.version, original, tokens, budget)
+        else:
+            logger.debug("Prompt %s@v%s: ~%s tokens", self.name, self.version, tokens)
+        return prompt
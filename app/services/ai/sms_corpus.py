@@ -0,0 +1,72 @@
+# Regression corpus for app.services.ai.sms_templates: (sender, sms_text, expected fields).
+# Expected None means the message must NOT be parsed locally (falls back to the LLM or is ignored).
+# Account numbers, refs and VPAs are synthetic.
+
+SMS_CORPUS = [
+    # HDFC
+    ("VM-HDFCBK",
+     "Rs.500.00 debited from a/c **1234 on 24-11-23 to VPA swiggy@icici (UPI Ref No 333333333). Not you? Call 18002586161",
+     {"amount": 500.0, "type": "debit", "merchant": "swiggy", "vpa": "swiggy@icici", "date": "2023-11-24", "category": "Food"}),
+    ("AD-HDFCBK",
+     "Money Received - INR 1,000.00 in your A/C XX1234 on 02-12-23 from VPA ramesh@oksbi (UPI Ref No 334455667788)",
+     {"amount": 1000.0, "type": "credit", "merchant": "ramesh", "date": "2023-12-02"}),
+    ("VM-HDFCBK",
+     "Sent Rs.250.00\nFrom HDFC Bank A/C *1234\nTo ZOMATO\nOn 24/11/23\nRef 334455667788\nNot You?\nCall 18002586161/SMS BLOCK UPI to 7308080808",
+     {"amount": 250.0, "type": "debit", "merchant": "ZOMATO", "date": "2023-11-24", "category": "Food"}),
+
+    # Kotak
+    ("BP-KOTAKB",
+     "Sent Rs.120.00 from Kotak Bank AC X1234 to uber.india@axisbank on 05-01-24.UPI Ref 401234567890. Not you, https://kotak.com/KBANKT/Fraud",
+     {"amount": 120.0, "type": "debit", "merchant": "uber.india", "date": "2024-01-05", "category": "Transport"}),
+    ("BP-KOTAKB",
+     "Received Rs.5,000.00 in your Kotak Bank AC X1234 from ramesh.k@okaxis on 05-01-24.UPI Ref:401234567891.",
+     {"amount": 5000.0, "type": "credit", "merchant": "ramesh.k", "date": "2024-01-05"}),
+
+    # SBI
+    ("VK-SBIUPI",
+     "Dear UPI user A/C X1234 debited by 250.0 on date 24Nov23 trf to SWIGGY Refno 334455667788. If not u? call 1800111109. -SBI",
+     {"amount": 250.0, "type": "debit", "merchant": "SWIGGY", "date": "2023-11-24", "category": "Food"}),
+    ("VK-SBIUPI",
+     "Dear SBI UPI User, ur A/cX1234 credited by Rs500 on 24Nov23 by  (Ref no 334455667788)",
+     {"amount": 500.0, "type": "credit", "merchant": "Unknown", "date": "2023-11-24"}),
+    ("JD-SBICRD",
+     "Rs 1,299.00 spent on your SBI Credit Card ending 1234 at AMAZON on 24/11/23. Trxn. not done by you? Report at https://sbicard.com/Dispute",
+     {"amount": 1299.0, "type": "debit", "merchant": "AMAZON", "date": "2023-11-24", "category": "Shopping"}),
+
+    # ICICI
+    ("AX-ICICIB",
+     "ICICI Bank Acct XX123 debited for Rs 250.00 on 24-Nov-23; ZOMATO credited. UPI:334455667788. Call 18002662 for dispute. SMS BLOCK 123 to 9215676766",
+     {"amount": 250.0, "type": "debit", "merchant": "ZOMATO", "date": "2023-11-24", "category": "Food"}),
+    ("AX-ICICIB",
+     "Dear Customer, Acct XX123 is credited with Rs 1,000.00 on 24-Nov-23 from RAMESH KUMAR. UPI:334455667788-ICICI Bank.",
+     {"amount": 1000.0, "type": "credit", "merchant": "RAMESH KUMAR", "date": "2023-11-24"}),
+    ("AX-ICICIB",
+     "INR 1,299.00 spent on ICICI Bank Card XX1234 on 24-Nov-23 at APOLLO PHARMACY. Avl Lmt: INR 48,701.00. To dispute, call 18002662.",
+     {"amount": 1299.0, "type": "debit", "merchant": "APOLLO PHARMACY", "date": "2023-11-24", "category": "Healthcare"}),
+
+    # Axis
+    ("VM-AXISBK",
+     "INR 250.00 debited\nA/c no. XX1234\n24-11-23, 10:15:30\nUPI/P2M/334455667788/RAPIDO\nNot you? SMS BLOCKUPI Cust ID to 919951860002\nAxis Bank",
+     {"amount": 250.0, "type": "debit", "merchant": "RAPIDO", "date": "2023-11-24", "category": "Transport"}),
+    ("VM-AXISBK",
+     "INR 750.00 credited\nA/c no. XX1234\n24-11-23, 18:01:10\nUPI/P2A/334455667789/SURESH PATIL\nNot you? SMS BLOCKUPI Cust ID to 919951860002\nAxis Bank",
+     {"amount": 750.0, "type": "credit", "merchant": "SURESH PATIL", "date": "2023-11-24"}),
+
+    # PNB / BOI style
+    ("VM-PNBSMS",
+     "Your a/c no. XXXXXXXX1234 is debited for Rs.350.00 on 24-11-2023 and credited to a/c no. XXXXXXXX9876 (UPI Ref no 334455667788).",
+     {"amount": 350.0, "type": "debit", "merchant": "XXXXXXXX9876", "date": "2023-11-24"}),
+    ("VM-BOIIND",
+     "Your a/c XX1234 is credited by Rs.800.00 on 24-11-2023 by a/c linked to VPA ramesh@ybl (UPI Ref no 334455667788).",
+     {"amount": 800.0, "type": "credit", "merchant": "ramesh", "date": "2023-11-24"}),
+
+    # Wallet (no date -> today)
+    ("VM-PAYTMB",
+     "Paid Rs.99 to Netflix from Paytm Balance. Updated Balance: Paytm Wallet- Rs 101. More Details: https://paytm.me/x",
+     {"amount": 99.0, "type": "debit", "merchant": "Netflix", "category": "Entertainment"}),
+
+    # Not transactions / unknown formats
+    ("VM-HDFCBK", "123456 is your OTP for login. Do not share it with anyone.", None),
+    ("VM-AIRTEL", "Get 2GB extra data on recharge of Rs 299. Offer valid till 30-11-23.", None),
+    ("VM-NEWBNK", "Txn alert: 450.00 moved out via IMPS, beneficiary CHAI POINT, ref 998877", None),
+]
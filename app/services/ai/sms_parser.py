@@ -1,8 +1,23 @@
 from app.services.ai.gemini_client import generate_with_gemini
+from app.services.ai.sms_templates import match_sms_template, looks_transactional
+from app.services.ai.llm_metrics import record_cache, record_parse_failure
 import json
+import logging
 import re
 
-def parse_sms_transaction(sms_text: str) -> dict:
+logger = logging.getLogger(__name__)
+
+def parse_sms_transaction(sms_text: str, sender: str = None) -> dict:
+    # Known bank/UPI formats are parsed locally, the LLM only sees unrecognized ones
+    local_result = match_sms_template(sms_text, sender)
+    if local_result:
+        record_cache("sms_parse", True)
+        return local_result
+    if not looks_transactional(sms_text):
+        record_cache("sms_parse", True)
+        return {}
+    record_cache("sms_parse", False)
+
     try:
         from datetime import date
         today_str = date.today().strftime('%Y-%m-%d')
@@ -31,7 +46,7 @@ def parse_sms_transaction(sms_text: str) -> dict:
         }}
         """
         
-        response = generate_with_gemini(prompt)
+        response = generate_with_gemini(prompt, call_site="sms_parse")
         
         if not response:
             return {}
@@ -44,7 +59,9 @@ def parse_sms_transaction(sms_text: str) -> dict:
         if match:
             return json.loads(match.group())
             
+        record_parse_failure("sms_parse")
         return {}
     except Exception as e:
-        print(f"SMS Parse Error: {e}")
+        logger.warning("SMS parse failed: %s", e)
+        record_parse_failure("sms_parse")
         return {}
\ No newline at end of file
@@ -0,0 +1,175 @@
+import re
+from datetime import date, datetime
+from typing import Optional
+
+from app.services.ai.categorizer import categorize_locally
+from app.utils.cache import TTLCache
+
+# Building blocks shared by the bank templates
+_AMOUNT = r'(?:rs\.?|inr|₹)\s*(?P<amount>\d[\d,]*(?:\.\d{1,2})?)'
+_AMOUNT_OPT = r'(?:(?:rs\.?|inr|₹)\s*)?(?P<amount>\d[\d,]*(?:\.\d{1,2})?)'
+_DATE = (
+    r'(?P<date>\d{4}-\d{2}-\d{2}'
+    r'|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}'
+    r'|\d{1,2}[- ]?[a-z]{3}[- ]?\d{2,4}'
+    r'|\d{1,2}[- ][a-z]{3})'
+)
+_ACCOUNT = r'(?:a/c|acct|account|ac)(?:\s*no\.?)?\s*\S+'
+
+# (name, transaction type, pattern) - order matters, most specific first
+_TEMPLATE_SPECS = [
+    # HDFC: Rs.500.00 debited from a/c **1234 on 24-11-23 to VPA swiggy@icici (UPI Ref No 333333333)
+    ('hdfc_upi_debit', 'debit',
+     _AMOUNT + r' (?:has been )?debited from ' + _ACCOUNT + r' on ' + _DATE + r' to (?:vpa )?(?P<merchant>\S+)'),
+    # HDFC: Money Received - INR 1,000.00 in your A/C XX1234 on 24-11-23 from VPA ramesh@oksbi
+    ('hdfc_upi_credit', 'credit',
+     r'money received\s*-?\s*' + _AMOUNT + r' in (?:your )?' + _ACCOUNT + r' on ' + _DATE + r' from (?:vpa )?(?P<merchant>\S+)'),
+    # HDFC / Kotak: Sent Rs.250.00 From HDFC Bank A/C *1234 To ZOMATO On 24/11/23
+    ('upi_sent', 'debit',
+     r'\bsent ' + _AMOUNT + r'\s+from .+?\s+to (?P<merchant>.+?)\s+on ' + _DATE),
+    # Kotak: Received Rs.500.00 in your Kotak Bank AC X1234 from ramesh@okaxis on 24-11-23
+    ('upi_received', 'credit',
+     r'\breceived ' + _AMOUNT + r' in (?:your )?.+? from (?P<merchant>.+?) on ' + _DATE),
+    # SBI: Dear UPI user A/C X1234 debited by 250.0 on date 24Nov23 trf to SWIGGY Refno 334455
+    ('sbi_upi_debit', 'debit',
+     _ACCOUNT + r' debited by ' + _AMOUNT_OPT + r' on date ' + _DATE + r' trf to (?P<merchant>.+?)\s+ref'),
+    # SBI: ur A/cX1234 credited by Rs500 on 24Nov23 by RAMESH (Ref no 334455667788)
+    ('sbi_upi_credit', 'credit',
+     _ACCOUNT + r' credited by ' + _AMOUNT_OPT + r' on (?:date )?' + _DATE + r' by (?P<merchant>.*?)\s*\(?ref'),
+    # ICICI: ICICI Bank Acct XX123 debited for Rs 250.00 on 24-Nov-23; ZOMATO credited. UPI:334455667788
+    ('icici_upi_debit', 'debit',
+     _ACCOUNT + r' debited (?:for|with) ' + _AMOUNT + r' on ' + _DATE + r'[;,.]?\s*(?P<merchant>.+?) credited'),
+    # ICICI: Acct XX123 is credited with Rs 1,000.00 on 24-Nov-23 from RAMESH KUMAR. UPI:334455
+    ('icici_upi_credit', 'credit',
+     _ACCOUNT + r' is credited (?:with|for|by) ' + _AMOUNT + r' on ' + _DATE + r' (?:from|by) (?P<merchant>.+?)\.\s'),
+    # Axis: INR 250.00 debited A/c no. XX1234 24-11-23, 10:15:30 UPI/P2M/334455667788/ZOMATO
+    ('axis_upi_debit', 'debit',
+     _AMOUNT + r' debited\s+' + _ACCOUNT + r'\s+' + _DATE + r',?\s+[\d:]+\s+upi/p2[am]/\d+/(?P<merchant>[^\n/]+)'),
+    # Axis: INR 500.00 credited A/c no. XX1234 24-11-23, 10:15:30 UPI/P2A/334455667788/RAMESH
+    ('axis_upi_credit', 'credit',
+     _AMOUNT + r' credited\s+' + _ACCOUNT + r'\s+' + _DATE + r',?\s+[\d:]+\s+upi/p2[am]/\d+/(?P<merchant>[^\n/]+)'),
+    # ICICI card: INR 1,299.00 spent on ICICI Bank Card XX1234 on 24-Nov-23 at AMAZON. Avl Lmt: ...
+    ('card_spent_on_at', 'debit',
+     _AMOUNT + r' spent (?:on|using) [^.]*?card[^.]*? on ' + _DATE + r' (?:at|on) (?P<merchant>.+?)\.(?:\s|$)'),
+    # SBI card: Rs 1,299.00 spent on your SBI Credit Card ending 1234 at AMAZON on 24/11/23.
+    ('card_spent_at_on', 'debit',
+     _AMOUNT + r' spent (?:on|using) [^.]*?card[^.]*? at (?P<merchant>.+?) on ' + _DATE),
+    # PNB / BOI / Canara: Your a/c no. XXXX1234 is debited for Rs.250.00 on 24-11-2023 and credited to a/c no. XX99
+    ('generic_debit', 'debit',
+     _ACCOUNT + r' (?:is|has been) debited (?:for|with|by) ' + _AMOUNT + r' on ' + _DATE
+     + r'(?: and credited to (?:a/c(?: no\.?)?|vpa) (?P<merchant>[^\s(]+))?'),
+    # Your a/c XX1234 is credited by Rs.500.00 on 24-11-2023 by a/c linked to VPA ramesh@ybl
+    ('generic_credit', 'credit',
+     _ACCOUNT + r' (?:is|has been) credited (?:for|with|by) ' + _AMOUNT + r' on ' + _DATE
+     + r'(?: (?:from|by) (?:a/c linked to vpa |vpa |a/c (?:no\.? )?)?(?P<merchant>[^\s(]+))?'),
+    # Paytm: Paid Rs.250 to Zomato from Paytm Balance
+    ('wallet_paid', 'debit',
+     r'\bpaid ' + _AMOUNT + r' to (?P<merchant>.+?) from (?:paytm|your)'),
+]
+
+TEMPLATES = [
+    (name, tx_type, re.compile(pattern, re.IGNORECASE | re.DOTALL))
+    for name, tx_type, pattern in _TEMPLATE_SPECS
+]
+
+_DATE_FORMATS = (
+    '%Y-%m-%d', '%d-%m-%y', '%d-%m-%Y', '%d/%m/%y', '%d/%m/%Y', '%d.%m.%y', '%d.%m.%Y',
+    '%d-%b-%y', '%d-%b-%Y', '%d%b%y', '%d%b%Y', '%d %b %y', '%d %b %Y',
+)
+_TRANSACTIONAL = re.compile(r'debit|credit|spent|sent|received|paid|withdrawn|deposited', re.IGNORECASE)
+_SENDER_PREFIX = re.compile(r'^[A-Z]{2}-')
+
+# sender (or message shape) -> index of the template that last matched it
+_template_cache = TTLCache(maxsize=10000)
+
+def _sender_key(sender: Optional[str], sms_text: str) -> str:
+    if sender:
+        # "VM-HDFCBK", "AD-HDFCBK-S" -> "HDFCBK"
+        return _SENDER_PREFIX.sub('', sender.strip().upper()).split('-')[0]
+    # No sender: fingerprint the message shape with digits masked
+    return 'shape:' + re.sub(r'\d+', '9', sms_text[:40].lower())
+
+def _parse_date(raw: Optional[str]) -> str:
+    today = date.today()
+    if not raw:
+        return today.isoformat()
+    raw = raw.strip().title()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date().isoformat()
+        except ValueError:
+            continue
+    # "24-Nov" / "24 Nov" carry no year
+    for fmt in ('%d-%b', '%d %b'):
+        try:
+            parsed = datetime.strptime(raw, fmt).date().replace(year=today.year)
+            if parsed > today:
+                parsed = parsed.replace(year=today.year - 1)
+            return parsed.isoformat()
+        except ValueError:
+            continue
+    return today.isoformat()
+
+def _clean_merchant(raw: Optional[str]):
+    merchant = (raw or '').strip().strip('.,;:()').strip()
+    vpa = None
+    if '@' in merchant:
+        vpa = merchant
+        merchant = merchant.split('@')[0]
+    return merchant or 'Unknown', vpa
+
+def _extract(tx_type: str, match) -> dict:
+    merchant, vpa = _clean_merchant(match.groupdict().get('merchant'))
+    result = {
+        "amount": float(match.group('amount').replace(',', '')),
+        "merchant": merchant,
+        "type": tx_type,
+        "category": (categorize_locally(merchant) or {"category": "Other"})["category"],
+        "date": _parse_date(match.groupdict().get('date')),
+        "confidence": 1.0,
+    }
+    if vpa:
+        result["vpa"] = vpa
+    return result
+
+def looks_transactional(sms_text: str) -> bool:
+    """Cheap check for OTPs, promos etc. that can never yield a transaction"""
+    return bool(sms_text) and any(c.isdigit() for c in sms_text) and bool(_TRANSACTIONAL.search(sms_text))
+
+def match_sms_template(sms_text: str, sender: Optional[str] = None) -> Optional[dict]:
+    """Parse a bank/UPI SMS with the precompiled templates, None if no template fits"""
+    if not looks_transactional(sms_text):
+        return None
+
+    key = _sender_key(sender, sms_text)
+    cached = _template_cache.get(key)
+    order = range(len(TEMPLATES))
+    if cached is not None:
+        order = [cached] + [i for i in order if i != cached]
+
+    for index in order:
+        name, tx_type, pattern = TEMPLATES[index]
+        match = pattern.search(sms_text)
+        if match:
+            _template_cache.set(key, index)
+            result = _extract(tx_type, match)
+            result["template"] = name
+            return result
+    return None
+
+if __name__ == "__main__":
+    # Regression run over the corpus: python -m app.services.ai.sms_templates
+    from app.services.ai.sms_corpus import SMS_CORPUS
+
+    failures = 0
+    for sender, text, expected in SMS_CORPUS:
+        result = match_sms_template(text, sender)
+        if expected is None:
+            ok = result is None
+        else:
+            ok = result is not None and all(result.get(k) == v for k, v in expected.items())
+        if not ok:
+            failures += 1
+            print(f"❌ {sender}: {text!r}\n   expected {expected}\n   got      {result}")
+    print(f"✅ {len(SMS_CORPUS) - failures}/{len(SMS_CORPUS)} SMS templates OK")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,205 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func, literal, select, union_all
+from datetime import date, timedelta
+from decimal import Decimal
+import threading
+
+from app.config import settings
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.loan import Loan
+from app.services.ai.forecast_engine import HISTORY_DAYS
+from app.services.loan_analytics import loan_summary
+from app.utils.cache import TTLCache
+
+# One snapshot of a user's numbers feeds chat context, insights, forecast and challenges.
+# Cached per (user, day, data version, purge marker); versions are bumped when this process writes
+# the user's transactions/loans, and a session hiding purged rows never gets an unfiltered snapshot. The TTL bounds staleness for writes made by other workers.
+
+RECENT_LIMIT = 10
+TOP_EXPENSES_LIMIT = 3
+LOANS_LIMIT = 5  # nearest-due open loans listed individually; the rest only count in loan_summary
+
+_snapshot_cache = TTLCache(maxsize=5000, ttl=settings.SNAPSHOT_TTL_SECONDS)
+
+_versions = {}
+_epoch = 0  # bumped by bulk UPDATE/DELETE where the affected users are unknown
+_versions_lock = threading.Lock()
+
+def _kind(tx_type) -> str:
+    return str(getattr(tx_type, 'value', tx_type)).lower()
+
+def data_version(user_id) -> tuple:
+    with _versions_lock:
+        return _epoch, _versions.get(user_id, 0)
+
+def bump_version(user_id=None):
+    """Invalidate one user's snapshot, or every snapshot when user_id is None"""
+    global _epoch
+    with _versions_lock:
+        if user_id is None:
+            _epoch += 1
+        else:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+
+def _touched_users(session) -> set:
+    users = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Transaction, Loan)):
+            users.add(obj.user_id)
+        elif isinstance(obj, User):
+            users.add(obj.id)
+    return users
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    users = _touched_users(session)
+    if users:
+        # Bump now so this session re-reads its own writes, and again on commit so a
+        # snapshot read by another request between flush and commit is not kept
+        session.info.setdefault('snapshot_users', set()).update(users)
+        for user_id in users:
+            bump_version(user_id)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    for user_id in session.info.pop('snapshot_users', ()):
+        bump_version(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop('snapshot_users', None)
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if orm_execute_state.bind_mapper.class_ in (Transaction, Loan, User):
+            bump_version()
+
+def snapshot_from_rows(today: date, daily_rows, recent_rows, top_rows, loan_rows, loans_summary: dict = None) -> dict:
+    """
+    Assemble a snapshot from already-fetched rows (per-user queries or set-based batch jobs).
+    daily_rows: (date, type, category, total) over [history_start, today]
+    recent_rows / top_rows: (description, amount, category, type, date)
+    loan_rows: (id, lender_name, amount, due_date, date_taken, interest_rate, reminder_days)
+    loans_summary: loan_analytics.loan_summary() for all open loans
+    """
+    month_start = date(today.year, today.month, 1)
+    history_start = min(month_start, today - timedelta(days=HISTORY_DAYS))
+
+    monthly_income = Decimal('0')
+    monthly_expense = Decimal('0')
+    categories = {}
+    for day, tx_type, category, total in daily_rows:
+        if day < month_start:
+            continue
+        total = Decimal(total or 0)
+        if _kind(tx_type) == 'income':
+            monthly_income += total
+        else:
+            monthly_expense += total
+            categories[category] = categories.get(category, Decimal('0')) + total
+
+    def tx_dict(row):
+        description, amount, category, tx_type, day = row
+        return {"description": description, "amount": Decimal(amount), "category": category, "type": _kind(tx_type), "date": day}
+
+    return {
+        "today": today,
+        "month_start": month_start,
+        "history_start": history_start,
+        "daily_rows": [(day, _kind(tx_type), category, float(total or 0)) for day, tx_type, category, total in daily_rows],
+        "monthly_income": monthly_income,
+        "monthly_expense": monthly_expense,
+        "categories": sorted(categories.items(), key=lambda item: -item[1]),
+        "recent_transactions": [tx_dict(row) for row in recent_rows],
+        "top_expenses": [tx_dict(row) for row in top_rows],
+        "loans": [{
+            "id": loan_id, "lender_name": lender, "amount": Decimal(amount), "due_date": due_date,
+            "date_taken": date_taken, "interest_rate": Decimal(rate or 0), "reminder_days": reminder_days,
+        } for loan_id, lender, amount, due_date, date_taken, rate, reminder_days in loan_rows],
+        "loan_summary": loans_summary,
+    }
+
+def _query_snapshot(user_id, db: Session, today: date) -> dict:
+    month_start = date(today.year, today.month, 1)
+    history_start = min(month_start, today - timedelta(days=HISTORY_DAYS))
+
+    # 1. Daily totals per type and category: forecast history, month totals and breakdown
+    daily_rows = db.query(Transaction.date, Transaction.type, Transaction.category, func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= history_start,
+        Transaction.date <= today
+    ).group_by(Transaction.date, Transaction.type, Transaction.category).all()
+
+    # 2. Recent transactions and the month's biggest expenses in one round trip
+    columns = (Transaction.description, Transaction.amount, Transaction.category, Transaction.type, Transaction.date)
+    recent = select(literal('recent').label('kind'), *columns).where(
+        Transaction.user_id == user_id
+    ).order_by(Transaction.date.desc(), Transaction.created_at.desc()).limit(RECENT_LIMIT)
+    top = select(literal('top').label('kind'), *columns).where(
+        Transaction.user_id == user_id,
+        Transaction.date >= month_start,
+        Transaction.type == 'EXPENSE'
+    ).order_by(Transaction.amount.desc(), Transaction.id).limit(TOP_EXPENSES_LIMIT)
+    tx_rows = db.execute(union_all(recent.subquery().select(), top.subquery().select())).all()
+
+    # 3. Nearest open loans, and totals over all of them
+    loan_rows = db.query(
+        Loan.id, Loan.lender_name, Loan.amount, Loan.due_date, Loan.date_taken, Loan.interest_rate, Loan.reminder_days
+    ).filter(Loan.user_id == user_id, Loan.is_paid == False).order_by(Loan.due_date, Loan.id).limit(LOANS_LIMIT).all()
+
+    return snapshot_from_rows(
+        today,
+        daily_rows,
+        [tuple(row[1:]) for row in tx_rows if row[0] == 'recent'],
+        [tuple(row[1:]) for row in tx_rows if row[0] == 'top'],
+        loan_rows,
+        loan_summary(db, user_id, today),
+    )
+
+def query_snapshots(db: Session, user_ids: list, today: date) -> dict:
+    """
+    Snapshots for many users in two set-based queries (batch jobs). Only the parts insights and
+    forecasts use are filled: recent_transactions, loans and loan_summary are left empty.
+    """
+    month_start = date(today.year, today.month, 1)
+    history_start = min(month_start, today - timedelta(days=HISTORY_DAYS))
+
+    daily = {user_id: [] for user_id in user_ids}
+    for user_id, day, tx_type, category, total in db.query(
+        Transaction.user_id, Transaction.date, Transaction.type, Transaction.category, func.sum(Transaction.amount)
+    ).filter(
+        Transaction.user_id.in_(user_ids),
+        Transaction.date >= history_start,
+        Transaction.date <= today
+    ).group_by(Transaction.user_id, Transaction.date, Transaction.type, Transaction.category):
+        daily[user_id].append((day, tx_type, category, total))
+
+    # Same ordering as the per-user query, so both produce identical top expenses
+    rank = func.row_number().over(
+        partition_by=Transaction.user_id,
+        order_by=(Transaction.amount.desc(), Transaction.id)
+    ).label('rank')
+    ranked = select(
+        Transaction.user_id, Transaction.description, Transaction.amount, Transaction.category, Transaction.type, Transaction.date, rank
+    ).where(
+        Transaction.user_id.in_(user_ids),
+        Transaction.date >= month_start,
+        Transaction.type == 'EXPENSE'
+    ).subquery()
+    top = {user_id: [] for user_id in user_ids}
+    for row in db.execute(select(ranked).where(ranked.c.rank <= TOP_EXPENSES_LIMIT).order_by(ranked.c.user_id, ranked.c.rank)):
+        top[row.user_id].append((row.description, row.amount, row.category, row.type, row.date))
+
+    return {user_id: snapshot_from_rows(today, daily[user_id], [], top[user_id], []) for user_id in user_ids}
+
+def build_financial_snapshot(user: User, db: Session) -> dict:
+    """Memoized snapshot of the user's month and recent activity. Treat the result as read-only."""
+    today = date.today()
+    key = (user.id, today, data_version(user.id), db.info.get('purge_marker'))
+    snapshot = _snapshot_cache.get(key)
+    if snapshot is None:
+        snapshot = _query_snapshot(user.id, db, today)
+        _snapshot_cache.set(key, snapshot)
+    return snapshot
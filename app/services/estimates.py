@@ -0,0 +1,79 @@
+from sqlalchemy import select, func, literal, exists
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from decimal import Decimal
+import uuid
+
+from app.models.estimate import Estimate
+
+def upsert_estimates(db: Session, user_id, month: int, year: int, amounts: dict) -> list:
+    """
+    Insert or update a month's category budgets in one INSERT ... ON CONFLICT statement.
+    amounts: {category: amount}. Returns the resulting rows; the caller commits.
+    """
+    if not amounts:
+        return []
+    now = datetime.utcnow()
+    stmt = pg_insert(Estimate).values([{
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "category": category,
+        "estimated_amount": Decimal(str(amount)),
+        "month": month,
+        "year": year,
+        "created_at": now,
+        "updated_at": now,
+    } for category, amount in amounts.items()])
+    stmt = stmt.on_conflict_do_update(
+        constraint='_user_category_month_uc',
+        set_={"estimated_amount": stmt.excluded.estimated_amount, "updated_at": stmt.excluded.updated_at}
+    ).returning(Estimate)
+    return list(db.scalars(stmt, execution_options={"populate_existing": True}))
+
+def _previous_month(month: int, year: int) -> tuple:
+    return (12, year - 1) if month == 1 else (month - 1, year)
+
+def roll_forward_estimates(db: Session, today: date = None, batch_size: int = 1000) -> dict:
+    """
+    Copy last month's budgets into this month for every user, in keyset batches of users.
+    Users who already have any budget for this month are skipped entirely (they may have dropped
+    categories on purpose), so reruns are safe; ON CONFLICT DO NOTHING only guards against races.
+    """
+    today = today or date.today()
+    month, year = today.month, today.year
+    prev_month, prev_year = _previous_month(month, year)
+    source = (Estimate.month == prev_month, Estimate.year == prev_year)
+    current = aliased(Estimate)
+    has_current = exists().where(current.user_id == Estimate.user_id, current.month == month, current.year == year)
+
+    stats = {"batches": 0, "users": 0, "copied": 0}
+    after = None
+    while True:
+        users = select(Estimate.user_id).where(*source).distinct().order_by(Estimate.user_id).limit(batch_size)
+        if after is not None:
+            users = users.where(Estimate.user_id > after)
+        user_ids = db.scalars(users).all()
+        if not user_ids:
+            break
+        last = user_ids[-1]
+
+        batch = [*source, Estimate.user_id <= last]
+        if after is not None:
+            batch.append(Estimate.user_id > after)
+        now = literal(datetime.utcnow())
+        rows = select(
+            func.gen_random_uuid(), Estimate.user_id, Estimate.category, Estimate.estimated_amount,
+            literal(month), literal(year), now, now
+        ).where(*batch, ~has_current)
+        copy = pg_insert(Estimate).from_select(
+            ["id", "user_id", "category", "estimated_amount", "month", "year", "created_at", "updated_at"], rows
+        ).on_conflict_do_nothing(constraint='_user_category_month_uc')
+        stats["copied"] += db.execute(copy).rowcount
+        db.commit()
+
+        stats["batches"] += 1
+        stats["users"] += len(user_ids)
+        after = last
+    return stats
@@ -0,0 +1,189 @@
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Optional
+import json
+import logging
+import threading
+import uuid
+
+from app.config import settings
+from app.database.session import SessionLocal
+from app.models.job import Job
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Postgres-backed job queue: no broker to run. Workers claim the oldest runnable job with
+# SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker threads/processes can poll the
+# same table without handing out a job twice. A job whose worker died is picked up again once
+# its lock is older than JOB_LOCK_TIMEOUT_SECONDS, unless it has used up its attempts, in which
+# case it is failed rather than run again. Handlers that can run longer than the lock timeout
+# must call touch_job(db) regularly (e.g. once per batch) to keep their lock fresh.
+#
+# Handlers are registered per kind with @job_handler and called as handler(payload, user, db);
+# their return value must be JSON-serializable. An exception re-queues the job with exponential
+# backoff until max_attempts is reached.
+
+HANDLERS = {}
+
+jobs_total = Counter("spennies_jobs_total", "Jobs finished by kind and outcome (succeeded, retried, failed)", ("kind", "outcome"))
+job_seconds = Histogram("spennies_job_seconds", "Job run time", ("kind",))
+job_wait_seconds = Histogram("spennies_job_wait_seconds", "Time from enqueue to first claim", ("kind",))
+
+_running_job = ContextVar("running_job", default=None)  # id of the job run_job is running
+
+# Wakes the embedded worker as soon as this process enqueues, instead of at the next poll
+wakeup = threading.Event()
+
+def job_handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+def enqueue_job(db: Session, kind: str, payload: dict, user_id=None, max_attempts: int = None) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        kind=kind,
+        status='queued',
+        payload=json.dumps(payload, ensure_ascii=False, default=str),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    wakeup.set()
+    return job
+
+def claim_job(db: Session) -> Optional[Job]:
+    """Lock and mark running the oldest runnable job, or None"""
+    while True:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+        job = db.query(Job).filter(
+            Job.run_after <= now,
+            or_(Job.status == 'queued', and_(Job.status == 'running', Job.locked_at < stale))
+        ).order_by(Job.run_after).limit(1).with_for_update(skip_locked=True).first()
+        if job is None:
+            db.rollback()
+            return None
+        if job.status == 'running' and job.attempts >= job.max_attempts:
+            # Its worker died mid-run and there is no attempt left: the last one may have
+            # done its writes, so running it again could repeat them
+            job.status = 'failed'
+            job.error = f"Worker lost after attempt {job.attempts} of {job.max_attempts}"
+            job.finished_at = now
+            job.locked_at = None
+            db.commit()
+            jobs_total.inc(kind=job.kind, outcome='failed')
+            logger.error("Job lost its worker, not retried", extra={"job_kind": job.kind, "job_id": str(job.id), "attempt": job.attempts})
+            continue
+        break
+    if job.attempts == 0:
+        job_wait_seconds.observe((now - job.created_at).total_seconds(), kind=job.kind)
+    job.status = 'running'
+    job.locked_at = now
+    job.attempts += 1
+    db.commit()
+    return job
+
+def touch_job(db: Session, job_id=None) -> None:
+    """Refresh the lock of a running job (default: the one this worker is running) so it isn't
+    re-claimed as orphaned. Part of the caller's transaction; call it before a commit."""
+    job_id = job_id or _running_job.get()
+    if job_id is not None:
+        db.execute(update(Job).where(Job.id == job_id, Job.status == 'running').values(locked_at=datetime.utcnow()))
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+def run_job(db: Session, job: Job) -> None:
+    """Run a claimed job and record its result, a retry, or the final failure"""
+    handler = HANDLERS.get(job.kind)
+    started = datetime.utcnow()
+    token = _running_job.set(job.id)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind {job.kind}")
+        from app.services.purge import load_user  # purge registers a job handler, so it imports this module
+        user = load_user(db, job.user_id) if job.user_id else None
+        if job.user_id and user is None:
+            raise ValueError("User no longer exists")
+        result = handler(json.loads(job.payload or '{}'), user, db)
+        db.rollback()  # drop anything the handler left uncommitted before updating the job
+        job.status = 'succeeded'
+        job.result = json.dumps(result, ensure_ascii=False, default=str)
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        outcome = 'succeeded'
+    except Exception as e:
+        db.rollback()
+        job.error = f"{e.__class__.__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + _retry_delay(job.attempts)
+            outcome = 'retried'
+            logger.warning("Job failed, retrying: %s", e, extra={"job_kind": job.kind, "job_id": str(job.id), "attempt": job.attempts, "max_attempts": job.max_attempts})
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            outcome = 'failed'
+            logger.error("Job failed: %s", e, exc_info=True, extra={"job_kind": job.kind, "job_id": str(job.id), "attempt": job.attempts})
+    finally:
+        _running_job.reset(token)
+    job.locked_at = None
+    db.commit()
+    jobs_total.inc(kind=job.kind, outcome=outcome)
+    job_seconds.observe((datetime.utcnow() - started).total_seconds(), kind=job.kind)
+
+def work_once() -> bool:
+    """Claim and run one job. False when the queue had nothing runnable."""
+    db = SessionLocal()
+    try:
+        job = claim_job(db)
+        if job is None:
+            return False
+        run_job(db, job)
+        return True
+    finally:
+        db.close()
+
+def worker_loop(stop: threading.Event) -> None:
+    """Run jobs until stop is set, polling every JOB_POLL_INTERVAL_MS when idle"""
+    while not stop.is_set():
+        try:
+            if work_once():
+                continue
+        except Exception as e:
+            logger.exception("Job worker error: %s", e)
+        wakeup.wait(settings.JOB_POLL_INTERVAL_MS / 1000)
+        wakeup.clear()
+
+def job_to_dict(job: Job, include_result: bool = True) -> dict:
+    data = {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "error": job.error if job.status == 'failed' else None,
+    }
+    if include_result:
+        data["result"] = json.loads(job.result) if job.result else None
+    return data
+
+def purge_finished_jobs(db: Session) -> int:
+    """Delete succeeded/failed jobs older than JOB_RETENTION_DAYS"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    deleted = db.query(Job).filter(
+        Job.status.in_(('succeeded', 'failed')),
+        Job.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
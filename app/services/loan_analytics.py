@@ -0,0 +1,118 @@
+from sqlalchemy import Date, case, func, literal
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+import numpy as np
+
+from app.models.loan import Loan
+
+# Open-loan totals per user: principal, interest accrued to date, overdue amount and dues
+# bucketed by week.
+#
+# interest_rate is a yearly percentage, accrued as simple interest from date_taken (and still
+# accruing on overdue loans). Simple interest is linear in days, so Postgres only has to return
+# sums per (user, bucket): amount, amount*rate*days elapsed and amount*rate*days to due. NumPy
+# turns those into money for any number of users at once, without loading individual loans.
+
+UPCOMING_WEEKS = 4  # weekly buckets after the overdue one; anything later is "later"
+DAYS_PER_YEAR = 365
+OVERDUE = -1
+LATER = UPCOMING_WEEKS
+
+def _bucket_rows(db: Session, today: date, user_ids=None, per_user: bool = True):
+    """(user_id, bucket, count, principal, rate_days_elapsed, rate_days_term, next_due) per user and bucket.
+    per_user=False sums over all users (user_id None)."""
+    today_value = literal(today, Date)
+    rate = func.coalesce(Loan.interest_rate, 0)
+    per_loan = db.query(
+        Loan.user_id.label('user_id'),
+        case(
+            (Loan.due_date < today_value, OVERDUE),
+            else_=func.least((Loan.due_date - today_value) // 7, LATER)
+        ).label('bucket'),
+        Loan.amount.label('amount'),
+        (Loan.amount * rate * func.greatest(today_value - Loan.date_taken, 0)).label('rate_days_elapsed'),
+        (Loan.amount * rate * func.greatest(Loan.due_date - Loan.date_taken, 0)).label('rate_days_term'),
+        Loan.due_date.label('due_date'),
+    ).filter(Loan.is_paid == False)
+    if user_ids is not None:
+        per_loan = per_loan.filter(Loan.user_id.in_(user_ids))
+    per_loan = per_loan.subquery()
+
+    group = (per_loan.c.user_id, per_loan.c.bucket) if per_user else (per_loan.c.bucket,)
+    rows = db.query(
+        *group,
+        func.count(),
+        func.sum(per_loan.c.amount),
+        func.sum(per_loan.c.rate_days_elapsed),
+        func.sum(per_loan.c.rate_days_term),
+        func.min(per_loan.c.due_date),
+    ).group_by(*group).all()
+    return rows if per_user else [(None,) + tuple(row) for row in rows]
+
+def _summaries(rows, today: date, user_ids) -> dict:
+    users = list(dict.fromkeys(list(user_ids or []) + [row[0] for row in rows]))
+    index = {user_id: i for i, user_id in enumerate(users)}
+    shape = (len(users), UPCOMING_WEEKS + 2)  # column 0 is overdue, 1..UPCOMING_WEEKS weeks, last is later
+
+    counts = np.zeros(shape)
+    principal = np.zeros(shape)
+    accrued = np.zeros(shape)
+    at_due = np.zeros(shape)
+    next_due = np.full(len(users), np.iinfo(np.int64).max, dtype=np.int64)
+
+    if rows:
+        user_idx = np.array([index[row[0]] for row in rows])
+        column = np.array([row[1] for row in rows]) + 1
+        np.add.at(counts, (user_idx, column), np.array([row[2] for row in rows], dtype=float))
+        np.add.at(principal, (user_idx, column), np.array([float(row[3] or 0) for row in rows]))
+        np.add.at(accrued, (user_idx, column), np.array([float(row[4] or 0) for row in rows]) / (100 * DAYS_PER_YEAR))
+        np.add.at(at_due, (user_idx, column), np.array([float(row[5] or 0) for row in rows]) / (100 * DAYS_PER_YEAR))
+        upcoming = column > 0
+        np.minimum.at(next_due, user_idx[upcoming], np.array([row[6].toordinal() for row in rows])[upcoming])
+
+    # Overdue loans owe principal plus interest so far; upcoming ones principal plus interest to due
+    payable = principal + np.where(np.arange(shape[1]) == 0, accrued, at_due)
+    totals = np.round(np.stack([principal.sum(axis=1), accrued.sum(axis=1)], axis=1), 2)
+    payable = np.round(payable, 2)
+
+    summaries = {}
+    for user_id, i in index.items():
+        summaries[user_id] = {
+            "open_loans": int(counts[i].sum()),
+            "total_principal": float(totals[i, 0]),
+            "interest_accrued": float(totals[i, 1]),
+            "outstanding": round(float(totals[i, 0] + totals[i, 1]), 2),
+            "overdue": {"count": int(counts[i, 0]), "amount": float(payable[i, 0])},
+            "upcoming": [{
+                "week": week,
+                "start": today + timedelta(days=7 * week),
+                "end": today + timedelta(days=7 * week + 6),
+                "count": int(counts[i, week + 1]),
+                "amount": float(payable[i, week + 1]),
+            } for week in range(UPCOMING_WEEKS)],
+            "later": {"count": int(counts[i, -1]), "amount": float(payable[i, -1])},
+            "next_due_date": date.fromordinal(int(next_due[i])) if counts[i, 1:].sum() else None,
+        }
+    return summaries
+
+def loan_summary(db: Session, user_id, today: date = None) -> dict:
+    """One user's open-loan summary (one aggregate query)"""
+    today = today or date.today()
+    return summarize_loans(db, [user_id], today)[user_id]
+
+def summarize_loans(db: Session, user_ids: list = None, today: date = None) -> dict:
+    """
+    {user_id: summary} for many users in one query (batch jobs, reports).
+    user_ids=None covers every user with an open loan; pass chunks for very large fleets.
+    """
+    today = today or date.today()
+    return _summaries(_bucket_rows(db, today, user_ids), today, user_ids)
+
+def fleet_loan_totals(db: Session, today: date = None) -> dict:
+    """Fleet-wide report: the same figures summed over all users, plus how many users hold open loans"""
+    today = today or date.today()
+    rows = _bucket_rows(db, today, per_user=False)
+    borrowers = db.query(func.count(func.distinct(Loan.user_id))).filter(Loan.is_paid == False).scalar()
+    report = _summaries(rows, today, [None])[None]
+    report["users_with_open_loans"] = borrowers or 0
+    return report
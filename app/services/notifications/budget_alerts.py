@@ -0,0 +1,58 @@
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.estimate import Estimate
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+
+TITLES = {
+    'en': "Budget exceeded",
+    'hi': "बजट पार हो गया",
+    'mr': "बजेट ओलांडले",
+}
+
+def budget_overrun_intent(db: Session, user: User, transaction: Transaction):
+    """Intent when this expense takes its category over the month's estimate (only on crossing)"""
+    if not user.fcm_token or transaction.type != TransactionType.EXPENSE:
+        return None
+    year, month = transaction.date.year, transaction.date.month
+    month_start = date(year, month, 1)
+    next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    row = db.query(
+        Estimate.estimated_amount,
+        db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
+            Transaction.user_id == user.id,
+            Transaction.type == TransactionType.EXPENSE,
+            Transaction.category == transaction.category,
+            Transaction.date >= month_start,
+            Transaction.date < next_month
+        ).scalar_subquery()
+    ).filter(
+        Estimate.user_id == user.id,
+        Estimate.category == transaction.category,
+        Estimate.month == month,
+        Estimate.year == year
+    ).first()
+    if row is None:
+        return None
+
+    estimate, spent = row
+    if spent < estimate or spent - transaction.amount >= estimate:
+        return None
+
+    language = user.language if user.language in TITLES else 'en'
+    over = f"₹{float(spent - estimate):,.0f}"
+    body = {
+        'en': f"{transaction.category} is {over} over this month's budget",
+        'hi': f"{transaction.category} इस महीने के बजट से {over} ज़्यादा",
+        'mr': f"{transaction.category} या महिन्याच्या बजेटपेक्षा {over} जास्त",
+    }[language]
+    return {
+        "user_id": user.id,
+        "token": user.fcm_token,
+        "kind": "budget_overrun",
+        "title": TITLES[language],
+        "body": body,
+        "data": {"type": "budget_overrun", "category": transaction.category},
+    }
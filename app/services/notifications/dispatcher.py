@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import random
+from sqlalchemy import update
+
+from app.config import settings
+from app.database.session import SessionLocal
+from app.models.user import User
+from app.services.notifications.transports import get_transport
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Notification intents are plain dicts:
+#   {"user_id", "token", "kind", "title", "body", "data": {str: str}}
+# Intents for the same user are collapsed into one push, pushes with identical payloads share
+# one multicast request (up to MULTICAST_LIMIT tokens), and requests run concurrently up to
+# NOTIFICATION_CONCURRENCY. Unavailable tokens are retried with exponential backoff; tokens FCM
+# reports as unregistered are cleared from users so they are not tried again.
+#
+# Batch jobs call deliver() directly. Request handlers enqueue() onto the in-process dispatcher,
+# which flushes every NOTIFICATION_FLUSH_MS so bursts for the same user collapse too.
+
+MULTICAST_LIMIT = 1000  # registration_ids per FCM request
+MAX_COLLAPSED_LINES = 3
+KIND_PRIORITY = {'loan_reminder': 0, 'budget_overrun': 1, 'daily_digest': 2}
+INVALID_TOKEN_ERRORS = {'NotRegistered', 'InvalidRegistration', 'MismatchSenderId'}
+RETRYABLE_ERRORS = {'Unavailable', 'InternalServerError', 'DeviceMessageRateExceeded'}
+
+notifications_total = Counter("spennies_notifications_total", "Pushes by kind and outcome (sent, failed, invalid_token)", ("kind", "outcome"))
+notification_requests = Counter("spennies_notification_requests_total", "Multicast requests by outcome (ok, error)", ("outcome",))
+multicast_size = Histogram("spennies_notification_multicast_size", "Tokens per multicast request", (), (1, 10, 50, 100, 250, 500, 1000))
+queue_depth = Gauge("spennies_notification_queue_depth", "Intents waiting in the dispatcher queue")
+intents_dropped = Counter("spennies_notification_intents_dropped_total", "Intents dropped because the queue was full or not running")
+
+def collapse(intents: list) -> list:
+    """One notification per user: highest priority intent's title, bodies combined"""
+    by_user = {}
+    for intent in intents:
+        if intent.get("token"):
+            by_user.setdefault(intent["user_id"], []).append(intent)
+
+    notifications = []
+    for user_id, items in by_user.items():
+        items.sort(key=lambda item: KIND_PRIORITY.get(item["kind"], len(KIND_PRIORITY)))
+        top = items[0]
+        kinds = list(dict.fromkeys(item["kind"] for item in items))
+        body = top["body"]
+        if len(items) > 1:
+            lines = [item["body"] for item in items[:MAX_COLLAPSED_LINES]]
+            if len(items) > MAX_COLLAPSED_LINES:
+                lines.append(f"+{len(items) - MAX_COLLAPSED_LINES}")
+            body = "\n".join(lines)
+        data = dict(top.get("data") or {})
+        data["kinds"] = ",".join(kinds)
+        notifications.append({
+            "user_id": user_id,
+            "token": items[-1]["token"],
+            "kinds": kinds,
+            "title": top["title"],
+            "body": body,
+            "data": data,
+        })
+    return notifications
+
+def _multicast_groups(notifications: list):
+    groups = {}
+    for notification in notifications:
+        key = (notification["title"], notification["body"], tuple(sorted(notification["data"].items())))
+        groups.setdefault(key, []).append(notification)
+    for (title, body, data), members in groups.items():
+        for start in range(0, len(members), MULTICAST_LIMIT):
+            yield title, body, dict(data), members[start:start + MULTICAST_LIMIT]
+
+def _backoff(attempt: int) -> float:
+    base = settings.NOTIFICATION_RETRY_BASE_MS / 1000 * 2 ** (attempt - 1)
+    return base * (0.5 + random.random())  # jitter so retries from parallel batches spread out
+
+async def _send_group(transport, semaphore, title: str, body: str, data: dict, members: list) -> dict:
+    outcomes = {}
+    pending = members
+    for attempt in range(settings.NOTIFICATION_MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(_backoff(attempt))
+        async with semaphore:
+            multicast_size.observe(len(pending))
+            try:
+                errors = await asyncio.to_thread(transport.send_multicast, [m["token"] for m in pending], title, body, data)
+            except Exception as e:
+                notification_requests.inc(outcome='error')
+                logger.warning("Push request failed: %s", e, extra={"attempt": attempt + 1, "tokens": len(pending)})
+                continue
+        notification_requests.inc(outcome='ok')
+
+        retry = []
+        for member, error in zip(pending, errors):
+            if error is None:
+                outcomes[member["user_id"]] = 'sent'
+            elif error in INVALID_TOKEN_ERRORS:
+                outcomes[member["user_id"]] = 'invalid_token'
+            elif error in RETRYABLE_ERRORS:
+                retry.append(member)
+            else:
+                outcomes[member["user_id"]] = 'failed'
+        pending = retry
+        if not pending:
+            break
+
+    for member in pending:
+        outcomes[member["user_id"]] = 'failed'
+    return outcomes
+
+def prune_tokens(tokens: list):
+    """Clear device tokens FCM no longer accepts (only where the user has not registered a new one)"""
+    if not tokens:
+        return
+    db = SessionLocal()
+    try:
+        # Core update: token changes do not touch financial snapshots
+        db.execute(update(User.__table__).where(User.__table__.c.fcm_token.in_(tokens)).values(fcm_token=None))
+        db.commit()
+        logger.info("Pruned %s invalid FCM tokens", len(tokens))
+    except Exception as e:
+        db.rollback()
+        logger.error("FCM token prune failed: %s", e)
+    finally:
+        db.close()
+
+async def deliver_async(intents: list, transport=None) -> dict:
+    """Send intents now. Returns {user_id: 'sent' | 'failed' | 'invalid_token'}."""
+    transport = transport or get_transport()
+    notifications = collapse(intents)
+    semaphore = asyncio.Semaphore(settings.NOTIFICATION_CONCURRENCY)
+    results = await asyncio.gather(*(
+        _send_group(transport, semaphore, title, body, data, members)
+        for title, body, data, members in _multicast_groups(notifications)
+    ))
+
+    outcomes = {}
+    for result in results:
+        outcomes.update(result)
+    invalid = []
+    for notification in notifications:
+        outcome = outcomes.get(notification["user_id"], 'failed')
+        for kind in notification["kinds"]:
+            notifications_total.inc(kind=kind, outcome=outcome)
+        if outcome == 'invalid_token':
+            invalid.append(notification["token"])
+    if invalid:
+        await asyncio.to_thread(prune_tokens, invalid)
+    return outcomes
+
+def deliver(intents: list, transport=None) -> dict:
+    """Blocking deliver for scheduled jobs and scripts (not for use inside the event loop)"""
+    if not intents:
+        return {}
+    return asyncio.run(deliver_async(intents, transport))
+
+class NotificationDispatcher:
+    """In-process queue: request handlers enqueue intents, one worker flushes them in batches"""
+
+    def __init__(self, transport=None):
+        self.transport = transport
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.NOTIFICATION_QUEUE_SIZE)
+        self._worker = asyncio.ensure_future(self._run())
+
+    def enqueue(self, intent: dict) -> bool:
+        """Non-blocking; call from the event loop thread. False when the intent was dropped."""
+        if self._queue is None:
+            intents_dropped.inc()
+            return False
+        try:
+            self._queue.put_nowait(intent)
+        except asyncio.QueueFull:
+            intents_dropped.inc()
+            logger.warning("Notification queue full, intent dropped")
+            return False
+        queue_depth.set(self._queue.qsize())
+        return True
+
+    def _drain(self) -> list:
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + settings.NOTIFICATION_FLUSH_MS / 1000
+            while len(batch) < MULTICAST_LIMIT:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            queue_depth.set(self._queue.qsize())
+            try:
+                await deliver_async(batch, self.transport)
+            except Exception as e:
+                logger.exception("Notification dispatch failed: %s", e)
+
+    async def stop(self):
+        """Stop the worker and send whatever is still queued"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        remaining = self._drain()
+        if remaining:
+            await deliver_async(remaining, self.transport)
+        queue_depth.set(0)
+
+dispatcher = NotificationDispatcher()
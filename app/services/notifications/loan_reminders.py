@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, literal_column, tuple_, exists, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.loan import Loan
+from app.models.loan_reminder import LoanReminder
+from app.models.user import User
+from app.services.notifications.dispatcher import deliver
+from app.services.purge import active_purge_cutoff
+
+# A loan's reminder window opens on due_date - reminder_days. The scan is one range query on that
+# expression (partial index ix_loans_reminder_opens, unpaid loans only), walked in keyset pages of
+# (user_id, id) so memory stays bounded by the page size however many loans exist.
+#
+# Every loan is claimed in loan_reminders (unique per loan and due date) before its push is sent,
+# so a rerun, a restart mid-batch or a second scheduler never sends the same reminder twice. The
+# trade-off is at-most-once: a crash between claim and send drops that reminder.
+
+REMINDER_OPENS_ON = Loan.due_date - func.coalesce(Loan.reminder_days, literal_column('3'))
+
+TITLES = {
+    'en': "Loan reminder",
+    'hi': "उधार रिमाइंडर",
+    'mr': "कर्ज स्मरणपत्र",
+}
+
+def _format_amount(amount) -> str:
+    return f"₹{float(amount):,.0f}"
+
+def _format_due(due: date, today: date, language: str) -> str:
+    if due == today:
+        return {'hi': "आज", 'mr': "आज"}.get(language, "today")
+    if due == today + timedelta(days=1):
+        return {'hi': "कल", 'mr': "उद्या"}.get(language, "tomorrow")
+    return due.strftime("%d %b")
+
+def reminder_message(loans: list, language: str, today: date) -> tuple:
+    """One (title, body) per user: a single loan by name, several as a summary"""
+    language = language if language in TITLES else 'en'
+    if len(loans) == 1:
+        loan = loans[0]
+        amount = _format_amount(loan.amount)
+        due = _format_due(loan.due_date, today, language)
+        body = {
+            'en': f"{amount} to {loan.lender_name} is due {'on ' if due[0].isdigit() else ''}{due}",
+            'hi': f"{loan.lender_name} को {amount} {due} चुकाने हैं",
+            'mr': f"{loan.lender_name} यांना {amount} {due} परत करायचे आहेत",
+        }[language]
+    else:
+        total = _format_amount(sum(float(loan.amount) for loan in loans))
+        first_due = _format_due(min(loan.due_date for loan in loans), today, language)
+        body = {
+            'en': f"{len(loans)} loans ({total}) are due soon, the first {'on ' if first_due[0].isdigit() else ''}{first_due}",
+            'hi': f"{len(loans)} उधार ({total}) जल्द चुकाने हैं, पहला {first_due}",
+            'mr': f"{len(loans)} कर्जे ({total}) लवकरच परत करायची आहेत, पहिले {first_due}",
+        }[language]
+    return TITLES[language], body
+
+def _due_page(db: Session, today: date, after: tuple, limit: int) -> list:
+    query = db.query(
+        Loan.id, Loan.user_id, Loan.lender_name, Loan.amount, Loan.due_date, User.fcm_token, User.language
+    ).join(User, User.id == Loan.user_id).filter(
+        REMINDER_OPENS_ON.between(today - timedelta(days=settings.REMINDER_LOOKBACK_DAYS), today),
+        Loan.due_date >= today,
+        Loan.is_paid == False,
+        User.fcm_token.isnot(None),
+        func.coalesce(Loan.created_at > active_purge_cutoff(Loan.user_id), True),  # not hidden by a pending purge
+        ~exists().where(LoanReminder.loan_id == Loan.id, LoanReminder.due_date == Loan.due_date)
+    )
+    if after:
+        query = query.filter(tuple_(Loan.user_id, Loan.id) > after)
+    return query.order_by(Loan.user_id, Loan.id).limit(limit).all()
+
+def _claim(db: Session, rows: list) -> set:
+    """Insert claim rows; returns the loan ids this run owns (others were claimed already)"""
+    stmt = pg_insert(LoanReminder).values([
+        {"loan_id": row.id, "user_id": row.user_id, "due_date": row.due_date, "status": 'claimed'}
+        for row in rows
+    ]).on_conflict_do_nothing(constraint='_loan_reminder_due_uc').returning(LoanReminder.loan_id)
+    claimed = {loan_id for (loan_id,) in db.execute(stmt)}
+    db.commit()
+    return claimed
+
+def _mark(db: Session, loans: list, status: str):
+    if not loans:
+        return
+    db.execute(
+        update(LoanReminder)
+        .where(tuple_(LoanReminder.loan_id, LoanReminder.due_date).in_([(loan.id, loan.due_date) for loan in loans]))
+        .values(status=status, sent_at=datetime.utcnow() if status == 'sent' else None)
+    )
+    db.commit()
+
+def _send_page(db: Session, rows: list, today: date) -> dict:
+    claimed = _claim(db, rows)
+    by_user = {}
+    for row in rows:
+        if row.id in claimed:
+            by_user.setdefault(row.user_id, []).append(row)
+
+    intents = []
+    for user_id, loans in by_user.items():
+        title, body = reminder_message(loans, loans[0].language, today)
+        intents.append({
+            "user_id": user_id,
+            "token": loans[0].fcm_token,
+            "kind": "loan_reminder",
+            "title": title,
+            "body": body,
+            "data": {"type": "loan_reminder", "loan_ids": ",".join(str(loan.id) for loan in loans)},
+        })
+    outcomes = deliver(intents)
+
+    sent, failed = [], []
+    for user_id, loans in by_user.items():
+        (sent if outcomes.get(user_id) == 'sent' else failed).extend(loans)
+
+    _mark(db, sent, 'sent')
+    _mark(db, failed, 'failed')
+    return {"users": len(by_user), "sent": len(sent), "failed": len(failed), "skipped": len(rows) - len(claimed)}
+
+def send_due_reminders(db: Session, today: date = None, batch_size: int = None) -> dict:
+    """Send one reminder per user for every unpaid loan whose reminder window has opened"""
+    today = today or date.today()
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+
+    stats = {"pages": 0, "users": 0, "sent": 0, "failed": 0, "skipped": 0}
+    after = None
+    carry = []  # last user's loans from the previous page, which may continue on the next
+    while True:
+        rows = _due_page(db, today, after, batch_size)
+        if rows:
+            after = (rows[-1].user_id, rows[-1].id)
+        pending = carry + rows
+        if not pending:
+            break
+
+        if len(rows) == batch_size:
+            # Hold back the trailing user so all their loans go out in one notification
+            last_user = pending[-1].user_id
+            carry = [row for row in pending if row.user_id == last_user]
+            ready = [row for row in pending if row.user_id != last_user]
+        else:
+            carry, ready = [], pending
+
+        if ready:
+            for key, value in _send_page(db, ready, today).items():
+                stats[key] += value
+        stats["pages"] += 1
+        if len(rows) < batch_size:
+            break
+
+    return stats
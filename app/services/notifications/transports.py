@@ -0,0 +1,87 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A transport sends one payload to many device tokens and reports a per-token result:
+# None when delivered, otherwise the FCM error string (NotRegistered, Unavailable...).
+# Raising means the whole request failed and may be retried.
+
+class FCMTransport:
+    """FCM legacy HTTP API through pyfcm"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        # pyfcm keeps the last responses on the instance, so each thread needs its own
+        self._local = threading.local()
+
+    def _service(self):
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            from pyfcm import FCMNotification
+            service = self._local.service = FCMNotification(api_key=self.api_key)
+        return service
+
+    def send_multicast(self, tokens: list, title: str, body: str, data: dict) -> list:
+        result = self._service().notify_multiple_devices(
+            registration_ids=tokens,
+            message_title=title,
+            message_body=body,
+            data_message=data
+        )
+        results = result.get('results') or []
+        if len(results) != len(tokens):
+            raise RuntimeError(f"FCM returned {len(results)} results for {len(tokens)} tokens")
+        return [item.get('error') for item in results]
+
+class LocalFCMTransport:
+    """In-process stand-in for tests and benchmarks: no network, records what was sent.
+    Tokens starting with 'invalid' come back NotRegistered; failure_rate simulates Unavailable."""
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0.0, seed: int = None, keep: int = 10000):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.sent = deque(maxlen=keep)
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send_multicast(self, tokens: list, title: str, body: str, data: dict) -> list:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        results = []
+        with self._lock:
+            self.requests += 1
+            for token in tokens:
+                if token.startswith('invalid'):
+                    results.append('NotRegistered')
+                elif self.failure_rate and self._random.random() < self.failure_rate:
+                    results.append('Unavailable')
+                else:
+                    self.sent.append({"token": token, "title": title, "body": body, "data": dict(data)})
+                    results.append(None)
+        return results
+
+_transport = None
+
+def get_transport():
+    """NOTIFICATION_TRANSPORT: 'fcm' (default) or 'local'"""
+    global _transport
+    if _transport is None:
+        if settings.NOTIFICATION_TRANSPORT == 'local':
+            _transport = LocalFCMTransport(latency_ms=settings.NOTIFICATION_LOCAL_LATENCY_MS)
+        else:
+            if not settings.FCM_SERVER_KEY:
+                logger.warning("FCM_SERVER_KEY not set, pushes will fail")
+            _transport = FCMTransport(settings.FCM_SERVER_KEY)
+    return _transport
+
+def set_transport(transport):
+    """Swap the transport (tests, benchmarks)"""
+    global _transport
+    _transport = transport
@@ -0,0 +1,178 @@
+from sqlalchemy import and_, delete, event, func, not_, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from datetime import datetime
+import json
+import logging
+import time
+import uuid
+
+from app.config import settings
+from app.models.ai_insight import AIInsight
+from app.models.data_purge import DataPurge
+from app.models.estimate import Estimate
+from app.models.loan import Loan
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.jobs import enqueue_job, job_handler, touch_job
+
+logger = logging.getLogger(__name__)
+
+# Deleting a heavy account in one request transaction holds row locks for the whole delete and
+# writes one huge WAL burst. Instead a purge is recorded with a cutoff and handed to the job queue,
+# which deletes DELETE ... WHERE id IN (SELECT id ... LIMIT n) batches, each committed on its own
+# with a short pause in between, and records progress after every batch.
+#
+# Until it finishes, the cutoff is the purge marker: get_current_user loads it with the user, and
+# every ORM read in that request session skips the user's rows created up to the cutoff, so the
+# data disappears the moment the purge is requested. Rows added afterwards stay visible.
+#
+# Account purges delete everything regardless of the cutoff and then the user row (cascading
+# whatever is left). The account is signed out of immediately by releasing its firebase_uid/email.
+
+PURGE_JOB = "purge"
+PURGE_TABLES = (Transaction, Loan, Estimate)  # loans cascade their loan_reminders
+UNFINISHED = ('queued', 'running', 'failed')
+
+def active_purge_cutoff(user_id_column):
+    """Scalar subquery: cutoff of the user's unfinished purge, or NULL"""
+    return select(func.max(DataPurge.cutoff)).where(
+        DataPurge.user_id == user_id_column,
+        DataPurge.status.in_(UNFINISHED)
+    ).scalar_subquery()
+
+def hide_purged_rows(db: Session, user_id, cutoff: datetime):
+    """Hide the user's rows created up to cutoff from every ORM read in this session"""
+    db.info['purge_marker'] = (user_id, cutoff)
+
+def load_user(db: Session, user_id):
+    """The user for work outside a request (jobs, background tasks, shared work), hiding the rows of
+    a pending purge in this session like get_current_user does. None if the user is gone."""
+    user, cutoff = db.query(User, active_purge_cutoff(User.id)).filter(User.id == user_id).first() or (None, None)
+    if cutoff:
+        hide_purged_rows(db, user_id, cutoff)
+    return user
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_purge_marker(orm_execute_state):
+    marker = orm_execute_state.session.info.get('purge_marker')
+    if marker is None or not orm_execute_state.is_select:
+        return
+    user_id, cutoff = marker
+    orm_execute_state.statement = orm_execute_state.statement.options(*[
+        with_loader_criteria(
+            model,
+            lambda cls: not_(and_(cls.user_id == user_id, cls.created_at <= cutoff)),
+            include_aliases=True
+        )
+        for model in PURGE_TABLES
+    ])
+
+def request_purge(db: Session, user: User, scope: str = 'data') -> DataPurge:
+    """Hide the data now and queue its deletion. A repeated request moves the pending purge's cutoff."""
+    now = datetime.utcnow()
+    purge = db.query(DataPurge).filter(
+        DataPurge.user_id == user.id,
+        DataPurge.scope == scope,
+        DataPurge.status.in_(UNFINISHED)
+    ).first()
+    if purge is None:
+        purge = DataPurge(id=uuid.uuid4(), user_id=user.id, firebase_uid=user.firebase_uid, scope=scope, status='queued', deleted_rows=0)
+        db.add(purge)
+    purge.cutoff = now
+
+    # A handful of rows per user: no need to wait for the job
+    db.query(AIInsight).filter(AIInsight.user_id == user.id).delete(synchronize_session=False)
+    if scope == 'account':
+        # Sign-in no longer finds the account; signing up again creates a fresh one
+        user.firebase_uid = f"deleted:{user.id}"
+        user.email = f"deleted+{user.id}@spennies.invalid"
+        user.fcm_token = None
+    else:
+        user.avg_income = 0
+        user.savings_target = 0
+
+    if purge.job_id is None or purge.status == 'failed':
+        purge.status = 'queued'
+        db.flush()
+        purge.job_id = enqueue_job(db, PURGE_JOB, {"purge_id": str(purge.id)}).id
+    db.commit()
+    hide_purged_rows(db, user.id, now)
+    return purge
+
+def _doomed(table, purge: DataPurge):
+    if purge.scope == 'account':
+        return table.c.user_id == purge.user_id
+    return and_(table.c.user_id == purge.user_id, table.c.created_at <= purge.cutoff)
+
+def _delete_batch(db: Session, table, purge: DataPurge, batch_size: int) -> int:
+    # Core statements on the table: no ORM bulk-delete hooks (snapshot epoch) per batch
+    ids = select(table.c.id).where(_doomed(table, purge)).limit(batch_size)
+    return db.execute(delete(table).where(table.c.id.in_(ids))).rowcount
+
+def run_purge(db: Session, purge_id, batch_size: int = None) -> dict:
+    """Delete a purge's rows in batches, committing progress after each; resumes where a failed run stopped"""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    purge = db.get(DataPurge, purge_id)
+    if purge is None or purge.status == 'succeeded':
+        return purge_to_dict(purge) if purge else None
+
+    purge.status = 'running'
+    purge.error = None
+    progress = json.loads(purge.progress or '{}')
+    if purge.total_rows is None:
+        purge.total_rows = sum(
+            db.query(func.count()).select_from(model.__table__).filter(_doomed(model.__table__, purge)).scalar()
+            for model in PURGE_TABLES
+        )
+    db.commit()
+
+    try:
+        for model in PURGE_TABLES:
+            table = model.__table__
+            while True:
+                db.refresh(purge)  # a repeated request may have moved the cutoff
+                deleted = _delete_batch(db, table, purge, batch_size)
+                progress[table.name] = progress.get(table.name, 0) + deleted
+                purge.deleted_rows += deleted
+                purge.progress = json.dumps(progress)
+                touch_job(db)  # batches can outlast JOB_LOCK_TIMEOUT_SECONDS
+                db.commit()
+                if deleted < batch_size:
+                    break
+                time.sleep(settings.PURGE_BATCH_PAUSE_MS / 1000)
+
+        if purge.scope == 'account':
+            users = User.__table__
+            db.execute(delete(users).where(users.c.id == purge.user_id))
+        purge.status = 'succeeded'
+        purge.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        purge.status = 'failed'
+        purge.error = f"{e.__class__.__name__}: {e}"
+        db.commit()
+        raise
+
+    logger.info("Purge finished", extra={"purge_id": str(purge.id), "scope": purge.scope, "deleted_rows": purge.deleted_rows})
+    return purge_to_dict(purge)
+
+@job_handler(PURGE_JOB)
+def _purge_job(payload: dict, user, db: Session):
+    return run_purge(db, uuid.UUID(payload["purge_id"]))
+
+def purge_to_dict(purge: DataPurge) -> dict:
+    total = purge.total_rows
+    return {
+        "purge_id": str(purge.id),
+        "scope": purge.scope,
+        "status": purge.status,
+        "cutoff": purge.cutoff,
+        "deleted_rows": purge.deleted_rows,
+        "total_rows": total,
+        "percent": round(100 * min(purge.deleted_rows, total) / total, 1) if total else (100.0 if purge.status == 'succeeded' else None),
+        "progress": json.loads(purge.progress) if purge.progress else {},
+        "created_at": purge.created_at,
+        "finished_at": purge.finished_at,
+        "error": purge.error if purge.status == 'failed' else None,
+    }
@@ -0,0 +1,25 @@
+import logging
+from app.database.session import SessionLocal
+from app.services.ai.content_pool import refill_pools, missing_segments
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def refill_content_pools(only_missing: bool = False):
+    """Scheduled job: refill challenge/tip pools for every segment (or only empty ones)"""
+    db = SessionLocal()
+    try:
+        segments = missing_segments(db) if only_missing else None
+        if segments == []:
+            return
+        stored = refill_pools(db, segments)
+        logger.info("Content pools refilled (%s items)", stored)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Content pool refill failed: %s", e)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    setup_logging()
+    refill_content_pools()
@@ -0,0 +1,23 @@
+import logging
+from app.config import settings
+from app.database.session import SessionLocal
+from app.services.estimates import roll_forward_estimates
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def roll_forward_budgets():
+    """Scheduled job: copy last month's budgets into the new month"""
+    db = SessionLocal()
+    try:
+        stats = roll_forward_estimates(db, batch_size=settings.ESTIMATE_ROLLOVER_BATCH_SIZE)
+        logger.info("Budgets rolled forward", extra=stats)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Budget roll-forward failed: %s", e)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    setup_logging()
+    roll_forward_budgets()
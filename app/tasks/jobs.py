@@ -0,0 +1,23 @@
+import logging
+from app.database.session import SessionLocal
+from app.services.jobs import purge_finished_jobs
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def purge_old_jobs():
+    """Scheduled job: drop finished background jobs past retention"""
+    db = SessionLocal()
+    try:
+        deleted = purge_finished_jobs(db)
+        if deleted:
+            logger.info("Purged %s finished jobs", deleted)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Job purge failed: %s", e)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    setup_logging()
+    purge_old_jobs()
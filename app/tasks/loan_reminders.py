@@ -0,0 +1,22 @@
+import logging
+from app.database.session import SessionLocal
+from app.services.notifications.loan_reminders import send_due_reminders
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def send_loan_reminders():
+    """Scheduled job: push a reminder for loans whose reminder window opened"""
+    db = SessionLocal()
+    try:
+        stats = send_due_reminders(db)
+        logger.info("Loan reminders sent", extra=stats)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Loan reminders failed: %s", e)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    setup_logging()
+    send_loan_reminders()
@@ -0,0 +1,15 @@
+import json
+
+from app.database.session import SessionLocal
+from app.services.loan_analytics import fleet_loan_totals
+
+def loan_portfolio_report() -> dict:
+    """Fleet-wide open-loan totals for reporting"""
+    db = SessionLocal()
+    try:
+        return fleet_loan_totals(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print(json.dumps(loan_portfolio_report(), indent=2, default=str))
@@ -0,0 +1,248 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
+from sqlalchemy import distinct
+
+from app.config import settings
+from app.database.session import SessionLocal, engine
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.ai.forecaster import FORECAST_TYPE, compute_forecast, explain_forecast, explanation_key, explanation_fingerprint
+from app.services.ai.insight_store import fingerprint_inputs, load_insights, save_insights, is_fresh
+from app.services.ai.insights import INSIGHT_TYPE, insight_inputs_from_snapshot, build_insights
+from app.services.ai.snapshot import query_snapshots
+from app.services.purge import active_purge_cutoff
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Off-peak precompute: stores insights and forecast explanations for recently active users, so
+# the morning/evening peaks are served from ai_insights instead of calling the LLM.
+#
+# The parent pages through active user ids (keyset) and hands chunks to a process pool. Each
+# chunk is two set-based snapshot queries, one bulk read of what is stored, bounded-concurrency
+# LLM calls for whatever is missing or stale, and one bulk write per type. Completed chunks are
+# checkpointed to a JSON file, so rerunning an interrupted run the same day resumes where it
+# stopped; a run that finished is not resumed, the next one starts over.
+
+STATS_KEYS = ("users", "insights_generated", "insights_reused", "forecasts_generated", "forecasts_reused", "errors")
+
+def _init_worker():
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    setup_logging()
+
+def _reusable(stored: dict, fingerprint: str) -> bool:
+    return is_fresh(stored, fingerprint, settings.PRECOMPUTE_REUSE_MINUTES)
+
+def process_chunk(user_ids: list, today_iso: str) -> dict:
+    """Precompute one chunk of users (runs in a pool process). Returns counters."""
+    today = date.fromisoformat(today_iso)
+    user_ids = [uuid.UUID(user_id) for user_id in user_ids]
+    stats = dict.fromkeys(STATS_KEYS, 0)
+    db = SessionLocal()
+    try:
+        # Users with a purge in progress are skipped: the set-based snapshot can't hide their purged rows
+        users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids), active_purge_cutoff(User.id).is_(None))}
+        snapshots = query_snapshots(db, list(users), today)
+        stored_insights = load_insights(db, list(users), INSIGHT_TYPE)
+        stored_forecasts = load_insights(db, list(users), FORECAST_TYPE)
+
+        insight_jobs, forecast_jobs = [], []
+        for user_id, user in users.items():
+            stats["users"] += 1
+            inputs = insight_inputs_from_snapshot(user, snapshots[user_id])
+            fingerprint = fingerprint_inputs(inputs)
+            if _reusable(stored_insights.get(user_id), fingerprint):
+                stats["insights_reused"] += 1
+            else:
+                insight_jobs.append((user_id, fingerprint, inputs))
+
+            forecast, savings_target, days_in_month = compute_forecast(user, snapshots[user_id])
+            key = explanation_key(forecast, savings_target, user.language)
+            fingerprint = explanation_fingerprint(key)
+            if _reusable(stored_forecasts.get(user_id), fingerprint):
+                stats["forecasts_reused"] += 1
+            else:
+                forecast_jobs.append((user_id, fingerprint, (forecast, savings_target, days_in_month, user.language)))
+    finally:
+        db.close()
+
+    # LLM calls: bounded threads per process, no DB session shared across them
+    def insight(job):
+        user_id, fingerprint, inputs = job
+        result, from_llm = build_insights(inputs)
+        return user_id, fingerprint if from_llm else None, result
+
+    def explanation(job):
+        user_id, fingerprint, args = job
+        return user_id, fingerprint, explain_forecast(*args)
+
+    threads = max(1, settings.PRECOMPUTE_AI_CONCURRENCY // max(1, settings.PRECOMPUTE_PROCESSES))
+    insight_rows, forecast_rows = [], []
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [(pool.submit(insight, job), insight_rows) for job in insight_jobs]
+        futures += [(pool.submit(explanation, job), forecast_rows) for job in forecast_jobs]
+        for future, rows in futures:
+            try:
+                user_id, fingerprint, data = future.result()
+            except Exception as e:
+                stats["errors"] += 1
+                logger.error("Precompute error: %s", e)
+                continue
+            if data:
+                rows.append((user_id, fingerprint, data))
+            else:
+                stats["errors"] += 1
+
+    db = SessionLocal()
+    try:
+        save_insights(db, INSIGHT_TYPE, insight_rows)
+        save_insights(db, FORECAST_TYPE, forecast_rows)
+    finally:
+        db.close()
+    stats["insights_generated"] = len(insight_rows)
+    stats["forecasts_generated"] = len(forecast_rows)
+    return stats
+
+def _active_user_chunks(after: str, cutoff: date, chunk_size: int):
+    """Keyset pages of users with transactions dated on or after cutoff"""
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(distinct(Transaction.user_id)).filter(Transaction.date >= cutoff)
+            if after:
+                query = query.filter(Transaction.user_id > uuid.UUID(after))
+            page = [str(user_id) for (user_id,) in query.order_by(Transaction.user_id).limit(chunk_size)]
+            if not page:
+                return
+            after = page[-1]
+            yield page
+    finally:
+        db.close()
+
+def _new_checkpoint(today: date) -> dict:
+    return {"date": today.isoformat(), "watermark": None, "done_ranges": [], "stats": dict.fromkeys(STATS_KEYS, 0)}
+
+def _load_checkpoint(path: str, today: date) -> dict:
+    """Today's interrupted run to resume, or a fresh one (each new day and each completed run
+    starts over: the next scheduled run recomputes everyone)"""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("date") == today.isoformat() and not checkpoint.get("complete"):
+            return checkpoint
+    except (OSError, ValueError):
+        pass
+    return _new_checkpoint(today)
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+def run_precompute(processes: int = None, chunk_size: int = None, resume: bool = True) -> dict:
+    """Precompute insights and forecasts for recently active users. Returns the throughput report."""
+    processes = processes or settings.PRECOMPUTE_PROCESSES
+    chunk_size = chunk_size or settings.PRECOMPUTE_CHUNK_SIZE
+    path = settings.PRECOMPUTE_CHECKPOINT_PATH
+    today = date.today()
+    checkpoint = _load_checkpoint(path, today) if resume else _new_checkpoint(today)
+    totals = checkpoint["stats"]
+    run_stats = dict.fromkeys(STATS_KEYS, 0)
+
+    # Chunks finish out of order: the watermark only moves past a chunk once every chunk before it
+    # is done; chunks completed beyond it are kept as ranges until it catches up
+    done_ranges = [tuple(r) for r in checkpoint["done_ranges"]]
+    submitted = deque()  # (first, last) in id order
+    completed = set(done_ranges)
+
+    def already_done(user_id: str) -> bool:
+        return any(first <= user_id <= last for first, last in done_ranges)
+
+    def finish(chunk_range, stats):
+        completed.add(chunk_range)
+        for name, value in stats.items():
+            run_stats[name] += value
+            totals[name] += value
+        while submitted and submitted[0] in completed:
+            checkpoint["watermark"] = submitted[0][1]
+            completed.discard(submitted.popleft())
+        watermark = checkpoint["watermark"]
+        if watermark:
+            completed.difference_update([r for r in completed if r[1] <= watermark])
+        checkpoint["done_ranges"] = sorted(completed)
+        _save_checkpoint(path, checkpoint)
+
+    started = time.monotonic()
+    cutoff = today - timedelta(days=settings.PRECOMPUTE_ACTIVE_DAYS)
+    context = multiprocessing.get_context("spawn")  # the scheduler runs this from a threaded process
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker) as pool:
+        running = {}
+        for page in _active_user_chunks(checkpoint["watermark"], cutoff, chunk_size):
+            user_ids = [user_id for user_id in page if not already_done(user_id)]
+            if not user_ids:
+                continue
+            chunk_range = (page[0], page[-1])
+            submitted.append(chunk_range)
+            running[pool.submit(process_chunk, user_ids, today.isoformat())] = chunk_range
+
+            # Bounded in-flight chunks keep the parent's memory flat
+            if len(running) >= processes * 2:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _collect(future, running.pop(future), finish, run_stats)
+
+        for future in list(running):
+            _collect(future, running.pop(future), finish, run_stats)
+
+    elapsed = time.monotonic() - started
+    report = {
+        **run_stats,
+        "elapsed_s": round(elapsed, 2),
+        "users_per_s": round(run_stats["users"] / elapsed, 1) if elapsed else None,
+        "processes": processes,
+        "chunk_size": chunk_size,
+        "finished_at": datetime.utcnow().isoformat(),
+        "today_total": dict(totals),
+    }
+    checkpoint["report"] = report
+    checkpoint["complete"] = True
+    _save_checkpoint(path, checkpoint)
+    logger.info("Precompute finished: %s users in %ss", run_stats['users'], report['elapsed_s'],
+                extra={key: report[key] for key in (*STATS_KEYS, "users_per_s", "processes", "chunk_size")})
+    return report
+
+def _collect(future, chunk_range, finish, run_stats):
+    try:
+        stats = future.result()
+    except Exception as e:
+        # Left out of the checkpoint so the next run retries the chunk
+        run_stats["errors"] += 1
+        logger.error("Precompute chunk failed: %s", e, extra={"first_user": chunk_range[0], "last_user": chunk_range[1]})
+        return
+    finish(chunk_range, stats)
+
+def precompute_ai_content():
+    """Scheduled job wrapper"""
+    try:
+        run_precompute()
+    except Exception as e:
+        logger.exception("Precompute failed: %s", e)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Precompute insights and forecasts for active users")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--restart", action="store_true", help="ignore today's checkpoint")
+    args = parser.parse_args()
+    setup_logging()
+    run_precompute(args.processes, args.chunk_size, resume=not args.restart)
@@ -0,0 +1,35 @@
+import logging
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.config import settings
+from app.tasks.content_pool import refill_content_pools
+from app.tasks.loan_reminders import send_loan_reminders
+from app.tasks.precompute import precompute_ai_content
+from app.tasks.jobs import purge_old_jobs
+from app.tasks.estimates import roll_forward_budgets
+
+logger = logging.getLogger(__name__)
+
+# Runs inside the API process. With several workers, enable it on one only (SCHEDULER_ENABLED).
+scheduler = BackgroundScheduler()
+
+def start_scheduler():
+    if scheduler.running:
+        return
+
+    # Fill empty segments right away, full refresh every night
+    scheduler.add_job(refill_content_pools, kwargs={"only_missing": True}, id="fill_missing_content_pools", replace_existing=True)
+    scheduler.add_job(refill_content_pools, "cron", hour=3, minute=0, id="refill_content_pools", replace_existing=True)
+    if settings.PRECOMPUTE_HOURS:
+        scheduler.add_job(precompute_ai_content, "cron", hour=settings.PRECOMPUTE_HOURS, minute=0, id="precompute_ai_content", replace_existing=True)
+    # Idempotent, so the startup run covers a server that was down at midnight on the 1st
+    scheduler.add_job(roll_forward_budgets, id="roll_forward_budgets_on_start", replace_existing=True)
+    scheduler.add_job(roll_forward_budgets, "cron", day=1, hour=0, minute=5, id="roll_forward_budgets", replace_existing=True)
+    scheduler.add_job(purge_old_jobs, "cron", hour=2, minute=30, id="purge_old_jobs", replace_existing=True)
+    scheduler.add_job(send_loan_reminders, "cron", hour=settings.REMINDER_HOUR, minute=0, id="send_loan_reminders", replace_existing=True)
+
+    scheduler.start()
+    logger.info("Scheduler started")
+
+def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
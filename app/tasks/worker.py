@@ -0,0 +1,53 @@
+import logging
+import threading
+
+from app.config import settings
+from app.services.jobs import worker_loop, wakeup
+import app.routes.ai  # registers the AI job handlers
+import app.services.purge  # registers the purge job handler
+from app.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+_stop = threading.Event()
+_threads = []
+
+def start_embedded_workers(count: int = None):
+    """Run job workers as daemon threads inside the API process (local/dev setups)"""
+    if _threads:
+        return
+    _stop.clear()
+    for i in range(count or settings.JOB_WORKER_THREADS):
+        thread = threading.Thread(target=worker_loop, args=(_stop,), name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+    logger.info("%s embedded job workers started", len(_threads))
+
+def stop_embedded_workers(timeout: float = 5.0):
+    _stop.set()
+    wakeup.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_THREADS)
+    args = parser.parse_args()
+    setup_logging()
+
+    threads = [threading.Thread(target=worker_loop, args=(_stop,), name=f"job-worker-{i}") for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    logger.info("Job worker running (%s threads)", args.concurrency)
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(1)
+    except KeyboardInterrupt:
+        logger.info("Stopping job worker")
+        _stop.set()
+        wakeup.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+from jose import jwt
+from app.config import settings
+
+# Stand-in for Firebase ID tokens (AUTH_VERIFIER=local): HS256 tokens signed with SECRET_KEY that
+# carry the claims get_current_user reads, so benchmarks and offline runs need no Firebase project
+# and no network round trip per request. Never enable it in production.
+
+def issue_local_token(firebase_uid: str, email: str, name: str = 'User', ttl_seconds: int = 24 * 3600) -> str:
+    now = datetime.utcnow()
+    claims = {
+        "sub": firebase_uid,
+        "user_id": firebase_uid,
+        "email": email,
+        "name": name,
+        "iat": now,
+        "exp": now + timedelta(seconds=ttl_seconds),
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def verify_local_token(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
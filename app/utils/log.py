@@ -0,0 +1,140 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import settings
+from app.utils.metrics import Counter
+
+# Logging without stdout I/O on the request path. Callers only build a LogRecord and put it on a
+# bounded queue; a listener thread formats JSON lines and writes them. When the queue is full the
+# record is dropped and counted rather than blocking the event loop.
+#
+# Levels are LOG_LEVEL with per-logger overrides in LOG_LEVELS ("app.middleware.auth=WARNING,...").
+# High-frequency INFO/DEBUG messages are sampled: per logger with LOG_SAMPLE_RATES
+# ("app.services.ai.gemini_client=0.1"), or per call with extra={"sample": 0.01}. Kept records
+# carry "sample_rate" so the pipeline can scale counts back up.
+#
+# Fields passed with extra={...} become top-level JSON keys.
+
+logs_dropped = Counter("spennies_log_records_dropped_total", "Log records dropped because the log queue was full")
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample", "sample_rate"}
+_listener = None
+_setup_lock = threading.Lock()
+
+def _parse_pairs(value: str) -> dict:
+    pairs = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, setting = item.split("=", 1)
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, extra fields, exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if getattr(record, "sample_rate", None):
+            entry["sample_rate"] = record.sample_rate
+        if record.exc_info:
+            entry["exc"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of INFO/DEBUG records; warnings and errors always pass"""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, record: logging.LogRecord):
+        rate = getattr(record, "sample", None)
+        if rate is not None:
+            return float(rate)
+        name = record.name
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record)
+        if rate is None or rate >= 1:
+            return True
+        record.sample_rate = rate
+        return random.random() < rate
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change once the call returns); the listener does the formatting
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            logs_dropped.inc()
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full at shutdown; wait for the writer to make room instead of failing
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass
+
+def setup_logging():
+    """Install the queue handler on the root logger and start the writer thread (idempotent)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        if settings.LOG_FORMAT == "text":
+            stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        else:
+            stream.setFormatter(JSONFormatter())
+
+        handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        handler.addFilter(SamplingFilter({name: float(rate) for name, rate in _parse_pairs(settings.LOG_SAMPLE_RATES).items()}))
+
+        root = logging.getLogger()
+        for existing in [h for h in root.handlers if isinstance(h, _NonBlockingQueueHandler)]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(settings.LOG_LEVEL.upper())
+        for name, level in _parse_pairs(settings.LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _listener = _Listener(handler.queue, stream, respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.session import SessionLocal
+from app.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# Coalesce concurrent identical computations: the first caller for a key starts the work,
+# callers arriving while it runs await the same result instead of repeating queries/LLM calls.
+#
+# Within a worker this is an in-memory map of running tasks. The work can outlive the request
+# that started it, so it gets a session of its own: fn is called as fn(db, *args). With
+# shared=True (and SINGLEFLIGHT_SHARED_LOCK on) that session first takes a Postgres advisory
+# lock, so the same key in another worker waits for it and then finds the result in the shared
+# store (e.g. ai_insights) instead of generating it again. One connection per running key.
+
+singleflight_calls = Counter("spennies_singleflight_calls_total", "Single-flight calls by name and role (leader or coalesced)", ("name", "role"))
+
+def _lock_id(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+def _run_in_session(lock_key, fn, args, kwargs):
+    """
+    Call fn(db, *args, **kwargs) on a new session. With lock_key, a transaction-level advisory lock
+    is taken on that session first; it is held until fn's first commit (storing its result) or the
+    end. Falls back to running unlocked on timeout.
+    """
+    db = SessionLocal()
+    try:
+        if lock_key:
+            try:
+                # SET does not take bind parameters; the value is an int from settings
+                db.execute(text(f"SET LOCAL lock_timeout = '{int(settings.SINGLEFLIGHT_LOCK_TIMEOUT_MS)}ms'"))
+                db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _lock_id(lock_key)})
+                db.execute(text("SET LOCAL lock_timeout = DEFAULT"))  # bound only the wait for this lock
+            except DBAPIError as e:
+                db.rollback()
+                logger.warning("Single-flight lock not acquired for %s: %s", lock_key, e.__class__.__name__)
+        return fn(db, *args, **kwargs)
+    finally:
+        db.rollback()  # ends the transaction, releasing the lock
+        db.close()
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight = {}
+
+    async def do(self, key, fn, *args, shared: bool = False, **kwargs):
+        """
+        Run fn(db, *args, **kwargs) in the threadpool once per key at a time, on a session of its own;
+        concurrent callers share the result. The work can outlive the request that started it: pass
+        plain values (ids), never ORM objects or the request's session.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            singleflight_calls.inc(name=self.name, role='coalesced')
+            # shield: a follower disconnecting must not cancel the leader's work
+            return await asyncio.shield(task)
+
+        singleflight_calls.inc(name=self.name, role='leader')
+        lock_key = f"{self.name}:{key}" if shared and settings.SINGLEFLIGHT_SHARED_LOCK else None
+        work = run_in_threadpool(_run_in_session, lock_key, fn, args, kwargs)
+
+        task = asyncio.ensure_future(work)
+        self._inflight[key] = task
+
+        def finished(done):
+            self._inflight.pop(key, None)
+            if not done.cancelled():
+                done.exception()  # mark retrieved even if every caller went away
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task)
@@ -0,0 +1,205 @@
+import argparse
+import random
+import time
+import uuid
+from datetime import date, datetime, time as day_time, timedelta
+from sqlalchemy import delete, func, insert, select
+
+from app.database.init_db import init_db
+from app.database.session import engine
+from app.models.estimate import Estimate
+from app.models.loan import Loan
+from app.models.transaction import Transaction, TransactionType, TransactionSource
+from app.models.user import User
+from app.services.ai.categorizer import EXPENSE_CATEGORIES
+
+# Synthetic gig-worker histories for benchmarks. Users are bench-000000, bench-000001, ...
+# (firebase_uid and email), so the runner can mint tokens for them with AUTH_VERIFIER=local.
+# Rows go in through Core executemany batches on one connection: no ORM objects, no hooks.
+#
+#   python -m benchmarks.datagen --users 200 --transactions 1000 --loans 4 --estimates 6 --reset
+
+BENCH_PREFIX = "bench-"
+INSERT_BATCH = 5000
+
+# (payer, income category, low, high, share of this user's transactions)
+INCOME = {
+    'driver': [("Uber weekly payout", 'Business', 2500, 9000, 0.08), ("Ola payout", 'Business', 400, 1500, 0.15), ("Rider tips", 'Tips', 20, 150, 0.1)],
+    'freelancer': [("Client payment via UPI", 'Freelance', 3000, 25000, 0.04), ("Upwork withdrawal", 'Freelance', 5000, 40000, 0.02)],
+    'vendor': [("Daily sales cash deposit", 'Business', 600, 3500, 0.3), ("PhonePe merchant settlement", 'Business', 300, 2000, 0.2)],
+    'student': [("Pocket money from home", 'Other', 1000, 4000, 0.03), ("Tuition fees received", 'Freelance', 500, 2500, 0.05)],
+    'housewife': [("Tailoring order payment", 'Business', 200, 1500, 0.08), ("Household allowance", 'Other', 3000, 10000, 0.02)],
+}
+
+# category -> [(description, low, high)]
+EXPENSES = {
+    'Food': [("Swiggy order", 120, 450), ("Zomato order", 150, 500), ("Chai and snacks", 20, 80), ("DMart groceries", 400, 2200), ("Vegetable market", 60, 300)],
+    'Transport': [("Petrol - HP pump", 200, 800), ("Metro card recharge", 100, 500), ("Auto fare", 40, 200), ("Bike service", 400, 1500)],
+    'Bills': [("Jio recharge", 199, 749), ("Electricity bill", 400, 2500), ("Room rent", 3000, 12000), ("Gas cylinder", 900, 1150)],
+    'Shopping': [("Amazon order", 200, 3000), ("Flipkart order", 250, 2500), ("Clothes - local market", 300, 1800)],
+    'Entertainment': [("Movie tickets", 150, 600), ("Netflix subscription", 149, 649), ("Cricket match snacks", 50, 300)],
+    'Healthcare': [("Apollo Pharmacy", 80, 900), ("Clinic consultation", 200, 800)],
+    'Other': [("Sent to family", 500, 5000), ("Temple donation", 20, 501), ("ATM withdrawal", 500, 3000)],
+}
+EXPENSE_WEIGHTS = {'Food': 40, 'Transport': 20, 'Bills': 8, 'Shopping': 10, 'Entertainment': 6, 'Healthcare': 5, 'Other': 11}
+
+LENDERS = ["Ramesh bhai", "Suresh Patil", "KreditBee", "Bajaj Finance", "Self-help group", "Uncle", "Mahila bachat gat"]
+LANGUAGES = (['en'] * 6) + (['hi'] * 3) + (['mr'] * 2)
+
+def bench_identity(i: int) -> tuple:
+    """(firebase_uid, email) of the i-th benchmark user"""
+    uid = f"{BENCH_PREFIX}{i:06d}"
+    return uid, f"{uid}@bench.spennies.local"
+
+def _user_row(i: int, rng: random.Random, now: datetime) -> dict:
+    uid, email = bench_identity(i)
+    job_type = rng.choice(list(INCOME))
+    avg_income = rng.randrange(8000, 45000, 500)
+    return {
+        "id": uuid.uuid4(),
+        "email": email,
+        "name": f"Bench User {i}",
+        "firebase_uid": uid,
+        "job_type": job_type,
+        "language": rng.choice(LANGUAGES),
+        "ai_tone": rng.choice(['friendly', 'professional', 'motivational']),
+        "avg_income": avg_income,
+        "savings_target": round(avg_income * rng.uniform(0.05, 0.25), -2),
+        "created_at": now - timedelta(days=rng.randint(30, 400)),
+        "updated_at": now,
+    }
+
+def _created_at(day: date, rng: random.Random) -> datetime:
+    return datetime.combine(day, day_time(rng.randint(7, 22), rng.randint(0, 59), rng.randint(0, 59)))
+
+def _transactions(user: dict, count: int, days: int, today: date, rng: random.Random):
+    """count transactions over the last `days` days: the profile's payouts, the rest weighted expenses"""
+    payers = INCOME[user["job_type"]]
+    categories = list(EXPENSE_WEIGHTS)
+    weights = list(EXPENSE_WEIGHTS.values())
+    for _ in range(count):
+        day = today - timedelta(days=min(int(rng.expovariate(3 / days)), days - 1))  # denser towards today
+        payer = rng.choice(payers)
+        if rng.random() < payer[4] * len(payers):
+            description, category, low, high = payer[:4]
+            tx_type = TransactionType.INCOME
+        else:
+            category = rng.choices(categories, weights)[0]
+            description, low, high = rng.choice(EXPENSES[category])
+            tx_type = TransactionType.EXPENSE
+        yield {
+            "id": uuid.uuid4(),
+            "user_id": user["id"],
+            "amount": round(rng.uniform(low, high), 2),
+            "category": category,
+            "type": tx_type,
+            "description": description,
+            "date": day,
+            "source": TransactionSource.SMS if rng.random() < 0.3 else TransactionSource.MANUAL,
+            "created_at": _created_at(day, rng),
+        }
+
+def _loans(user: dict, count: int, today: date, rng: random.Random):
+    for _ in range(count):
+        taken = today - timedelta(days=rng.randint(0, 150))
+        due = taken + timedelta(days=rng.choice([15, 30, 45, 60, 90, 180]))
+        paid = due < today and rng.random() < 0.7
+        yield {
+            "id": uuid.uuid4(),
+            "user_id": user["id"],
+            "lender_name": rng.choice(LENDERS),
+            "amount": rng.randrange(1000, 50000, 500),
+            "purpose": rng.choice([None, "Bike repair", "Phone EMI", "School fees", "Medical", "Stock for shop"]),
+            "date_taken": taken,
+            "due_date": due,
+            "interest_rate": rng.choice([0, 0, 12, 18, 24, 36]),
+            "is_paid": paid,
+            "paid_date": _created_at(min(due, today), rng) if paid else None,
+            "reminder_days": rng.choice([1, 3, 3, 7]),
+            "created_at": _created_at(taken, rng),
+        }
+
+def _estimates(user: dict, per_month: int, months: int, today: date, rng: random.Random):
+    categories = rng.sample(EXPENSE_CATEGORIES, min(per_month, len(EXPENSE_CATEGORIES)))
+    base = {category: rng.randrange(500, 8000, 100) for category in categories}
+    year, month = today.year, today.month
+    for _ in range(months):
+        for category, amount in base.items():
+            yield {
+                "id": uuid.uuid4(),
+                "user_id": user["id"],
+                "category": category,
+                "estimated_amount": round(amount * rng.uniform(0.9, 1.1), -1),
+                "month": month,
+                "year": year,
+                "created_at": _created_at(date(year, month, 1), rng),
+            }
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+def _insert(conn, table, rows) -> int:
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            conn.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+def reset_bench_data() -> int:
+    """Delete every benchmark user (their rows go with them through ON DELETE CASCADE)"""
+    users = User.__table__
+    with engine.begin() as conn:
+        return conn.execute(delete(users).where(users.c.firebase_uid.like(f"{BENCH_PREFIX}%"))).rowcount
+
+def generate(users: int, transactions: int, loans: int, estimates: int, estimate_months: int = 3,
+             days: int = 180, seed: int = 42, start: int = None) -> dict:
+    """Load `users` benchmark users (numbered after the existing ones unless start is given). Returns row counts."""
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.utcnow()
+    started = time.monotonic()
+    counts = {"users": 0, "transactions": 0, "loans": 0, "estimates": 0}
+
+    with engine.begin() as conn:
+        if start is None:
+            start = conn.execute(
+                select(func.count()).select_from(User.__table__).where(User.__table__.c.firebase_uid.like(f"{BENCH_PREFIX}%"))
+            ).scalar()
+        # Per user chunk: bounded memory however many users are generated
+        chunk = max(1, INSERT_BATCH // max(1, transactions))
+        for first in range(start, start + users, chunk):
+            user_rows = [_user_row(i, rng, now) for i in range(first, min(first + chunk, start + users))]
+            counts["users"] += _insert(conn, User.__table__, user_rows)
+            counts["transactions"] += _insert(conn, Transaction.__table__, (
+                row for user in user_rows for row in _transactions(user, transactions, days, today, rng)))
+            counts["loans"] += _insert(conn, Loan.__table__, (
+                row for user in user_rows for row in _loans(user, loans, today, rng)))
+            counts["estimates"] += _insert(conn, Estimate.__table__, (
+                row for user in user_rows for row in _estimates(user, estimates, estimate_months, today, rng)))
+            print(f"  {counts['users']}/{users} users, {counts['transactions']} transactions")
+
+    elapsed = time.monotonic() - started
+    rows = sum(counts.values())
+    print(f"✅ Generated {counts} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)" if elapsed else f"✅ Generated {counts}")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic gig-worker data for benchmarks")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=500, help="per user")
+    parser.add_argument("--loans", type=int, default=3, help="per user")
+    parser.add_argument("--estimates", type=int, default=5, help="categories per user and month")
+    parser.add_argument("--estimate-months", type=int, default=3)
+    parser.add_argument("--days", type=int, default=180, help="history length")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete existing benchmark users first")
+    args = parser.parse_args()
+
+    init_db()
+    if args.reset:
+        print(f"🗑️ Deleted {reset_bench_data()} benchmark users")
+    generate(args.users, args.transactions, args.loans, args.estimates, args.estimate_months, args.days, args.seed)
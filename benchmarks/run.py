@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import date, datetime
+import httpx
+import numpy as np
+
+from app.utils.local_auth import issue_local_token
+from benchmarks.datagen import bench_identity
+
+# Load test for the API routers. Start the server with the local stand-ins so neither Firebase nor
+# Gemini is in the measured path (and no keys are needed):
+#
+#   AUTH_VERIFIER=local LLM_PROVIDER=stub SCHEDULER_ENABLED=false uvicorn app.main:app --workers 2
+#   python -m benchmarks.run --concurrency 1,8,32 --requests 300
+#
+# Every endpoint is measured on its own: `requests` calls spread over the benchmark users by
+# `concurrency` workers, after a short warmup. Results (throughput, p50/p95/p99 latency, errors)
+# go to benchmarks/results/<timestamp>.json; --baseline prints the change against an earlier run.
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def _transaction(rng: random.Random) -> dict:
+    return {
+        "amount": rng.randrange(20, 800),
+        "category": rng.choice(["Food", "Transport", "Shopping"]),
+        "type": "expense",
+        "description": rng.choice(["Chai", "Auto fare", "Swiggy order"]),
+        "date": date.today().isoformat(),
+        "source": "manual",
+    }
+
+def _estimates(rng: random.Random) -> dict:
+    today = date.today()
+    return {
+        "month": today.month,
+        "year": today.year,
+        "estimates": [{"category": category, "estimated_amount": rng.randrange(500, 5000, 100)} for category in ("Food", "Transport")],
+    }
+
+def _chat(rng: random.Random) -> dict:
+    return {"message": rng.choice(["How much did I spend on food this month?", "Can I save more this week?"]), "language": "en"}
+
+# router -> [(method, path, body builder or None, writes)]
+ENDPOINTS = {
+    "dashboard": [
+        ("GET", "/api/dashboard/summary", None, False),
+        ("GET", "/api/dashboard/charts", None, False),
+    ],
+    "transactions": [
+        ("GET", "/api/transactions/?limit=50", None, False),
+        ("POST", "/api/transactions/", _transaction, True),
+    ],
+    "loans": [
+        ("GET", "/api/loans/", None, False),
+        ("GET", "/api/loans/summary", None, False),
+    ],
+    "estimates": [
+        ("GET", f"/api/estimates/?month={date.today().month}&year={date.today().year}", None, False),
+        ("PUT", "/api/estimates/bulk", _estimates, True),
+    ],
+    "ai": [
+        ("GET", "/api/ai/insights", None, False),
+        ("GET", "/api/ai/forecast", None, False),
+        ("GET", "/api/ai/challenge", None, False),
+        ("POST", "/api/ai/categorize?description=Swiggy%20order&amount=250", None, False),
+        ("POST", "/api/ai/chat", _chat, True),
+    ],
+}
+
+def _stats(latencies: list, errors: int, elapsed: float) -> dict:
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 1),
+            "p50": round(float(p50), 1),
+            "p95": round(float(p95), 1),
+            "p99": round(float(p99), 1),
+            "max": round(float(ms.max()), 1),
+        },
+    }
+
+async def _measure(client: httpx.AsyncClient, tokens: list, endpoint: tuple, requests: int, concurrency: int, warmup: int, rng: random.Random) -> dict:
+    method, path, body, _ = endpoint
+    latencies, statuses = [], {}
+    errors = 0
+
+    async def call(record: bool):
+        nonlocal errors
+        token = rng.choice(tokens)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body(rng) if body else None, headers={"Authorization": f"Bearer {token}"})
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = e.__class__.__name__
+        elapsed = time.perf_counter() - started
+        if record:
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if not isinstance(status, int) or status >= 400:
+                errors += 1
+
+    for _ in range(warmup):
+        await call(False)
+
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await call(True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = _stats(latencies, errors, time.perf_counter() - started)
+    stats["status_codes"] = statuses
+    return stats
+
+async def run(base_url: str, users: int, concurrency_levels: list, requests: int, warmup: int, routers: list,
+              read_only: bool, timeout: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    started_at = datetime.utcnow().isoformat()
+    tokens = [issue_local_token(*bench_identity(i)) for i in range(users)]
+    results = []
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        probe = await client.get("/api/transactions/?limit=1", headers={"Authorization": f"Bearer {tokens[0]}"})
+        if probe.status_code == 401:
+            raise SystemExit("❌ Token rejected: start the server with AUTH_VERIFIER=local and the same SECRET_KEY")
+
+        for concurrency in concurrency_levels:
+            for router in routers:
+                for endpoint in ENDPOINTS[router]:
+                    if read_only and endpoint[3]:
+                        continue
+                    stats = await _measure(client, tokens, endpoint, requests, concurrency, warmup, rng)
+                    name = f"{endpoint[0]} {endpoint[1].split('?')[0]}"
+                    results.append({"router": router, "endpoint": name, "concurrency": concurrency, **stats})
+                    latency = stats["latency_ms"]
+                    print(f"  c={concurrency:<3} {name:<32} {stats['throughput_rps']:>8} rps  "
+                          f"p50 {latency['p50']:>7}ms  p95 {latency['p95']:>7}ms  p99 {latency['p99']:>7}ms  errors {stats['errors']}")
+    return {
+        "meta": {
+            "started_at": started_at,
+            "base_url": base_url,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "users": users,
+            "requests": requests,
+            "warmup": warmup,
+            "concurrency": concurrency_levels,
+            "read_only": read_only,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: dict, baseline: dict):
+    """Print throughput and latency change per endpoint against an earlier report"""
+    before = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"Compared with {baseline['meta'].get('git_commit')} ({baseline['meta'].get('started_at')}):")
+    for result in report["results"]:
+        old = before.get((result["endpoint"], result["concurrency"]))
+        if old is None:
+            continue
+
+        def change(new, previous):
+            return f"{100 * (new - previous) / previous:+.1f}%" if previous else "n/a"
+
+        print(f"  c={result['concurrency']:<3} {result['endpoint']:<32} "
+              f"rps {change(result['throughput_rps'] or 0, old['throughput_rps'] or 0):>8}  "
+              f"p50 {change(result['latency_ms']['p50'], old['latency_ms']['p50']):>8}  "
+              f"p95 {change(result['latency_ms']['p95'], old['latency_ms']['p95']):>8}  "
+              f"p99 {change(result['latency_ms']['p99'], old['latency_ms']['p99']):>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure throughput and latency per API endpoint")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=100, help="benchmark users to spread requests over (see benchmarks.datagen)")
+    parser.add_argument("--concurrency", default="8", help="comma-separated levels, e.g. 1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--routers", default=",".join(ENDPOINTS), help=f"subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--read-only", action="store_true", help="skip endpoints that write")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="result file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    routers = [router.strip() for router in args.routers.split(",") if router.strip()]
+    unknown = set(routers) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown routers: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    report = asyncio.run(run(args.base_url, args.users, levels, args.requests, args.warmup, routers,
+                             args.read_only, args.timeout, args.seed))
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
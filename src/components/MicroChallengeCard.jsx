@@ -65,11 +65,11 @@ export default function MicroChallengeCard() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []) // run once on mount
 
-  const fetchNewChallenge = async () => {
+  const fetchNewChallenge = async (refresh = false) => {
     setLoading(true)
     try {
-      // Call backend AI
-      const response = await api.get('/api/ai/challenge?refresh=true')
+      // Daily challenge from the server pool; refresh=true asks the AI for a new one
+      const response = await api.get(`/api/ai/challenge?refresh=${refresh}`)
       const newChallenge = {
         ...response.data,
         id: Date.now().toString() // Unique ID
@@ -110,7 +110,7 @@ export default function MicroChallengeCard() {
 
   const handleSkip = () => {
     // fetch a fresh challenge (this will overwrite the user-scoped stored challenge)
-    fetchNewChallenge()
+    fetchNewChallenge(true)
   }
 
   if (completed) {
@@ -0,0 +1,69 @@
+import os
+import uuid
+from datetime import date, timedelta
+
+# Local stand-ins (see benchmarks/README.md): no Firebase or Gemini, no background threads
+os.environ.setdefault("AUTH_VERIFIER", "local")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("JOBS_EMBEDDED_WORKER", "false")
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Query budgets per endpoint, checked with assert_max_queries against the database in
+# DATABASE_URL (skipped when it is unreachable): python -m pytest tests
+#
+# Budgets are the measured statement counts, including the auth lookup. They must not grow
+# with the user's data: an N+1 regression goes over budget.
+QUERY_BUDGETS = {
+    "/api/dashboard/charts": 16,  # auth, category totals, 7 days x income/expense daily sums
+}
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+    from app.database.session import engine
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"database not reachable: {e}")
+    from app.main import app
+    return TestClient(app)
+
+@pytest.fixture(scope="module")
+def user_headers(client):
+    from app.database.session import SessionLocal
+    from app.models.transaction import Transaction, TransactionType
+    from app.models.user import User
+    from app.utils.local_auth import issue_local_token
+
+    uid = f"test-{uuid.uuid4().hex[:12]}"
+    db = SessionLocal()
+    try:
+        user = User(id=uuid.uuid4(), firebase_uid=uid, email=f"{uid}@example.com", name="Test")
+        db.add(user)
+        db.flush()
+        today = date.today()
+        db.add_all(
+            Transaction(id=uuid.uuid4(), user_id=user.id, amount=100 + i, type=TransactionType.EXPENSE if i % 4 else TransactionType.INCOME,
+                        category=("Food", "Transport", "Bills", "Shopping")[i % 4], description=f"tx {i}",
+                        date=today - timedelta(days=i % 28))
+            for i in range(60)
+        )
+        db.commit()
+        yield {"Authorization": f"Bearer {issue_local_token(uid, user.email)}"}
+    finally:
+        db.query(User).filter(User.firebase_uid == uid).delete()
+        db.commit()
+        db.close()
+
+@pytest.mark.parametrize("path", list(QUERY_BUDGETS))
+def test_query_budget(client, user_headers, path):
+    from app.middleware.query_stats import assert_max_queries
+
+    with assert_max_queries(QUERY_BUDGETS[path], path):
+        response = client.get(path, headers=user_headers)
+    assert response.status_code == 200